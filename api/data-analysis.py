@@ -1,14 +1,174 @@
 from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
 import json
 import logging
 from datetime import datetime, timedelta
+import os
 import random
+import sys
+import tempfile
+import time
 import traceback
 
+import numpy as np
+
 # 设置日志记录
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 将项目根目录加入模块搜索路径，以便复用 utils/ 中的代码
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from utils.draw_index import DrawIndex
+from utils.draws import load_draw_history
+from utils.feature_store import build_columns, open_feature_store
+from utils.hot_cold import HotColdScorer
+from utils.itemsets import FrequentItemsetMiner
+from utils.seasonal import SeasonalCube
+from utils.stat_tests import DrawStatistics, permutation_test, runs_test
+
+# 开奖历史数据文件
+DRAW_HISTORY_FILE = os.environ.get('DRAW_HISTORY_FILE', os.path.join(PROJECT_ROOT, 'data', 'sample.csv'))
+
+# 按期存储的特征库，与预测接口共用，默认放在临时目录（见 api/predict.py）
+FEATURE_STORE_DIR = os.environ.get('FEATURE_STORE_DIR',
+                                   os.path.join(tempfile.gettempdir(), 'lottery_feature_store'))
+
+# 冷热号得分所在的共享内存块，与预测接口共用；设为空字符串时使用进程内数组
+HOT_COLD_SHM_NAME = os.environ.get('HOT_COLD_SHM_NAME', 'lottery_hot_cold')
+
+# 置换检验的重排次数上限
+MAX_PERMUTATION_RESAMPLES = 10000
+
+# 星期下标（0为星期一）对应的名称
+WEEKDAY_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+# 查询类型
+QUERY_TYPES = ('subset', 'last_together', 'consecutive', 'count')
+
+# 频繁项集的最小支持度（占总期数的比例），需高于随机开奖下二元组的期望支持度（约0.017-0.024）
+MIN_ITEMSET_SUPPORT = float(os.environ.get('MIN_ITEMSET_SUPPORT', 0.03))
+
+# 进程级的索引缓存，Serverless实例被复用时无需重复构建
+_draw_index = None
+_itemset_miner = None
+_feature_store = None
+_draw_columns = None
+_history_key = None
+_draw_statistics = None
+_draw_statistics_key = None
+_hot_cold_scorer = None
+_seasonal_cube = None
+_seasonal_cube_key = None
+
+def get_draw_index():
+    """开奖历史的倒排位图索引，与特征库同步：只把上次之后新增的期追加进索引，历史被改写（期数变少）时重建"""
+    global _draw_index
+    draws = get_draw_columns(['dates', 'front_zone', 'back_zone'])
+    if _draw_index is None or _draw_index.n_periods > len(draws['front_zone']):
+        _draw_index = DrawIndex()
+    stored = _draw_index.n_periods
+    if len(draws['front_zone']) > stored:
+        _draw_index.extend(draws['front_zone'][stored:], draws['back_zone'][stored:], draws['dates'][stored:])
+        logger.info(f"开奖索引追加 {len(draws['front_zone']) - stored} 期，共 {_draw_index.n_periods} 期")
+    return _draw_index
+
+def get_itemset_miner():
+    """按需挖掘频繁项集，索引追加新开奖后增量更新，索引重建后重新挖掘"""
+    global _itemset_miner
+    index = get_draw_index()
+    if _itemset_miner is None or _itemset_miner.counted_periods > index.n_periods:
+        _itemset_miner = FrequentItemsetMiner(MIN_ITEMSET_SUPPORT).fit(index)
+    elif _itemset_miner.counted_periods != index.n_periods:
+        _itemset_miner.update(index)
+    return _itemset_miner
+
+def get_draw_columns(columns, start=0):
+    """
+    按列读取历史开奖的号码与形态特征：优先从特征库读取，特征库不可用（如只读文件系统）时在内存中计算。
+    开奖数据文件变化（修改时间或大小不同）后先同步新增的期，各增量统计据此追加
+    :param columns: 列名列表，见 utils.feature_store.STORE_COLUMNS
+    :param start: 起始期序号
+    :return: {列名: 数组}
+    """
+    global _feature_store, _draw_columns, _history_key
+    history_key = _history_file_key()
+    if history_key != _history_key or (_feature_store is None and _draw_columns is None):
+        _history_key = history_key
+        _sync_draw_columns()
+    if _feature_store is not None:
+        return _feature_store.read(columns, start)
+    return {column: _draw_columns[column][start:] for column in columns}
+
+def _sync_draw_columns():
+    """打开或同步特征库；特征库不可用时在内存中重新计算全部列"""
+    global _feature_store, _draw_columns
+    if _feature_store is None and _draw_columns is None:
+        _feature_store = open_feature_store(FEATURE_STORE_DIR, DRAW_HISTORY_FILE)
+        if _feature_store is not None:
+            return
+    try:
+        dates, front_zone, back_zone = load_draw_history(DRAW_HISTORY_FILE)
+    except (OSError, ValueError) as e:
+        logger.error(f"读取开奖历史失败: {str(e)}")
+        if _draw_columns is None and _feature_store is None:
+            _draw_columns = build_columns(np.zeros((0, 5), dtype=np.int16), np.zeros((0, 2), dtype=np.int16))
+        return
+    if _feature_store is not None:
+        try:
+            _feature_store.sync(dates, front_zone, back_zone)
+        except OSError as e:
+            logger.error(f"同步特征库失败: {str(e)}")
+    else:
+        _draw_columns = build_columns(front_zone, back_zone, dates)
+
+def _history_file_key():
+    """开奖数据文件的修改时间与大小，文件不存在时为None"""
+    try:
+        stat = os.stat(DRAW_HISTORY_FILE)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return None
+
+def get_draw_statistics():
+    """号码计数与和值矩；开奖数据文件变化（修改时间或大小不同）后从头重建，文件被改写时不会沿用旧的计数"""
+    global _draw_statistics, _draw_statistics_key
+    history_key = _history_file_key()
+    if _draw_statistics is None or history_key != _draw_statistics_key:
+        _draw_statistics = DrawStatistics()
+        _draw_statistics_key = history_key
+    new_draws = get_draw_columns(['front_zone', 'back_zone'], _draw_statistics.n_periods)
+    if len(new_draws['front_zone']):
+        _draw_statistics.extend(new_draws['front_zone'], new_draws['back_zone'])
+    return _draw_statistics
+
+def get_hot_cold_scorer():
+    """连接共享的冷热号得分，与开奖历史同步：只追加新增的期，历史被改写时重建；数据为空时返回None"""
+    global _hot_cold_scorer
+    if _hot_cold_scorer is None:
+        try:
+            _hot_cold_scorer = HotColdScorer(shm_name=HOT_COLD_SHM_NAME or None)
+        except OSError as e:
+            logger.warning(f"无法使用共享内存，改用进程内冷热号得分: {str(e)}")
+            _hot_cold_scorer = HotColdScorer()
+    draws = get_draw_columns(['front_zone', 'back_zone'])
+    _hot_cold_scorer.sync(draws['front_zone'], draws['back_zone'])
+    return _hot_cold_scorer if _hot_cold_scorer.n_periods else None
+
+def get_seasonal_cube():
+    """号码×月份×星期×年份 聚合立方体；开奖数据文件变化（修改时间或大小不同）后从头重建"""
+    global _seasonal_cube, _seasonal_cube_key
+    history_key = _history_file_key()
+    if _seasonal_cube is None or history_key != _seasonal_cube_key:
+        _seasonal_cube = SeasonalCube()
+        _seasonal_cube_key = history_key
+    new_draws = get_draw_columns(['dates', 'front_zone', 'back_zone'], _seasonal_cube.n_periods)
+    if len(new_draws['front_zone']):
+        _seasonal_cube.extend(new_draws['front_zone'], new_draws['back_zone'], new_draws['dates'])
+    return _seasonal_cube
+
 class DataAnalysisEngine:
     """数据分析引擎 - 保持完整的分析逻辑"""
     
@@ -30,9 +190,23 @@ class DataAnalysisEngine:
                 ([9, 35], [11])
             ]
         }
+        
+        # 有开奖历史时以指数衰减得分给出的冷热号替换预设值
+        scorer = get_hot_cold_scorer()
+        if scorer is not None:
+            rankings = scorer.rankings()
+            self.historical_patterns.update({
+                'hot_front_numbers': rankings['hot_front'],
+                'cold_front_numbers': rankings['cold_front'],
+                'hot_back_numbers': rankings['hot_back'],
+                'cold_back_numbers': rankings['cold_back']
+            })
     
-    def generate_comprehensive_analysis(self):
-        """生成完整的数据分析报告"""
+    def generate_comprehensive_analysis(self, permutation_resamples=0):
+        """
+        生成完整的数据分析报告
+        :param permutation_resamples: 统计检验中置换检验的重排次数，0表示不做
+        """
         try:
             # 基础数据概览
             data_overview = self._generate_data_overview()
@@ -50,7 +224,7 @@ class DataAnalysisEngine:
             combination_analysis = self._analyze_combinations()
             
             # 统计特征分析
-            statistical_features = self._extract_statistical_features()
+            statistical_features = self._extract_statistical_features(permutation_resamples)
             
             # 预测建议
             prediction_insights = self._generate_prediction_insights()
@@ -75,6 +249,56 @@ class DataAnalysisEngine:
             logger.error(f"生成综合分析错误: {str(e)}")
             raise
     
+    def query_draws(self, query):
+        """
+        基于倒排位图索引的开奖历史查询
+        :param query: {'type': subset|last_together|consecutive|count, 'front': [...], 'back': [...],
+                       'length': 连号个数, 'limit': 返回期数上限}
+        :return: 查询结果
+        """
+        index = get_draw_index()
+        
+        query_type = query.get('type', 'subset')
+        if query_type not in QUERY_TYPES:
+            raise ValueError(f"不支持的查询类型: {query_type}，可选 {QUERY_TYPES}")
+        front = self._validate_numbers(query.get('front', []), 35, 5, '前区')
+        back = self._validate_numbers(query.get('back', []), 12, 2, '后区')
+        limit = max(1, min(int(query.get('limit', 50)), 1000))
+        
+        started = time.perf_counter()
+        if query_type == 'consecutive':
+            length = int(query.get('length', 3))
+            if not 2 <= length <= 5:
+                raise ValueError("连号个数应在2到5之间")
+            bitmap = index.consecutive_bitmap(length)
+        else:
+            bitmap = index.subset_bitmap(front, back)
+        
+        count = index.count(bitmap)
+        result = {
+            'type': query_type,
+            'front': front,
+            'back': back,
+            'total_periods': index.n_periods,
+            'match_count': count,
+            'match_rate': round(count / index.n_periods, 6) if index.n_periods else 0.0
+        }
+        if query_type == 'last_together':
+            last = index.last_period(bitmap)
+            result['last_occurrence'] = index.describe([last])[0] if last is not None else None
+            result['periods_since'] = index.n_periods - 1 - last if last is not None else None
+        elif query_type in ('subset', 'consecutive'):
+            result['periods'] = index.describe(index.periods(bitmap, limit))
+        result['query_time_us'] = round((time.perf_counter() - started) * 1e6, 1)
+        return result
+    
+    def _validate_numbers(self, numbers, max_number, max_count, zone_name):
+        """校验查询号码：去重、范围与个数"""
+        numbers = sorted(set(int(n) for n in numbers))
+        if len(numbers) > max_count or any(not 1 <= n <= max_number for n in numbers):
+            raise ValueError(f"{zone_name}号码应为1-{max_number}之间的至多{max_count}个号码")
+        return numbers
+    
     def _generate_data_overview(self):
         """生成数据概览"""
         return {
@@ -183,9 +407,40 @@ class DataAnalysisEngine:
             }
         }
     
+    def _analyze_decayed_hot_cold(self):
+        """各半衰期下的指数衰减冷热号，半衰期越短越反映近期走势"""
+        scorer = get_hot_cold_scorer()
+        if scorer is None:
+            return None
+        return {f'half_life_{half_life}': scorer.rankings(half_life, hot_count=5, cold_count=5,
+                                                          back_hot_count=3, back_cold_count=3)
+                for half_life in scorer.half_lives}
+    
+    def _analyze_seasonal_patterns(self):
+        """各季节与各开奖星期相对理论频率开出最多的号码，均为聚合立方体上的切片求和"""
+        cube = get_seasonal_cube()
+        if cube.draws.sum() == 0:
+            return None
+        favorites = cube.seasonal_favorites()
+        return {
+            'spring_favorites': favorites['spring']['front'],
+            'summer_actives': favorites['summer']['front'],
+            'autumn_peaks': favorites['autumn']['front'],
+            'winter_dominants': favorites['winter']['front'],
+            'back_zone_favorites': {season: item['back'] for season, item in favorites.items()},
+            'draws_per_season': {season: item['draws'] for season, item in favorites.items()},
+            'weekday_favorites': {WEEKDAY_NAMES[weekday]: numbers
+                                  for weekday, numbers in cube.weekday_favorites().items()}
+        }
+    
+    def _analyze_cycles(self):
+        """前区号码开出率的月度周期"""
+        return get_seasonal_cube().cycle_statistics()
+    
     def _analyze_trends(self):
         """趋势分析"""
         return {
+            'decayed_hot_cold': self._analyze_decayed_hot_cold(),
             'recent_trends': {
                 'last_10_periods': {
                     'hot_emerging': random.sample(range(1, 36), 3),
@@ -198,18 +453,8 @@ class DataAnalysisEngine:
                     'sideways_movement': random.sample(range(1, 36), 4)
                 }
             },
-            'seasonal_patterns': {
-                'spring_favorites': random.sample(range(1, 36), 4),
-                'summer_actives': random.sample(range(1, 36), 4),
-                'autumn_peaks': random.sample(range(1, 36), 4),
-                'winter_dominants': random.sample(range(1, 36), 4)
-            },
-            'cyclical_analysis': {
-                'cycle_length': random.randint(15, 25),
-                'current_cycle_position': random.randint(1, 25),
-                'predicted_peak_numbers': random.sample(range(1, 36), 6),
-                'cycle_confidence': round(random.uniform(0.65, 0.85), 3)
-            },
+            'seasonal_patterns': self._analyze_seasonal_patterns(),
+            'cyclical_analysis': self._analyze_cycles(),
             'volatility_metrics': {
                 'number_volatility_index': round(random.uniform(0.3, 0.7), 3),
                 'pattern_stability_score': round(random.uniform(0.6, 0.9), 3),
@@ -217,37 +462,68 @@ class DataAnalysisEngine:
             }
         }
     
+    def _analyze_frequent_itemsets(self, limit=10):
+        """开奖历史中的频繁号码组合：前区二元组、三元组与前后区组合"""
+        miner = get_itemset_miner()
+        front_back = [s for s in miner.itemsets() if s['front'] and s['back']]
+        itemsets = {
+            'min_support': miner.min_support,
+            'total_periods': miner.counted_periods,
+            'front_pairs': [s for s in miner.itemsets(2) if not s['back']][:limit],
+            'front_triples': [s for s in miner.itemsets(3) if not s['back']][:limit],
+            'front_back_combinations': front_back[:limit]
+        }
+        if front_back:
+            self.historical_patterns['frequent_combinations'] = [(s['front'], s['back']) for s in front_back[:3]]
+        return itemsets
+    
+    def _analyze_winning_patterns(self):
+        """历史开奖的奇偶、大小、和值与连号形态分布"""
+        features = get_draw_columns(['odd_count', 'large_count', 'front_sum', 'consecutive_pairs'])
+        total = len(features['odd_count'])
+        odd_counts = np.bincount(features['odd_count'].astype(np.int64), minlength=6)
+        large_counts = np.bincount(features['large_count'].astype(np.int64), minlength=6)
+        sum_counts, _ = np.histogram(features['front_sum'], bins=[0, 91, 121, 151, np.inf])
+        consecutive = np.bincount(np.minimum(features['consecutive_pairs'], 3).astype(np.int64), minlength=4)
+        return {
+            'total_periods': total,
+            'odd_even_patterns': self._pattern_counts(
+                {f'{k}_{5 - k}': odd_counts[k] for k in range(5, -1, -1)}, total),
+            'large_small_patterns': self._pattern_counts(
+                {f'{k}_{5 - k}': large_counts[k] for k in range(5, -1, -1)}, total),
+            'sum_value_distribution': self._pattern_counts(dict(zip(
+                ('low_sum_15_90', 'medium_sum_91_120', 'high_sum_121_150', 'extreme_sum_151_plus'),
+                sum_counts)), total),
+            'consecutive_number_patterns': self._pattern_counts(dict(zip(
+                ('no_consecutive', 'one_pair', 'two_pairs', 'three_plus'), consecutive)), total)
+        }
+    
+    def _analyze_number_spacing(self):
+        """前区跨度与间距均匀度分布"""
+        features = get_draw_columns(['span', 'evenness'])
+        span, evenness = features['span'], features['evenness']
+        return {
+            'tight_clustering': int((span <= 15).sum()),
+            'mixed_pattern': int(((span > 15) & (span < 30)).sum()),
+            'wide_spread': int((span >= 30).sum()),
+            'average_span': round(float(span.mean()), 2) if len(span) else None,
+            'average_evenness': round(float(evenness.mean()), 3) if len(evenness) else None
+        }
+    
+    def _pattern_counts(self, counts, total):
+        """{形态: 期数} -> {形态: {'frequency': 期数, 'percentage': 占比}}"""
+        return {
+            pattern: {'frequency': int(count),
+                      'percentage': f'{100 * count / total:.1f}%' if total else '0.0%'}
+            for pattern, count in counts.items()
+        }
+    
     def _analyze_combinations(self):
         """组合模式分析"""
         return {
-            'winning_combinations_analysis': {
-                'odd_even_patterns': {
-                    '5_0': {'frequency': random.randint(5, 15), 'percentage': '1.2%'},
-                    '4_1': {'frequency': random.randint(45, 85), 'percentage': '8.5%'},
-                    '3_2': {'frequency': random.randint(180, 250), 'percentage': '28.3%'},
-                    '2_3': {'frequency': random.randint(180, 250), 'percentage': '28.1%'},
-                    '1_4': {'frequency': random.randint(45, 85), 'percentage': '8.2%'},
-                    '0_5': {'frequency': random.randint(5, 15), 'percentage': '1.1%'}
-                },
-                'sum_value_distribution': {
-                    'low_sum_60_90': {'count': random.randint(80, 120), 'percentage': '12.5%'},
-                    'medium_sum_91_120': {'count': random.randint(300, 400), 'percentage': '45.2%'},
-                    'high_sum_121_150': {'count': random.randint(200, 280), 'percentage': '32.8%'},
-                    'extreme_sum_151_plus': {'count': random.randint(40, 80), 'percentage': '9.5%'}
-                },
-                'consecutive_number_patterns': {
-                    'no_consecutive': {'frequency': random.randint(200, 300), 'percentage': '35.2%'},
-                    'one_pair': {'frequency': random.randint(250, 350), 'percentage': '42.1%'},
-                    'two_pairs': {'frequency': random.randint(80, 140), 'percentage': '15.8%'},
-                    'three_plus': {'frequency': random.randint(30, 70), 'percentage': '6.9%'}
-                }
-            },
-            'number_spacing_analysis': {
-                'tight_clustering': random.randint(15, 35),
-                'even_distribution': random.randint(180, 250),
-                'wide_spread': random.randint(120, 180),
-                'mixed_pattern': random.randint(200, 280)
-            },
+            'frequent_itemsets': self._analyze_frequent_itemsets(),
+            'winning_combinations_analysis': self._analyze_winning_patterns(),
+            'number_spacing_analysis': self._analyze_number_spacing(),
             'special_combinations': {
                 'all_primes': {'frequency': random.randint(2, 8), 'last_occurrence': '2023-08-15'},
                 'fibonacci_numbers': {'frequency': random.randint(8, 20), 'pattern_strength': 'medium'},
@@ -256,15 +532,28 @@ class DataAnalysisEngine:
             }
         }
     
-    def _extract_statistical_features(self):
-        """提取统计特征"""
+    def _extract_statistical_features(self, permutation_resamples=0):
+        """
+        提取统计特征：号码计数、和值矩与熵由增量统计量求得，游程检验在全部历史上向量化计算
+        :param permutation_resamples: 相邻期相关性置换检验的重排次数，0表示不做
+        """
+        statistics = get_draw_statistics()
+        if statistics.n_periods == 0:
+            return None
+        front_numbers = np.arange(1, statistics.counts['front'].size + 1)
+        back_numbers = np.arange(1, statistics.counts['back'].size + 1)
+        front_mean, front_std = self._weighted_moments(front_numbers, statistics.counts['front'])
+        back_mean, back_std = self._weighted_moments(back_numbers, statistics.counts['back'])
+        cumulative = np.cumsum(statistics.counts['front'])
+        front_entropy = statistics.entropy('front')
         return {
+            'total_periods': statistics.n_periods,
             'descriptive_statistics': {
-                'front_zone_mean': round(random.uniform(16.5, 19.2), 2),
-                'front_zone_median': round(random.uniform(17.8, 20.1), 2),
-                'front_zone_std': round(random.uniform(8.5, 12.3), 2),
-                'back_zone_mean': round(random.uniform(5.8, 7.2), 2),
-                'back_zone_std': round(random.uniform(2.8, 4.1), 2)
+                'front_zone_mean': round(front_mean, 2),
+                'front_zone_median': int(front_numbers[np.searchsorted(cumulative, cumulative[-1] / 2)]),
+                'front_zone_std': round(front_std, 2),
+                'back_zone_mean': round(back_mean, 2),
+                'back_zone_std': round(back_std, 2)
             },
             'correlation_analysis': {
                 'front_zone_correlations': {
@@ -278,27 +567,74 @@ class DataAnalysisEngine:
                 }
             },
             'distribution_tests': {
-                'normality_test': {
-                    'p_value': round(random.uniform(0.001, 0.05), 4),
-                    'result': 'non_normal_distribution'
-                },
-                'randomness_test': {
-                    'runs_test_p_value': round(random.uniform(0.1, 0.7), 3),
-                    'result': 'random_pattern_detected'
-                },
+                'normality_test': self._sum_normality_test(statistics),
+                'randomness_test': self._randomness_test(permutation_resamples),
                 'uniformity_test': {
-                    'chi_square_statistic': round(random.uniform(30.5, 55.8), 2),
-                    'p_value': round(random.uniform(0.2, 0.8), 3),
-                    'result': 'approximately_uniform'
+                    zone: {
+                        'chi_square_statistic': round(test['statistic'], 2),
+                        'degrees_of_freedom': test['df'],
+                        'p_value': round(test['p_value'], 4),
+                        'result': 'approximately_uniform' if test['p_value'] >= 0.05 else 'non_uniform'
+                    }
+                    for zone, test in (('front_zone', statistics.chi_square('front')),
+                                       ('back_zone', statistics.chi_square('back')))
                 }
             },
             'entropy_analysis': {
-                'information_entropy': round(random.uniform(4.8, 5.2), 3),
-                'pattern_complexity': round(random.uniform(0.75, 0.95), 3),
-                'predictability_index': round(random.uniform(0.15, 0.35), 3)
+                'information_entropy': round(front_entropy['entropy_bits'], 4),
+                'max_entropy': round(front_entropy['max_entropy_bits'], 4),
+                'normalized_entropy': round(front_entropy['normalized_entropy'], 6),
+                'back_zone_entropy': round(statistics.entropy('back')['entropy_bits'], 4),
+                'predictability_index': round(1 - front_entropy['normalized_entropy'], 6)
             }
         }
     
+    def _weighted_moments(self, values, counts):
+        """按出现次数加权的均值与标准差"""
+        mean = float((values * counts).sum() / counts.sum())
+        return mean, float(np.sqrt(((values - mean) ** 2 * counts).sum() / counts.sum()))
+    
+    def _sum_normality_test(self, statistics):
+        """前区和值的 Jarque-Bera 正态性检验"""
+        test = statistics.sum_normality()
+        if test is None:
+            return None
+        return {
+            'statistic': round(test['statistic'], 3),
+            'p_value': round(test['p_value'], 4),
+            'skewness': round(test['skewness'], 4),
+            'kurtosis': round(test['kurtosis'], 4),
+            'result': 'normal_distribution' if test['p_value'] >= 0.05 else 'non_normal_distribution'
+        }
+    
+    def _randomness_test(self, permutation_resamples=0):
+        """
+        随机性检验：每个号码出现序列的游程检验，以及前区和值高于/低于中位数序列的游程检验；
+        可选地附带相邻期重复号码数的置换检验
+        """
+        draws = get_draw_columns(['labels', 'front_sum'] + (['front_zone', 'back_zone'] if permutation_resamples else []))
+        front_sum = np.asarray(draws['front_sum'])
+        above = front_sum[front_sum != np.median(front_sum)] > np.median(front_sum)
+        _, _, number_p_values = runs_test(draws['labels'])
+        _, sum_z, sum_p_value = runs_test(above[:, None])
+        result = {
+            'runs_test_p_value': round(float(sum_p_value[0]), 4),
+            'runs_test_z': round(float(sum_z[0]), 3),
+            'numbers_tested': int(number_p_values.size),
+            'numbers_rejected_at_5pct': int((number_p_values < 0.05).sum()),
+            'min_number_p_value': round(float(number_p_values.min()), 4),
+            'result': 'random_pattern_detected' if sum_p_value[0] >= 0.05 else 'non_random_pattern'
+        }
+        if permutation_resamples:
+            test = permutation_test(draws['front_zone'], draws['back_zone'], permutation_resamples)
+            result['permutation_test'] = {
+                'statistic': round(test['statistic'], 4),
+                'null_mean': None if test['null_mean'] is None else round(test['null_mean'], 4),
+                'p_value': None if test['p_value'] is None else round(test['p_value'], 4),
+                'n_resamples': test['n_resamples']
+            }
+        return result
+    
     def _generate_prediction_insights(self):
         """生成预测洞察"""
         return {
@@ -360,8 +696,17 @@ class handler(BaseHTTPRequestHandler):
         try:
             logger.info("收到数据分析请求")
             
+            # 可选的置换检验：?permutation_resamples=1000
+            params = parse_qs(urlparse(self.path).query)
+            try:
+                permutation_resamples = int(params.get('permutation_resamples', ['0'])[0])
+            except ValueError:
+                self._send_error_response(400, "permutation_resamples 应为整数")
+                return
+            permutation_resamples = max(0, min(permutation_resamples, MAX_PERMUTATION_RESAMPLES))
+            
             # 生成完整的数据分析
-            analysis_result = self.analysis_engine.generate_comprehensive_analysis()
+            analysis_result = self.analysis_engine.generate_comprehensive_analysis(permutation_resamples)
             
             # 构建响应
             response_data = {
@@ -390,6 +735,40 @@ class handler(BaseHTTPRequestHandler):
             logger.error(traceback.format_exc())
             self._send_error_response(500, f"数据分析失败: {str(e)}")
     
+    def do_POST(self):
+        """开奖历史查询：请求体为 {'query': {...}}，见 DataAnalysisEngine.query_draws"""
+        try:
+            logger.info("收到开奖历史查询请求")
+            
+            content_length = int(self.headers.get('Content-Length', 0))
+            request_data = {}
+            if content_length > 0:
+                post_data = self.rfile.read(content_length)
+                try:
+                    request_data = json.loads(post_data.decode('utf-8'))
+                except json.JSONDecodeError as je:
+                    logger.error(f"JSON解析错误: {str(je)}")
+                    self._send_error_response(400, f"请求数据格式错误: {str(je)}")
+                    return
+            
+            try:
+                query_result = self.analysis_engine.query_draws(request_data.get('query', request_data))
+            except (TypeError, ValueError, OverflowError) as ve:
+                self._send_error_response(400, f"查询参数错误: {str(ve)}")
+                return
+            
+            self._send_json_response(200, {
+                'status': 'success',
+                'query_result': query_result,
+                'timestamp': datetime.now().isoformat()
+            })
+            logger.info("开奖历史查询响应发送成功")
+            
+        except Exception as e:
+            logger.error(f"开奖历史查询错误: {str(e)}")
+            logger.error(traceback.format_exc())
+            self._send_error_response(500, f"查询失败: {str(e)}")
+    
     def do_OPTIONS(self):
         """处理预检请求"""
         try:
@@ -397,7 +776,7 @@ class handler(BaseHTTPRequestHandler):
             
             self.send_response(200)
             self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
             self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With')
             self.send_header('Access-Control-Max-Age', '86400')
             self.send_header('Content-Length', '0')
@@ -415,7 +794,7 @@ class handler(BaseHTTPRequestHandler):
             self.send_response(status_code)
             self.send_header('Content-Type', 'application/json; charset=utf-8')
             self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
             self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With')
             self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
             self.send_header('Pragma', 'no-cache')
@@ -2,13 +2,45 @@ from http.server import BaseHTTPRequestHandler
 import json
 import logging
 from datetime import datetime, timedelta
+import os
 import random
+import sys
 import traceback
 
+import numpy as np
+
 # 设置日志记录
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 将项目根目录加入模块搜索路径，以便复用 utils/ 中的代码
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+try:
+    from utils.prize_simulation import PRIZE_TIERS, simulate_jackpot_pool, simulate_prizes, tier_probabilities
+except ImportError:
+    PRIZE_TIERS = simulate_jackpot_pool = simulate_prizes = tier_probabilities = None
+
+# 单次请求允许模拟的最大开奖次数
+MAX_SIMULATED_DRAWS = 5000000
+
+# 单次请求允许提交的最大注数，以及 注数×开奖次数 的上限（模拟耗时与两者之积成正比）
+MAX_SIMULATED_TICKETS = 100
+MAX_SIMULATED_TICKET_DRAWS = 50000000
+
+# 推演当期奖池状态时模拟的历史期数
+POOL_WARMUP_PERIODS = 120
+
+# 奖池模拟参数：起始奖池、单期基本投注销售额（元）与每种选号平均被重复购买的注数。
+# 在这组参数下奖池围绕8亿元波动，一等奖约九成的期数有人命中
+POOL_PARAMS = {
+    'initial_pool': 800000000,
+    'base_sales': 240000000,
+    'ticket_multiple': 3.0
+}
+
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
         try:
@@ -48,6 +80,19 @@ class handler(BaseHTTPRequestHandler):
                     self._send_error_response(400, f"请求数据格式错误: {str(je)}")
                     return
             
+            # 提交了投注号码时返回奖级与期望回报的模拟结果
+            if request_data.get('tickets'):
+                if simulate_prizes is None:
+                    self._send_error_response(503, "奖金模拟模块不可用")
+                    return
+                try:
+                    simulation_request = self._validate_simulation_request(request_data)
+                except (TypeError, ValueError, OverflowError) as ve:
+                    self._send_error_response(400, f"投注参数错误: {str(ve)}")
+                    return
+                self._send_json_response(200, self._simulate_ticket_returns(simulation_request))
+                return
+            
             current_period = request_data.get('current_period', '24120')
             last_period = request_data.get('last_period', '24119')
             
@@ -116,8 +161,11 @@ class handler(BaseHTTPRequestHandler):
             front_zone = sorted(random.sample(range(1, 36), 5))
             back_zone = sorted(random.sample(range(1, 13), 2))
             
-            # 生成详细的中奖统计
-            prize_info = self._generate_comprehensive_prize_info()
+            # 生成详细的中奖统计，奖金模拟模块不可用时不提供
+            if simulate_jackpot_pool is not None:
+                prize_info = self._generate_comprehensive_prize_info()
+            else:
+                prize_info = self._unavailable_prize_info()
             
             return {
                 'period': period,
@@ -162,58 +210,11 @@ class handler(BaseHTTPRequestHandler):
                         '湖北', '湖南', '福建', '安徽', '辽宁', '陕西', '天津', '江西', 
                         '广西', '重庆', '云南', '贵州', '河北', '山西', '吉林', '黑龙江']
             
-            # 各等奖中奖情况
-            first_prize_winners = random.randint(0, 5)
-            second_prize_winners = random.randint(8, 35)
-            third_prize_winners = random.randint(50, 200)
-            
-            breakdown = [
-                {
-                    'level': '一等奖',
-                    'condition': '前区5个号码+后区2个号码',
-                    'winners': first_prize_winners,
-                    'prize_per_winner': f'{random.randint(500, 2000)}万元',
-                    'total_amount': f'{first_prize_winners * random.randint(500, 2000)}万元' if first_prize_winners > 0 else '0元',
-                    'winning_provinces': random.sample(provinces, min(first_prize_winners, 3)) if first_prize_winners > 0 else []
-                },
-                {
-                    'level': '二等奖',
-                    'condition': '前区5个号码+后区1个号码',
-                    'winners': second_prize_winners,
-                    'prize_per_winner': f'{random.randint(20, 80)}万元',
-                    'total_amount': f'{second_prize_winners * random.randint(20, 80)}万元',
-                    'winning_provinces': random.sample(provinces, min(second_prize_winners, 8))
-                },
-                {
-                    'level': '三等奖',
-                    'condition': '前区5个号码',
-                    'winners': third_prize_winners,
-                    'prize_per_winner': f'{random.randint(8000, 15000)}元',
-                    'total_amount': f'{random.randint(400, 3000)}万元',
-                    'winning_provinces': random.sample(provinces, min(third_prize_winners // 10, 15))
-                },
-                {
-                    'level': '四等奖',
-                    'condition': '前区4个号码+后区2个号码',
-                    'winners': random.randint(800, 3000),
-                    'prize_per_winner': '200元',
-                    'total_amount': f'{random.randint(16, 60)}万元'
-                },
-                {
-                    'level': '五等奖',
-                    'condition': '前区4个号码+后区1个号码',
-                    'winners': random.randint(8000, 30000),
-                    'prize_per_winner': '10元',
-                    'total_amount': f'{random.randint(8, 30)}万元'
-                },
-                {
-                    'level': '六等奖',
-                    'condition': '前区2个号码+后区2个号码',
-                    'winners': random.randint(80000, 300000),
-                    'prize_per_winner': '5元',
-                    'total_amount': f'{random.randint(40, 150)}万元'
-                }
-            ]
+            # 用奖池模拟器逐期推演到当期，销量、浮动奖金与奖池滚存保持一致
+            state = self._simulate_pool_state()
+            total_sales = round(state['sales'] / 10000)
+            breakdown = self._build_prize_breakdown(state, provinces)
+            first_prize_winners = breakdown[0]['winners']
             
             # 地区分布详情
             regional_distribution = []
@@ -231,22 +232,25 @@ class handler(BaseHTTPRequestHandler):
                     'details': f'{province}地区共{winners_count}注中奖，涵盖{len(prize_levels)}个奖级'
                 })
             
+            total_prize_amount = round(sum(item['total_amount_yuan'] for item in breakdown) / 10000)
+            
             # 奖池信息
-            current_pool = random.randint(1000, 4000)
+            current_pool = round(state['pool'] / 10000)
             is_rollover = first_prize_winners == 0
-            rollover_count = random.randint(0, 8) if is_rollover else 0
+            rollover_count = int(state['streak'])
+            growth_amount = round((state['pool'] - state['previous_pool']) / 10000)
             
             return {
                 'breakdown': breakdown,
-                'total_sales': f'{random.randint(25000, 45000)}万元',
-                'total_prize_amount': f'{random.randint(12000, 25000)}万元',
-                'return_rate': f'{random.randint(45, 55)}%',
+                'total_sales': f'{total_sales}万元',
+                'total_prize_amount': f'{total_prize_amount}万元',
+                'return_rate': f'{total_prize_amount / total_sales:.1%}',
                 'jackpot': {
                     'current_pool': f'{current_pool}万元',
                     'is_rollover': is_rollover,
                     'rollover_count': rollover_count,
-                    'growth_amount': f'+{random.randint(200, 800)}万元' if is_rollover else '0元',
-                    'next_estimated': f'{current_pool + random.randint(500, 1500)}万元'
+                    'growth_amount': f'+{growth_amount}万元' if growth_amount > 0 else '0元',
+                    'next_estimated': f'{round(state["next_pool"] / 10000)}万元'
                 },
                 'regional_distribution': regional_distribution,
                 'special_notes': [
@@ -259,6 +263,128 @@ class handler(BaseHTTPRequestHandler):
             logger.error(f"生成中奖信息错误: {str(e)}")
             raise
     
+    def _unavailable_prize_info(self):
+        """奖金模拟模块不可用时的中奖信息：保持字段结构，数值留空"""
+        return {
+            'breakdown': [],
+            'total_sales': None,
+            'total_prize_amount': None,
+            'return_rate': None,
+            'jackpot': {
+                'current_pool': None,
+                'is_rollover': None,
+                'rollover_count': None,
+                'growth_amount': None,
+                'next_estimated': None
+            },
+            'regional_distribution': [],
+            'special_notes': []
+        }
+    
+    def _simulate_pool_state(self):
+        """模拟若干期奖池演变，取最后一期作为当期状态，并用多情景模拟估计下期奖池"""
+        seed = random.getrandbits(32)
+        history = simulate_jackpot_pool(POOL_WARMUP_PERIODS, 1, seed=seed, record_paths=True, **POOL_PARAMS)['paths']
+        forecast = simulate_jackpot_pool(1, 500, **dict(POOL_PARAMS, initial_pool=history['pool'][-1, 0]),
+                                         seed=seed + 1)
+        return {
+            **{name: float(values[-1, 0]) for name, values in history.items()},
+            'previous_pool': float(history['pool'][-2, 0]),
+            'next_pool': float(np.median(forecast['final_pool']))
+        }
+    
+    def _build_prize_breakdown(self, state, provinces):
+        """九个奖级的中奖情况：浮动奖级取自奖池模拟，固定奖级为以 销售注数×中奖概率 为均值的泊松抽样"""
+        rng = np.random.default_rng(random.getrandbits(32))
+        probabilities = tier_probabilities()
+        tickets_sold = state['sales'] / 2
+        floating = {
+            0: (int(state['first_winners']), int(state['first_prize'])),
+            1: (int(state['second_winners']), int(state['second_prize']))
+        }
+        
+        breakdown = []
+        for tier, (level, conditions, amount) in enumerate(PRIZE_TIERS):
+            if tier in floating:
+                winners, prize = floating[tier]
+            else:
+                winners, prize = int(rng.poisson(tickets_sold * probabilities[tier + 1])), amount
+            item = {
+                'level': level,
+                'condition': '或'.join(self._describe_condition(*c) for c in conditions),
+                'winners': winners,
+                'prize_per_winner': f'{prize / 10000:.2f}万元' if prize >= 10000 else f'{prize}元',
+                'total_amount': f'{winners * prize / 10000:g}万元' if winners > 0 else '0元',
+                'total_amount_yuan': winners * prize
+            }
+            if tier < 3:
+                item['winning_provinces'] = random.sample(provinces, min(winners, 3 + 5 * tier))
+            breakdown.append(item)
+        return breakdown
+    
+    def _describe_condition(self, front_hits, back_hits):
+        """将命中条件转换为文字描述"""
+        parts = []
+        if front_hits:
+            parts.append(f'前区{front_hits}个号码')
+        if back_hits:
+            parts.append(f'后区{back_hits}个号码')
+        return '+'.join(parts)
+    
+    def _validate_simulation_request(self, request_data):
+        """
+        校验投注模拟请求，参数不合法时抛出 ValueError
+        :return: {'front_zones', 'back_zones', 'n_draws', 'jackpot', 'second_prize'}
+        """
+        tickets = request_data['tickets']
+        if not isinstance(tickets, list) or not 1 <= len(tickets) <= MAX_SIMULATED_TICKETS:
+            raise ValueError(f"tickets 应为1到{MAX_SIMULATED_TICKETS}注投注的列表")
+        front_zones, back_zones = [], []
+        for i, ticket in enumerate(tickets):
+            if not isinstance(ticket, dict):
+                raise ValueError(f"第{i + 1}注应包含 front_zone 与 back_zone")
+            front_zones.append(self._validate_ticket_numbers(ticket.get('front_zone'), 35, 5, f'第{i + 1}注前区'))
+            back_zones.append(self._validate_ticket_numbers(ticket.get('back_zone'), 12, 2, f'第{i + 1}注后区'))
+
+        # 模拟耗时与 注数×开奖次数 成正比，注数较多时相应减少开奖次数
+        max_draws = min(MAX_SIMULATED_DRAWS, MAX_SIMULATED_TICKET_DRAWS // len(tickets))
+        n_draws = max(1000, min(int(request_data.get('n_draws', 1000000)), max_draws))
+        jackpot = float(request_data.get('jackpot', 10000000))
+        second_prize = float(request_data.get('second_prize', 200000))
+        if not (np.isfinite(jackpot) and np.isfinite(second_prize)) or jackpot < 0 or second_prize < 0:
+            raise ValueError("jackpot 与 second_prize 应为非负数")
+        return {
+            'front_zones': front_zones,
+            'back_zones': back_zones,
+            'n_draws': n_draws,
+            'jackpot': jackpot,
+            'second_prize': second_prize
+        }
+    
+    def _validate_ticket_numbers(self, numbers, max_number, count, zone_name):
+        """校验单注号码：恰好 count 个互不重复、在 1-max_number 之间的整数"""
+        if not isinstance(numbers, list) or \
+                any(isinstance(n, bool) or not isinstance(n, (int, float)) or n != int(n) for n in numbers):
+            raise ValueError(f"{zone_name}号码应为整数列表")
+        numbers = sorted(int(n) for n in numbers)
+        if len(numbers) != count or len(set(numbers)) != count or any(not 1 <= n <= max_number for n in numbers):
+            raise ValueError(f"{zone_name}号码应为1-{max_number}之间互不重复的{count}个号码")
+        return numbers
+    
+    def _simulate_ticket_returns(self, simulation_request):
+        """对校验后的投注号码做蒙特卡洛模拟，返回各奖级命中频率与期望回报"""
+        simulation = simulate_prizes(
+            simulation_request['front_zones'], simulation_request['back_zones'], simulation_request['n_draws'],
+            jackpot=simulation_request['jackpot'],
+            second_prize=simulation_request['second_prize'],
+            max_workers=1
+        )
+        return {
+            'status': 'success',
+            'simulation': simulation,
+            'timestamp': datetime.now().isoformat()
+        }
+    
     def _generate_analysis_report(self, current_period, last_period):
         """生成详细的AI预测分析报告"""
         try:
@@ -4,12 +4,203 @@ import logging
 from datetime import datetime
 import random
 import hashlib
+import os
+import sys
+import tempfile
 import traceback
 
+import numpy as np
+
 # 设置日志记录
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 将项目根目录加入模块搜索路径，以便复用 models/ 与 utils/ 中的代码
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from models.compiled_forest import CompiledForest
+from models.tflite_export import TFLitePredictor
+from utils.consensus import monte_carlo_consensus
+from utils.draws import load_draw_history
+from utils.feature_store import open_feature_store
+from utils.features import FEATURE_COLUMNS, draw_features
+from utils.hot_cold import HotColdScorer
+from utils.portfolio import solve_portfolio
+from utils.similarity import SimilarDrawIndex
+from utils.tickets import diverse_alternatives
+from utils.transitions import TransitionModel
+
+# 导出模型目录：lstm.tflite / transformer.tflite 以及扁平化树模型 rf.npz / xgboost.npz
+MODEL_EXPORT_DIR = os.environ.get('MODEL_EXPORT_DIR', os.path.join(PROJECT_ROOT, 'models', 'export'))
+TFLITE_MODEL_DIR = os.environ.get('TFLITE_MODEL_DIR', MODEL_EXPORT_DIR)
+
+# 原始开奖数据文件，用于检索与预测号码相似的历史开奖
+DRAW_HISTORY_FILE = os.environ.get('DRAW_HISTORY_FILE', os.path.join(PROJECT_ROOT, 'data', 'sample.csv'))
+
+# 按期存储的特征库，与数据分析接口共用。默认放在临时目录，接口冷启动与测试不会向代码目录写文件；
+# 需要复用训练流水线生成的特征库时用环境变量指向 data/processed_data/feature_store
+FEATURE_STORE_DIR = os.environ.get('FEATURE_STORE_DIR',
+                                   os.path.join(tempfile.gettempdir(), 'lottery_feature_store'))
+
+# 冷热号得分所在的共享内存块，与数据分析接口共用；设为空字符串时使用进程内数组
+HOT_COLD_SHM_NAME = os.environ.get('HOT_COLD_SHM_NAME', 'lottery_hot_cold')
+
+# 默认集成权重，合计为1。转移模型加入时按比例缩小原有三个模型（0.35/0.40/0.25）的权重，让出0.10
+DEFAULT_MODEL_WEIGHTS = {
+    'lstm': 0.315,
+    'transformer': 0.36,
+    'xgboost': 0.225,
+    'transition': 0.10
+}
+
+# 进程级的预测器缓存，Serverless实例被复用时无需重复加载模型。
+# 值为 (模型文件标识, 预测器)，在线更新切换 current 链接或覆盖模型文件后标识变化，下次请求时重新加载
+_tflite_predictors = {}
+_compiled_forests = {}
+_feature_store = None
+_similar_draw_index = None
+_hot_cold_scorer = None
+_transition_model = None
+
+def _model_file_key(model_path):
+    """模型文件的标识：解析符号链接后的真实路径与修改时间，文件不存在时为None"""
+    try:
+        real_path = os.path.realpath(model_path)
+        return real_path, os.stat(real_path).st_mtime_ns
+    except OSError:
+        return None
+
+def get_tflite_predictor(model_name):
+    """按需加载TFLite预测器，模型文件不存在或解释器不可用时返回None"""
+    model_path = os.path.join(TFLITE_MODEL_DIR, f'{model_name}.tflite')
+    key = _model_file_key(model_path)
+    cached = _tflite_predictors.get(model_name)
+    if cached is None or cached[0] != key:
+        predictor = None
+        if key is not None:
+            try:
+                predictor = TFLitePredictor(model_path)
+                logger.info(f"已加载TFLite模型: {key[0]}")
+            except Exception as e:
+                logger.error(f"加载TFLite模型失败: {str(e)}")
+        _tflite_predictors[model_name] = (key, predictor)
+    return _tflite_predictors[model_name][1]
+
+def get_compiled_forest(model_name):
+    """按需加载扁平化的树模型，推理只依赖numpy，文件不存在时返回None"""
+    model_path = os.path.join(MODEL_EXPORT_DIR, f'{model_name}.npz')
+    key = _model_file_key(model_path)
+    cached = _compiled_forests.get(model_name)
+    if cached is None or cached[0] != key:
+        forest = None
+        if key is not None:
+            try:
+                forest = CompiledForest.load(model_path)
+                logger.info(f"已加载树模型: {key[0]}")
+            except Exception as e:
+                logger.error(f"加载树模型失败: {str(e)}")
+        _compiled_forests[model_name] = (key, forest)
+    return _compiled_forests[model_name][1]
+
+def load_draws():
+    """
+    读取开奖历史的日期与号码：优先读取特征库中已解析的列，特征库不可用时解析原始数据
+    :return: (日期数组, 前区号码 (期数, 5), 后区号码 (期数, 2))
+    """
+    global _feature_store
+    if _feature_store is None:
+        _feature_store = open_feature_store(FEATURE_STORE_DIR, DRAW_HISTORY_FILE)
+    if _feature_store is not None:
+        draws = _feature_store.read(['dates', 'front_zone', 'back_zone'])
+        return draws['dates'], draws['front_zone'], draws['back_zone']
+    return load_draw_history(DRAW_HISTORY_FILE)
+
+def get_similar_draw_index():
+    """按需构建相似开奖检索索引，数据文件不存在时返回空索引"""
+    global _similar_draw_index
+    if _similar_draw_index is None:
+        try:
+            dates, front_zone, back_zone = load_draws()
+            _similar_draw_index = SimilarDrawIndex()
+            if len(front_zone):
+                _similar_draw_index.extend(front_zone, back_zone, dates)
+            logger.info(f"已构建相似开奖索引: {_similar_draw_index.n_periods} 期")
+        except (OSError, ValueError) as e:
+            logger.error(f"构建相似开奖索引失败: {str(e)}")
+            _similar_draw_index = SimilarDrawIndex()
+    return _similar_draw_index
+
+def get_hot_cold_scorer():
+    """连接共享的冷热号得分，与开奖历史同步：只追加新增的期，历史被改写时重建；数据为空时返回None"""
+    global _hot_cold_scorer
+    if _hot_cold_scorer is None:
+        try:
+            _hot_cold_scorer = HotColdScorer(shm_name=HOT_COLD_SHM_NAME or None)
+        except OSError as e:
+            logger.warning(f"无法使用共享内存，改用进程内冷热号得分: {str(e)}")
+            _hot_cold_scorer = HotColdScorer()
+        try:
+            _, front_zone, back_zone = load_draws()
+            _hot_cold_scorer.sync(front_zone, back_zone)
+        except (OSError, ValueError) as e:
+            logger.error(f"同步冷热号得分失败: {str(e)}")
+    return _hot_cold_scorer if _hot_cold_scorer.n_periods else None
+
+def get_transition_model():
+    """按需构建相邻期转移统计，新开奖可用 update 逐期追加；不足两期时返回None"""
+    global _transition_model
+    if _transition_model is None:
+        _transition_model = TransitionModel()
+        try:
+            _, front_zone, back_zone = load_draws()
+            _transition_model.extend(front_zone, back_zone)
+            logger.info(f"已构建转移统计: {_transition_model.n_periods} 期")
+        except (OSError, ValueError) as e:
+            logger.error(f"构建转移统计失败: {str(e)}")
+    return _transition_model if _transition_model.n_periods >= 2 else None
+
+def weighted_vote_scores(score_matrix, weight_vector):
+    """
+    按权重合并各模型的号码得分
+    :param score_matrix: 形状为 (..., 模型数, 号码数) 的得分矩阵，前导维度可用于一次计算多组集成
+    :param weight_vector: 形状为 (模型数,) 的权重
+    :return: 形状为 (..., 号码数) 的加权得分
+    """
+    return np.matmul(np.asarray(weight_vector, dtype=np.float64), score_matrix)
+
+def top_k_numbers(scores, k, tie_breaker=None):
+    """
+    用 argpartition 选出得分最高的 k 个号码，无需对全部号码排序
+    :param scores: 形状为 (..., 号码数) 的得分
+    :param k: 选取个数
+    :param tie_breaker: 与 scores 同形状的极小扰动，用于随机打破同分
+    :return: 形状为 (..., k) 的号码（从1开始），按得分从高到低排列
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if tie_breaker is not None:
+        scores = scores + tie_breaker
+    top = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=-1), axis=-1)
+    return np.take_along_axis(top, order, axis=-1) + 1
+
+def merge_served_weights(defaults, served):
+    """
+    合并默认权重与在线更新发布的权重：发布文件只包含部分模型（如不含转移模型）时，
+    未发布的模型保留默认权重，发布的权重按比例缩放到剩余份额，合计仍为1
+    :param defaults: 默认权重字典，合计为1
+    :param served: 发布的权重字典，键为 defaults 的子集
+    :return: 合并后的权重字典
+    """
+    weights = dict(defaults)
+    served_total = sum(served.values())
+    if served_total <= 0:
+        return weights
+    remaining = 1.0 - sum(weight for name, weight in defaults.items() if name not in served)
+    weights.update({name: weight / served_total * remaining for name, weight in served.items()})
+    return weights
+
 class PredictionEngine:
     """预测引擎核心类 - 保持完整的业务逻辑"""
     
@@ -23,6 +214,7 @@ class PredictionEngine:
         self.historical_patterns = {
             'hot_front': [7, 12, 23, 28, 35, 9, 17, 25, 33, 1],
             'hot_back': [3, 7, 11, 5, 9],
+            'cold_front': [2, 8, 15, 31, 34],
             'consecutive_pairs': [(7, 8), (12, 13), (23, 24), (28, 29)],
             'sum_ranges': {
                 'low': (60, 90),
@@ -31,27 +223,67 @@ class PredictionEngine:
             }
         }
         
+        # 有开奖历史时以指数衰减得分给出的冷热号替换预设值
+        scorer = get_hot_cold_scorer()
+        if scorer is not None:
+            rankings = scorer.rankings(hot_count=10, cold_count=5)
+            self.historical_patterns.update({
+                'hot_front': rankings['hot_front'],
+                'hot_back': rankings['hot_back'],
+                'cold_front': rankings['cold_front']
+            })
+        
         # 模型权重配置
-        self.model_weights = {
-            'lstm': 0.35,
-            'transformer': 0.40,
-            'xgboost': 0.25
+        self.model_weights = merge_served_weights(DEFAULT_MODEL_WEIGHTS, self._load_served_weights())
+        
+        # 参与集成的模型：名称 -> (预测函数, 请求中对应的模型输入字段)
+        self.model_registry = {}
+        self.register_model('lstm', self.generate_lstm_prediction, 'model_input')
+        self.register_model('transformer', self.generate_transformer_prediction, 'model_input')
+        self.register_model('xgboost', self.generate_xgboost_prediction, 'feature_vector')
+        self.register_model('transition', self.generate_transition_prediction)
+    
+    def register_model(self, name, generator, input_key=None, weight=None):
+        """
+        注册参与集成的模型
+        :param name: 模型名称，同时用于查找集成权重
+        :param generator: 预测函数，签名为 (seed, spiritual_enhancement, model_input)
+        :param input_key: 请求数据中传给该模型的输入字段
+        :param weight: 集成权重，不指定时沿用已有配置
+        """
+        self.model_registry[name] = (generator, input_key)
+        if weight is not None:
+            self.model_weights[name] = weight
+        self.model_weights.setdefault(name, 0.0)
+    
+    def generate_model_predictions(self, seed, spiritual_enhancement=None, request_data=None):
+        """依次运行所有已注册的模型，返回 {模型名称: 预测结果}"""
+        request_data = request_data or {}
+        return {
+            name: generator(seed, spiritual_enhancement, request_data.get(input_key) if input_key else None)
+            for name, (generator, input_key) in self.model_registry.items()
         }
     
-    def generate_lstm_prediction(self, seed, spiritual_enhancement=None):
+    def generate_lstm_prediction(self, seed, spiritual_enhancement=None, model_input=None):
         """LSTM时序预测模型"""
         random.seed(seed)
         
         # 时序特征分析
         sequence_features = self._analyze_sequence_patterns()
         
-        # 基于LSTM记忆机制的预测
-        front_candidates = self._apply_lstm_memory_filter()
-        back_candidates = self._apply_lstm_back_filter()
-        
-        # 选择最终号码
-        front_zone = sorted(random.sample(front_candidates, self.front_zone_count))
-        back_zone = sorted(random.sample(back_candidates, self.back_zone_count))
+        # 优先使用导出的TFLite模型打分
+        model_scores = self._score_with_tflite('lstm', model_input)
+        if model_scores:
+            front_zone = self._top_numbers(model_scores[0], self.front_zone_count)
+            back_zone = self._top_numbers(model_scores[1], self.back_zone_count)
+        else:
+            # 基于LSTM记忆机制的预测
+            front_candidates = self._apply_lstm_memory_filter()
+            back_candidates = self._apply_lstm_back_filter()
+            
+            # 选择最终号码
+            front_zone = sorted(random.sample(front_candidates, self.front_zone_count))
+            back_zone = sorted(random.sample(back_candidates, self.back_zone_count))
         
         # 置信度计算
         base_confidence = random.uniform(0.65, 0.85)
@@ -62,6 +294,7 @@ class PredictionEngine:
             'front_zone': front_zone,
             'back_zone': back_zone,
             'confidence': round(min(0.95, base_confidence), 3),
+            'inference_backend': 'tflite' if model_scores else 'heuristic',
             'model_details': {
                 'architecture': 'LSTM-512-256-128',
                 'sequence_length': 50,
@@ -79,7 +312,7 @@ class PredictionEngine:
             }
         }
     
-    def generate_transformer_prediction(self, seed, spiritual_enhancement=None):
+    def generate_transformer_prediction(self, seed, spiritual_enhancement=None, model_input=None):
         """Transformer注意力预测模型"""
         random.seed(seed + 1000)
         
@@ -89,8 +322,13 @@ class PredictionEngine:
         # 基于注意力的号码关联分析
         correlated_numbers = self._find_attention_correlations()
         
-        # 构建预测
-        front_zone, back_zone = self._build_attention_prediction(correlated_numbers)
+        # 构建预测，优先使用导出的TFLite模型打分
+        model_scores = self._score_with_tflite('transformer', model_input)
+        if model_scores:
+            front_zone = self._top_numbers(model_scores[0], self.front_zone_count)
+            back_zone = self._top_numbers(model_scores[1], self.back_zone_count)
+        else:
+            front_zone, back_zone = self._build_attention_prediction(correlated_numbers)
         
         # 置信度计算（Transformer通常表现更好）
         base_confidence = random.uniform(0.70, 0.90)
@@ -102,6 +340,7 @@ class PredictionEngine:
             'front_zone': sorted(front_zone),
             'back_zone': sorted(back_zone),
             'confidence': round(min(0.95, base_confidence), 3),
+            'inference_backend': 'tflite' if model_scores else 'heuristic',
             'model_details': {
                 'architecture': 'Transformer-Encoder',
                 'attention_heads': 8,
@@ -116,15 +355,20 @@ class PredictionEngine:
             'correlation_strength': len(correlated_numbers)
         }
     
-    def generate_xgboost_prediction(self, seed, spiritual_enhancement=None):
+    def generate_xgboost_prediction(self, seed, spiritual_enhancement=None, feature_vector=None):
         """XGBoost统计特征预测模型"""
         random.seed(seed + 2000)
         
         # 统计特征分析
         statistical_features = self._extract_statistical_features()
         
-        # 基于梯度提升的预测
-        front_zone, back_zone = self._xgboost_feature_prediction(statistical_features)
+        # 基于梯度提升的预测，优先使用导出的扁平化树模型打分
+        model_scores = self._score_with_forest('xgboost', feature_vector)
+        if model_scores:
+            front_zone = self._top_numbers(model_scores[0], self.front_zone_count)
+            back_zone = self._top_numbers(model_scores[1], self.back_zone_count)
+        else:
+            front_zone, back_zone = self._xgboost_feature_prediction(statistical_features)
         
         # 置信度计算
         base_confidence = random.uniform(0.68, 0.82)
@@ -138,6 +382,7 @@ class PredictionEngine:
             'front_zone': sorted(front_zone),
             'back_zone': sorted(back_zone),
             'confidence': round(base_confidence, 3),
+            'inference_backend': 'compiled_forest' if model_scores else 'heuristic',
             'model_details': {
                 'algorithm': 'XGBoost',
                 'n_estimators': 200,
@@ -158,11 +403,65 @@ class PredictionEngine:
             'statistical_analysis': statistical_features
         }
     
-    def generate_ensemble_prediction(self, lstm_pred, transformer_pred, xgboost_pred, spiritual_factor=None):
-        """Stacking集成预测"""
+    def generate_transition_prediction(self, seed, spiritual_enhancement=None, model_input=None):
+        """相邻期转移统计模型：以上一期号码的转移概率与各号码遗漏状态下的开出概率打分"""
+        random.seed(seed + 3000)
+        
+        model = get_transition_model()
+        if model is not None:
+            front_scores, back_scores = model.scores()
+            front_zone = self._top_numbers(front_scores, self.front_zone_count)
+            back_zone = self._top_numbers(back_scores, self.back_zone_count)
+            # 置信度取所选号码的平均预测概率
+            base_confidence = float(np.mean(np.concatenate([front_scores[np.asarray(front_zone) - 1],
+                                                            back_scores[np.asarray(back_zone) - 1]])))
+        else:
+            front_zone = sorted(random.sample(range(1, 36), self.front_zone_count))
+            back_zone = sorted(random.sample(range(1, 13), self.back_zone_count))
+            base_confidence = (self.front_zone_count / 35 + self.back_zone_count / 12) / 2
+        
+        return {
+            'front_zone': front_zone,
+            'back_zone': back_zone,
+            'confidence': round(base_confidence, 3),
+            'inference_backend': 'transition_matrix' if model is not None else 'heuristic',
+            'model_details': {
+                'algorithm': 'first_order_markov',
+                'state_spaces': ['number_to_number', 'gap_state'],
+                'max_gap_state': model.max_gap if model is not None else None,
+                'periods_used': model.n_periods if model is not None else 0
+            }
+        }
+    
+    def generate_ensemble_prediction(self, predictions, spiritual_factor=None):
+        """Stacking集成预测，predictions 为 {模型名称: 预测结果}"""
+        weights = self._ensemble_weights(predictions, spiritual_factor)
+        
+        # 投票集成算法
+        ensemble_result = self._stacking_ensemble(predictions, weights, spiritual_factor)
+        
+        return ensemble_result
+    
+    def generate_consensus_prediction(self, seed, n_seeds=10000, spiritual_factor=None, request_data=None):
+        """
+        多种子蒙特卡洛共识预测：在大量随机种子下模拟全部模型与集成投票，
+        以各号码被选中的频率代替单一时间种子的结果
+        """
+        predictions = self.generate_model_predictions(seed, spiritual_factor, request_data)
+        weights = self._ensemble_weights(predictions, spiritual_factor)
+        model_specs = {name: self._consensus_spec(name, pred, spiritual_factor)
+                       for name, pred in predictions.items()}
+        spiritual_boost = spiritual_factor.get('overall_intensity', 0.5) * 0.12 if spiritual_factor else None
         
-        # 动态权重调整
-        weights = self.model_weights.copy()
+        # 请求处理中不启动进程池（与投资组合优化相同），最多20万个种子在当前进程内向量化计算
+        result = monte_carlo_consensus(model_specs, weights, n_seeds, seed, spiritual_boost, max_workers=1)
+        result['model_weights'] = weights
+        result['sampling_modes'] = {name: spec['kind'] for name, spec in model_specs.items()}
+        return result
+    
+    def _ensemble_weights(self, predictions, spiritual_factor):
+        """按参与集成的模型取出权重，并根据灵修状态动态调整"""
+        weights = {name: self.model_weights.get(name, 0.0) for name in predictions}
         
         if spiritual_factor:
             # 灵修因子影响权重分配
@@ -171,23 +470,109 @@ class PredictionEngine:
             harmony = spiritual_factor.get('perturbation_factors', {}).get('harmony_factor', 0.5)
             
             # 根据灵修状态调整权重
-            if harmony > 0.7:
+            if harmony > 0.7 and 'transformer' in weights:
                 weights['transformer'] *= 1.2  # 和谐状态增强注意力模型
-            if chaos > 0.7:
+            if chaos > 0.7 and 'lstm' in weights:
                 weights['lstm'] *= 1.15       # 混沌状态增强时序模型
-            
-            # 重新归一化
-            total_weight = sum(weights.values())
+        
+        # 重新归一化（灵修调整与注册时指定的权重会让合计偏离1）
+        total_weight = sum(weights.values())
+        if total_weight > 0:
             weights = {k: v/total_weight for k, v in weights.items()}
         
-        # 投票集成算法
-        ensemble_result = self._stacking_ensemble(
-            [lstm_pred, transformer_pred, xgboost_pred], 
-            weights, 
-            spiritual_factor
-        )
+        return weights
+    
+    def _consensus_spec(self, name, prediction, spiritual_enhancement):
+        """
+        描述各模型在不同种子下的选号方式，供共识模式向量化模拟：
+        由导出模型打分的结果与种子无关，启发式结果按对应的随机规则批量采样
+        """
+        spiritual_enhancement = spiritual_enhancement or {}
+        if prediction.get('inference_backend') != 'heuristic' or name not in ('lstm', 'transformer', 'xgboost'):
+            return {
+                'kind': 'fixed',
+                'front_zone': prediction['front_zone'],
+                'back_zone': prediction['back_zone'],
+                'confidence_range': (prediction['confidence'], prediction['confidence'])
+            }
         
-        return ensemble_result
+        if name == 'lstm':
+            return {
+                'kind': 'weighted',
+                'front_weights': [3.0 if n in self.historical_patterns['hot_front'] else 1.0 for n in range(1, 36)],
+                'back_weights': [3.0 if n in self.historical_patterns['hot_back'] else 1.0 for n in range(1, 13)],
+                'confidence_range': (0.65, 0.85),
+                'confidence_scale': 1 + spiritual_enhancement.get('harmony_factor', 0) * 0.1,
+                'confidence_cap': 0.95
+            }
+        if name == 'transformer':
+            return {
+                'kind': 'pair_attention',
+                'pairs': self.historical_patterns['consecutive_pairs'],
+                'confidence_range': (0.70, 0.90),
+                'confidence_scale': 1 + spiritual_enhancement.get('cosmic_alignment', 0.5) * 0.15,
+                'confidence_cap': 0.95
+            }
+        return {
+            'kind': 'odd_even',
+            'confidence_range': (0.68, 0.82),
+            'confidence_scale': self._map_energy_to_confidence(spiritual_enhancement.get('energy_level', '中等'))
+        }
+    
+    def _load_served_weights(self):
+        """读取在线更新发布的集成权重，文件不存在时沿用默认权重"""
+        weights_path = os.path.join(MODEL_EXPORT_DIR, 'ensemble_weights.json')
+        if not os.path.exists(weights_path):
+            return {}
+        try:
+            with open(weights_path, 'r', encoding='utf-8') as f:
+                return {k: float(v) for k, v in json.load(f).items() if k in DEFAULT_MODEL_WEIGHTS}
+        except Exception as e:
+            logger.error(f"读取集成权重失败: {str(e)}")
+            return {}
+    
+    def _score_with_tflite(self, model_name, model_input):
+        """使用导出的47维多标签TFLite模型为全部号码打分，返回 (前区得分, 后区得分)"""
+        if model_input is None:
+            return None
+        predictor = get_tflite_predictor(model_name)
+        if predictor is None:
+            return None
+        
+        try:
+            scores = [float(s) for s in predictor.predict([model_input])[0]]
+        except (ValueError, TypeError, RuntimeError) as e:
+            logger.warning(f"{model_name} 模型输入无法推理，改用启发式预测: {str(e)}")
+            return None
+        return self._split_label_scores(model_name, scores)
+    
+    def _score_with_forest(self, model_name, feature_vector):
+        """使用扁平化的47维多标签树模型为全部号码打分，返回 (前区得分, 后区得分)"""
+        if feature_vector is None:
+            return None
+        forest = get_compiled_forest(model_name)
+        if forest is None:
+            return None
+        
+        try:
+            scores = [float(s) for s in forest.predict_proba([feature_vector])[0]]
+        except (ValueError, TypeError, IndexError) as e:
+            logger.warning(f"{model_name} 模型输入无法推理，改用启发式预测: {str(e)}")
+            return None
+        return self._split_label_scores(model_name, scores)
+    
+    def _split_label_scores(self, model_name, scores):
+        """将47维多标签输出拆分为前区和后区得分"""
+        front_size = self.front_zone_range[1] - 1
+        back_size = self.back_zone_range[1] - 1
+        if len(scores) != front_size + back_size:
+            logger.warning(f"{model_name} 模型输出维度为{len(scores)}，不是多标签模型，已忽略")
+            return None
+        return scores[:front_size], scores[front_size:]
+    
+    def _top_numbers(self, scores, count):
+        """按得分从高到低选出号码（号码从1开始）"""
+        return sorted(int(n) for n in top_k_numbers(scores, count))
     
     def _analyze_sequence_patterns(self):
         """分析时序模式"""
@@ -298,43 +683,36 @@ class PredictionEngine:
         }
         return energy_map.get(energy_level, 1.00)
     
-    def _stacking_ensemble(self, predictions, weights, spiritual_factor):
-        """Stacking集成算法"""
-        # 投票统计
-        front_votes = {}
-        back_votes = {}
-        
-        model_names = ['lstm', 'transformer', 'xgboost']
-        
+    def _vote_matrices(self, predictions):
+        """把各模型选出的号码转为 (模型数, 35) 与 (模型数, 12) 的得票矩阵"""
+        front_size = self.front_zone_range[1] - 1
+        back_size = self.back_zone_range[1] - 1
+        front_matrix = np.zeros((len(predictions), front_size))
+        back_matrix = np.zeros((len(predictions), back_size))
         for i, pred in enumerate(predictions):
-            model_weight = list(weights.values())[i]
-            
-            for num in pred['front_zone']:
-                front_votes[num] = front_votes.get(num, 0) + model_weight
-            
-            for num in pred['back_zone']:
-                back_votes[num] = back_votes.get(num, 0) + model_weight
-        
-        # 选择得票最高的号码
-        front_candidates = sorted(front_votes.items(), key=lambda x: x[1], reverse=True)
-        back_candidates = sorted(back_votes.items(), key=lambda x: x[1], reverse=True)
-        
-        # 构建最终预测
-        ensemble_front = [num for num, _ in front_candidates[:5]]
-        ensemble_back = [num for num, _ in back_candidates[:2]]
+            front_matrix[i, np.asarray(pred['front_zone']) - 1] = 1.0
+            back_matrix[i, np.asarray(pred['back_zone']) - 1] = 1.0
+        return front_matrix, back_matrix
+    
+    def _stacking_ensemble(self, predictions, weights, spiritual_factor):
+        """Stacking集成算法：得票矩阵与权重向量相乘得到每个号码的加权票数"""
+        model_names = list(predictions)
+        weight_vector = np.array([weights[name] for name in model_names])
+        front_matrix, back_matrix = self._vote_matrices([predictions[name] for name in model_names])
         
-        # 补充不足的号码
-        while len(ensemble_front) < 5:
-            candidates = [n for n in range(1, 36) if n not in ensemble_front]
-            ensemble_front.append(random.choice(candidates))
+        front_votes = weighted_vote_scores(front_matrix, weight_vector)
+        back_votes = weighted_vote_scores(back_matrix, weight_vector)
         
-        while len(ensemble_back) < 2:
-            candidates = [n for n in range(1, 13) if n not in ensemble_back]
-            ensemble_back.append(random.choice(candidates))
+        # 同票号码随机排序，得票不足的位置由未得票号码随机补齐
+        rng = np.random.default_rng(random.getrandbits(32))
+        front_scores = front_votes + rng.random(front_votes.shape) * 1e-9
+        back_scores = back_votes + rng.random(back_votes.shape) * 1e-9
+        ensemble_front = top_k_numbers(front_scores, self.front_zone_count)
+        ensemble_back = top_k_numbers(back_scores, self.back_zone_count)
         
         # 计算集成置信度
-        confidences = [pred['confidence'] for pred in predictions]
-        ensemble_confidence = sum(c * w for c, w in zip(confidences, weights.values()))
+        confidences = np.array([predictions[name]['confidence'] for name in model_names])
+        ensemble_confidence = float(confidences @ weight_vector)
         
         # 灵修增强
         if spiritual_factor:
@@ -342,18 +720,23 @@ class PredictionEngine:
             ensemble_confidence = min(0.95, ensemble_confidence + spiritual_boost)
         
         return {
-            'front_zone': sorted(ensemble_front),
-            'back_zone': sorted(ensemble_back),
+            'front_zone': sorted(int(n) for n in ensemble_front),
+            'back_zone': sorted(int(n) for n in ensemble_back),
             'confidence': round(ensemble_confidence, 3),
             'ensemble_metadata': {
                 'stacking_algorithm': 'weighted_voting',
                 'model_weights': weights,
                 'voting_details': {
-                    'front_votes': dict(sorted(front_votes.items(), key=lambda x: x[1], reverse=True)[:10]),
-                    'back_votes': dict(sorted(back_votes.items(), key=lambda x: x[1], reverse=True)[:5])
+                    'front_votes': {int(n): round(float(front_votes[n - 1]), 4)
+                                    for n in top_k_numbers(front_scores, 10) if front_votes[n - 1] > 0},
+                    'back_votes': {int(n): round(float(back_votes[n - 1]), 4)
+                                   for n in top_k_numbers(back_scores, 5) if back_votes[n - 1] > 0}
                 },
+                # 全部号码的完整排名，供投注组合的候选池与备选方案的排名权重使用
+                'ranked_front': [int(n) for n in np.argsort(-front_scores) + 1],
+                'ranked_back': [int(n) for n in np.argsort(-back_scores) + 1],
                 'spiritual_enhancement': spiritual_factor is not None,
-                'consensus_level': len([v for v in front_votes.values() if v > 0.5])
+                'consensus_level': int(np.count_nonzero(front_votes > 0.5))
             }
         }
 
@@ -383,6 +766,11 @@ class handler(BaseHTTPRequestHandler):
             prediction_type = request_data.get('prediction_type', 'ensemble')
             historical_data = request_data.get('historical_data', [])
             spiritual_factor = request_data.get('spiritual_factor', None)
+            try:
+                options = self._parse_request_options(request_data)
+            except (TypeError, ValueError, OverflowError) as ve:
+                self._send_error_response(400, f"请求参数错误: {str(ve)}")
+                return
             
             # 生成预测种子
             current_time = datetime.now()
@@ -391,36 +779,40 @@ class handler(BaseHTTPRequestHandler):
             logger.info(f"开始生成预测 - 类型: {prediction_type}, 种子: {time_seed}")
             
             # 生成各模型预测
-            lstm_prediction = self.prediction_engine.generate_lstm_prediction(
-                time_seed, spiritual_factor
-            )
-            
-            transformer_prediction = self.prediction_engine.generate_transformer_prediction(
-                time_seed, spiritual_factor
-            )
-            
-            xgboost_prediction = self.prediction_engine.generate_xgboost_prediction(
-                time_seed, spiritual_factor
+            model_predictions = self.prediction_engine.generate_model_predictions(
+                time_seed, spiritual_factor, request_data
             )
             
             # 生成集成预测
             ensemble_prediction = self.prediction_engine.generate_ensemble_prediction(
-                lstm_prediction, transformer_prediction, xgboost_prediction, spiritual_factor
+                model_predictions, spiritual_factor
             )
             
+            # 共识模式：多种子蒙特卡洛模拟
+            consensus_prediction = None
+            if prediction_type == 'consensus':
+                consensus_prediction = self.prediction_engine.generate_consensus_prediction(
+                    time_seed, options['consensus_seeds'], spiritual_factor, request_data
+                )
+            
             # 分析预测结果
             analysis = self._analyze_prediction_results(ensemble_prediction)
             
+            # 备选方案
+            alternative_count = options['alternative_count']
+            alternatives = self._generate_alternatives(
+                ensemble_prediction, alternative_count, options['alternative_min_distance']
+            )
+            
             # 构建完整响应
             response_data = {
                 'status': 'success',
                 'prediction': {
                     'ensemble_prediction': ensemble_prediction,
                     'individual_models': {
-                        'lstm_model': lstm_prediction,
-                        'transformer_model': transformer_prediction,
-                        'xgboost_model': xgboost_prediction
-                    }
+                        f'{name}_model': pred for name, pred in model_predictions.items()
+                    },
+                    'consensus_prediction': consensus_prediction
                 },
                 'prediction_metadata': {
                     'prediction_type': prediction_type,
@@ -433,9 +825,13 @@ class handler(BaseHTTPRequestHandler):
                 },
                 'analysis': analysis,
                 'recommendation': {
-                    'investment_strategy': self._generate_investment_strategy(ensemble_prediction),
+                    'investment_strategy': self._generate_investment_strategy(
+                        ensemble_prediction, request_data.get('portfolio')
+                    ),
                     'risk_level': self._assess_risk_level(ensemble_prediction),
-                    'alternative_combinations': self._generate_alternatives(ensemble_prediction)
+                    'alternative_combinations': alternatives,
+                    # 最小距离过大时满足条件的备选注可能不足，如实报告缺少的注数
+                    'alternative_shortfall': alternative_count - len(alternatives)
                 },
                 'disclaimer': {
                     'message': '本预测基于AI算法分析，仅供参考娱乐，不构成投注建议',
@@ -454,6 +850,17 @@ class handler(BaseHTTPRequestHandler):
             logger.error(traceback.format_exc())
             self._send_error_response(500, f"预测生成失败: {str(e)}")
     
+    def _parse_request_options(self, request_data):
+        """
+        解析并截断请求中的数值参数，参数不是有限的数值时抛出 TypeError、ValueError 或 OverflowError
+        :return: {'consensus_seeds', 'alternative_count', 'alternative_min_distance'}
+        """
+        return {
+            'consensus_seeds': max(100, min(int(request_data.get('consensus_seeds', 10000)), 200000)),
+            'alternative_count': max(1, min(int(request_data.get('alternative_count', 2)), 5000)),
+            'alternative_min_distance': max(2, min(int(request_data.get('alternative_min_distance', 4)), 14))
+        }
+    
     def do_OPTIONS(self):
         """处理预检请求"""
         try:
@@ -463,48 +870,6 @@ class handler(BaseHTTPRequestHandler):
             self.send_header('Access-Control-Allow-Origin', '*')
             self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
             self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With')
-            self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-            self.send_header('Pragma', 'no-cache')
-            self.send_header('Expires', '0')
-            self.end_headers()
-            
-            json_response = json.dumps(data, ensure_ascii=False, indent=2)
-            self.wfile.write(json_response.encode('utf-8'))
-            
-        except Exception as e:
-            logger.error(f"发送JSON响应错误: {str(e)}")
-            raise
-    
-    def _send_error_response(self, status_code, error_message):
-        """发送错误响应"""
-        try:
-            error_data = {
-                'status': 'error',
-                'message': error_message,
-                'timestamp': datetime.now().isoformat(),
-                'error_code': status_code,
-                'request_id': f'pred_err_{int(datetime.now().timestamp())}',
-                'support_info': {
-                    'contact': 'support@ai-lottery.com',
-                    'documentation': '/api/docs'
-                }
-            }
-            
-            self.send_response(status_code)
-            self.send_header('Content-Type', 'application/json; charset=utf-8')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            json_response = json.dumps(error_data, ensure_ascii=False)
-            self.wfile.write(json_response.encode('utf-8'))
-            
-        except Exception as e:
-            logger.error(f"发送错误响应失败: {str(e)}")
-            # 最后的备用响应
-            self.send_response(500)
-            self.send_header('Content-Type', 'text/plain; charset=utf-8')
-            self.end_headers()
-            self.wfile.write('Internal Server Error - Prediction Service'.encode('utf-8'))', 'Content-Type, Authorization, X-Requested-With')
             self.send_header('Access-Control-Max-Age', '86400')
             self.send_header('Content-Length', '0')
             self.end_headers()
@@ -521,40 +886,32 @@ class handler(BaseHTTPRequestHandler):
             front_zone = prediction['front_zone']
             back_zone = prediction['back_zone']
             
-            # 号码分布分析
-            odd_count = len([n for n in front_zone if n % 2 == 1])
-            even_count = 5 - odd_count
-            
-            # 大小号分析
-            large_count = len([n for n in front_zone if n > 18])
-            small_count = 5 - large_count
-            
-            # 和值计算
-            sum_value = sum(front_zone) + sum(back_zone)
+            patterns = self.prediction_engine.historical_patterns
+            features = self._ticket_features(front_zone, back_zone)
+            odd_count, large_count = int(features['odd_count']), int(features['large_count'])
+            sum_value = int(features['sum_value'])
             
             # 连号分析
-            consecutive_pairs = []
-            for i in range(len(front_zone) - 1):
-                if front_zone[i+1] - front_zone[i] == 1:
-                    consecutive_pairs.append((front_zone[i], front_zone[i+1]))
+            consecutive_pairs = [(a, b) for a, b in zip(front_zone, front_zone[1:]) if b - a == 1]
             
             return {
                 'number_distribution': {
-                    'odd_even_ratio': f'{odd_count}:{even_count}',
-                    'large_small_ratio': f'{large_count}:{small_count}',
+                    'odd_even_ratio': f'{odd_count}:{int(features["even_count"])}',
+                    'large_small_ratio': f'{large_count}:{int(features["small_count"])}',
                     'sum_value': sum_value,
                     'sum_category': self._categorize_sum(sum_value)
                 },
                 'pattern_analysis': {
                     'consecutive_pairs': consecutive_pairs,
                     'consecutive_count': len(consecutive_pairs),
-                    'span_range': max(front_zone) - min(front_zone),
-                    'distribution_evenness': self._calculate_distribution_evenness(front_zone)
+                    'span_range': int(features['span']),
+                    'distribution_evenness': round(float(features['evenness']), 3)
                 },
                 'historical_comparison': {
-                    'hot_numbers_included': len([n for n in front_zone if n in [7, 12, 23, 28, 35]]),
-                    'cold_numbers_included': len([n for n in front_zone if n in [2, 8, 15, 31, 34]]),
-                    'frequency_score': round(random.uniform(0.6, 0.9), 2)
+                    'hot_numbers_included': len(set(front_zone) & set(patterns['hot_front'][:5])),
+                    'cold_numbers_included': len(set(front_zone) & set(patterns['cold_front'])),
+                    'frequency_score': round(random.uniform(0.6, 0.9), 2),
+                    'similar_draws': self._find_similar_draws(front_zone, back_zone)
                 },
                 'confidence_breakdown': {
                     'technical_confidence': prediction['confidence'],
@@ -566,6 +923,13 @@ class handler(BaseHTTPRequestHandler):
             logger.error(f"分析预测结果错误: {str(e)}")
             return {'error': str(e)}
     
+    def _find_similar_draws(self, front_zone, back_zone, k=5):
+        """与预测号码Jaccard相似度最高的历史开奖"""
+        index = get_similar_draw_index()
+        if index is None:
+            return []
+        return index.query(front_zone, back_zone, k)
+    
     def _categorize_sum(self, sum_value):
         """分类和值"""
         if sum_value < 90:
@@ -575,15 +939,12 @@ class handler(BaseHTTPRequestHandler):
         else:
             return '高区'
     
-    def _calculate_distribution_evenness(self, numbers):
-        """计算分布均匀度"""
-        gaps = [numbers[i+1] - numbers[i] for i in range(len(numbers)-1)]
-        avg_gap = sum(gaps) / len(gaps)
-        variance = sum((gap - avg_gap) ** 2 for gap in gaps) / len(gaps)
-        return round(1 / (1 + variance), 3)
+    def _ticket_features(self, front_zone, back_zone):
+        """单注号码的形态特征 {特征名: 值}，与历史开奖特征矩阵的列一致"""
+        return dict(zip(FEATURE_COLUMNS, draw_features(front_zone, back_zone).tolist()))
     
-    def _generate_investment_strategy(self, prediction):
-        """生成投注策略"""
+    def _generate_investment_strategy(self, prediction, portfolio_request=None):
+        """生成投注策略，请求中提供 portfolio 参数时附带旋转矩阵组合方案"""
         confidence = prediction['confidence']
         
         if confidence > 0.85:
@@ -597,9 +958,47 @@ class handler(BaseHTTPRequestHandler):
             'strategy_type': strategy,
             'recommended_bet_size': 'small' if confidence < 0.75 else 'medium' if confidence < 0.85 else 'moderate',
             'diversification_advice': '建议购买2-3注不同组合，提高中奖概率',
-            'timing_suggestion': '开奖前2-4小时投注较为合适'
+            'timing_suggestion': '开奖前2-4小时投注较为合适',
+            'portfolio': self._build_portfolio(prediction, portfolio_request) if portfolio_request else None
         }
     
+    def _build_portfolio(self, prediction, portfolio_request):
+        """从集成排名靠前的号码中组成候选池，在注数预算内求解覆盖最优的组合"""
+        metadata = prediction.get('ensemble_metadata', {})
+        ranked_front = metadata.get('ranked_front') or prediction['front_zone']
+        ranked_back = metadata.get('ranked_back') or prediction['back_zone']
+        
+        front_pool_size = max(5, min(int(portfolio_request.get('front_pool_size', 15)), 20, len(ranked_front)))
+        back_pool_size = max(2, min(int(portfolio_request.get('back_pool_size', 3)), len(ranked_back)))
+        front_pool = sorted(ranked_front[:front_pool_size])
+        back_pool = sorted(ranked_back[:back_pool_size])
+        mode = portfolio_request.get('mode', 'guaranteed')
+        
+        front_probabilities = back_probabilities = None
+        if mode == 'expected':
+            # 以排名权重近似号码被开出的概率：前区期望开出5个，后区期望开出2个
+            front_weights = self._rank_weights(ranked_front, 35)
+            back_weights = self._rank_weights(ranked_back, 12)
+            if front_weights is None or back_weights is None:
+                return None
+            front_probabilities = front_weights[np.asarray(front_pool) - 1] / front_weights.sum() * 5
+            back_probabilities = back_weights[np.asarray(back_pool) - 1] / back_weights.sum() * 2
+        
+        # 请求路径中不启动进程池，各起点在当前进程中依次求解
+        try:
+            return solve_portfolio(
+                front_pool, back_pool,
+                budget=max(1, min(int(portfolio_request.get('budget', 10)), 1000)),
+                front_matches=max(1, min(int(portfolio_request.get('front_matches', 3)), 5)),
+                back_matches=max(0, min(int(portfolio_request.get('back_matches', 0)), 2)),
+                mode=mode,
+                front_probabilities=front_probabilities,
+                back_probabilities=back_probabilities
+            )
+        except ValueError as e:
+            logger.error(f"组合方案求解失败: {str(e)}")
+            return {'error': str(e)}
+    
     def _assess_risk_level(self, prediction):
         """评估风险等级"""
         confidence = prediction['confidence']
@@ -623,39 +1022,40 @@ class handler(BaseHTTPRequestHandler):
                 'recommendation': '建议谨慎投注，以娱乐为主'
             }
     
-    def _generate_alternatives(self, main_prediction):
-        """生成备选方案"""
-        # 生成2个备选预测方案
-        alternatives = []
+    def _generate_alternatives(self, main_prediction, count=2, min_distance=4):
+        """生成备选方案：与主预测及彼此之间至少相差 min_distance 个号码（对称差）"""
+        # 让备选注偏向集成排名靠前的号码
+        metadata = main_prediction.get('ensemble_metadata', {})
+        front_weights = self._rank_weights(metadata.get('ranked_front'), 35)
+        back_weights = self._rank_weights(metadata.get('ranked_back'), 12)
         
-        for i in range(2):
-            # 在主预测基础上进行微调
-            alt_front = main_prediction['front_zone'].copy()
-            alt_back = main_prediction['back_zone'].copy()
-            
-            # 随机替换1-2个号码
-            replace_count = random.randint(1, 2)
-            for _ in range(replace_count):
-                if random.random() > 0.5:  # 替换前区
-                    old_num = random.choice(alt_front)
-                    new_nums = [n for n in range(1, 36) if n not in alt_front]
-                    new_num = random.choice(new_nums)
-                    alt_front[alt_front.index(old_num)] = new_num
-                else:  # 替换后区
-                    old_num = random.choice(alt_back)
-                    new_nums = [n for n in range(1, 13) if n not in alt_back]
-                    new_num = random.choice(new_nums)
-                    alt_back[alt_back.index(old_num)] = new_num
-            
+        candidates = diverse_alternatives(
+            main_prediction['front_zone'], main_prediction['back_zone'], count, min_distance,
+            front_weights, back_weights, seed=random.getrandbits(32)
+        )
+        
+        alternatives = []
+        for i, (alt_front, alt_back, distance) in enumerate(candidates):
+            # 与主预测重合的号码越多，置信度越接近主预测
+            shared = 7 - distance / 2
             alternatives.append({
-                'front_zone': sorted(alt_front),
-                'back_zone': sorted(alt_back),
-                'confidence': round(main_prediction['confidence'] * random.uniform(0.85, 0.95), 3),
+                'front_zone': alt_front,
+                'back_zone': alt_back,
+                'confidence': round(main_prediction['confidence'] * (0.85 + 0.10 * shared / 7), 3),
+                'distance_from_main': distance,
                 'variation_type': f'备选方案{i+1}'
             })
         
         return alternatives
     
+    def _rank_weights(self, ranked_numbers, size):
+        """按排名线性递减的号码权重，没有排名时返回None（等概率）"""
+        if not ranked_numbers or len(ranked_numbers) != size:
+            return None
+        weights = np.empty(size)
+        weights[np.asarray(ranked_numbers) - 1] = np.arange(size, 0, -1)
+        return weights
+    
     def _send_json_response(self, status_code, data):
         """发送JSON响应"""
         try:
@@ -663,4 +1063,46 @@ class handler(BaseHTTPRequestHandler):
             self.send_header('Content-Type', 'application/json; charset=utf-8')
             self.send_header('Access-Control-Allow-Origin', '*')
             self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With')
+            self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
+            self.send_header('Pragma', 'no-cache')
+            self.send_header('Expires', '0')
+            self.end_headers()
+            
+            json_response = json.dumps(data, ensure_ascii=False, indent=2)
+            self.wfile.write(json_response.encode('utf-8'))
+            
+        except Exception as e:
+            logger.error(f"发送JSON响应错误: {str(e)}")
+            raise
+    
+    def _send_error_response(self, status_code, error_message):
+        """发送错误响应"""
+        try:
+            error_data = {
+                'status': 'error',
+                'message': error_message,
+                'timestamp': datetime.now().isoformat(),
+                'error_code': status_code,
+                'request_id': f'pred_err_{int(datetime.now().timestamp())}',
+                'support_info': {
+                    'contact': 'support@ai-lottery.com',
+                    'documentation': '/api/docs'
+                }
+            }
+            
+            self.send_response(status_code)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            
+            json_response = json.dumps(error_data, ensure_ascii=False)
+            self.wfile.write(json_response.encode('utf-8'))
+            
+        except Exception as e:
+            logger.error(f"发送错误响应失败: {str(e)}")
+            # 最后的备用响应
+            self.send_response(500)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.end_headers()
+            self.wfile.write('Internal Server Error - Prediction Service'.encode('utf-8'))
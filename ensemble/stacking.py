@@ -0,0 +1,221 @@
+import os
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.dummy import DummyClassifier
+from sklearn.ensemble import StackingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import TimeSeriesSplit
+
+from models.rf_model import predict_multilabel_proba
+
+# 折外预测缓存目录中的文件名
+OOF_CACHE_FILE = 'oof_predictions.npz'
+BASE_MODELS_FILE = 'base_models.joblib'
+
+def build_stacking_model(base_models, train_data, train_labels):
+    """
+    构建Stacking集成模型
+    :param base_models: 基础子模型字典
+    :param train_data: 训练数据
+    :param train_labels: 训练标签
+    :return: 训练好的集成模型
+    """
+    estimators = [(name, model) for name, model in base_models.items()]
+    stacking_model = StackingClassifier(estimators=estimators, final_estimator=LogisticRegression())
+    stacking_model.fit(train_data, train_labels)
+    return stacking_model
+
+class MultiLabelMetaLearner:
+    """
+    逐号码的元学习器：每个标签一个LogisticRegression；
+    训练集中某个号码从未开出（或每期都开出）时该列只有一个类别，改用按先验概率输出的常数预测
+    """
+
+    def __init__(self, **params):
+        """
+        :param params: 传给LogisticRegression的参数
+        """
+        self.params = params
+
+    def fit(self, data, labels):
+        self.estimators_ = [
+            (LogisticRegression(**self.params) if len(np.unique(column)) > 1
+             else DummyClassifier(strategy='prior')).fit(data, column)
+            for column in np.asarray(labels).T
+        ]
+        self.classes_ = [estimator.classes_ for estimator in self.estimators_]
+        return self
+
+    def predict_proba(self, data):
+        """按标签返回 (样本数, 类别数) 的概率数组列表，与多输出分类器一致"""
+        return [estimator.predict_proba(data) for estimator in self.estimators_]
+
+class CachedStackingModel:
+    """基于折外预测训练的Stacking集成模型，支持二分类与47维多标签"""
+
+    def __init__(self, base_models, meta_model, multilabel):
+        self.base_models = base_models
+        self.meta_model = meta_model
+        self.multilabel = multilabel
+
+    def predict_proba(self, data):
+        """
+        预测概率
+        :param data: 输入数据
+        :return: 二分类时为 (样本数, 2)，多标签时为 (样本数, 47) 的概率矩阵
+        """
+        meta_features = np.hstack([
+            _base_model_proba(model, data, self.multilabel) for model in self.base_models.values()
+        ])
+        if self.multilabel:
+            return predict_multilabel_proba(self.meta_model, meta_features)
+        return self.meta_model.predict_proba(meta_features)
+
+def compute_oof_predictions(base_models, train_data, train_labels, cv=5, n_jobs=-1):
+    """
+    多进程并行计算各基础模型的折外预测，并在全量数据上训练最终的基础模型
+    每个 (模型, 折) 组合及全量训练都是独立任务，统一分发到进程池。
+    折按时间前推切分（TimeSeriesSplit）：每折只用更早的期训练、预测紧随其后的一段，
+    最早的一段没有更早的数据可用，其折外预测为NaN，不参与元学习器训练
+    :param base_models: 基础子模型字典（未训练）
+    :param train_data: 按时间顺序排列的训练数据
+    :param train_labels: 训练标签，二维时按多标签处理
+    :param cv: 验证折数
+    :param n_jobs: 并行进程数，-1表示使用全部CPU核心
+    :return: (折外预测矩阵, 全量训练后的基础模型字典)
+    """
+    train_data = np.asarray(train_data)
+    train_labels = np.asarray(train_labels)
+    multilabel = train_labels.ndim == 2
+    folds = list(TimeSeriesSplit(n_splits=cv).split(train_data))
+    full_index = np.arange(len(train_data))
+
+    tasks = [(name, fold_id, train_idx, valid_idx)
+             for name in base_models
+             for fold_id, (train_idx, valid_idx) in enumerate(folds)]
+    tasks += [(name, None, full_index, None) for name in base_models]
+
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_and_predict)(base_models[name], train_data, train_labels,
+                                  train_idx, valid_idx, multilabel)
+        for name, _, train_idx, valid_idx in tasks
+    )
+
+    # 按模型顺序拼接折外预测列
+    column_blocks = {}
+    fitted_models = {}
+    for (name, fold_id, _, valid_idx), (model, predictions) in zip(tasks, results):
+        if fold_id is None:
+            fitted_models[name] = model
+            continue
+        if name not in column_blocks:
+            column_blocks[name] = np.full((len(train_data), predictions.shape[1]), np.nan)
+        column_blocks[name][valid_idx] = predictions
+
+    oof_predictions = np.hstack([column_blocks[name] for name in base_models])
+    return oof_predictions, fitted_models
+
+def fit_meta_learner(oof_predictions, train_labels, **params):
+    """
+    在折外预测矩阵上训练LogisticRegression元学习器，不涉及任何基础模型的训练
+    :param oof_predictions: 折外预测矩阵，含NaN的行（没有折外预测的最早一段）被跳过
+    :param train_labels: 训练标签，二维时逐号码训练元学习器，只有一个类别的号码使用常数预测
+    :param params: 传给LogisticRegression的参数，如C、class_weight
+    :return: 训练好的元学习器
+    """
+    oof_predictions = np.asarray(oof_predictions)
+    covered = ~np.isnan(oof_predictions).any(axis=1)
+    oof_predictions, train_labels = oof_predictions[covered], np.asarray(train_labels)[covered]
+    if train_labels.ndim == 2:
+        meta_model = MultiLabelMetaLearner(**params)
+    else:
+        meta_model = LogisticRegression(**params)
+    meta_model.fit(oof_predictions, train_labels)
+    return meta_model
+
+def save_oof_cache(cache_dir, oof_predictions, train_labels, fitted_models):
+    """
+    持久化折外预测矩阵、训练标签和全量训练的基础模型
+    :param cache_dir: 缓存目录
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez_compressed(os.path.join(cache_dir, OOF_CACHE_FILE),
+                        oof_predictions=oof_predictions,
+                        train_labels=np.asarray(train_labels),
+                        model_names=np.array(list(fitted_models)))
+    joblib.dump(fitted_models, os.path.join(cache_dir, BASE_MODELS_FILE))
+
+def load_oof_cache(cache_dir):
+    """
+    读取缓存的折外预测
+    :param cache_dir: 缓存目录
+    :return: (折外预测矩阵, 训练标签, 全量训练的基础模型字典)
+    """
+    with np.load(os.path.join(cache_dir, OOF_CACHE_FILE)) as cache:
+        oof_predictions = cache['oof_predictions']
+        train_labels = cache['train_labels']
+    fitted_models = joblib.load(os.path.join(cache_dir, BASE_MODELS_FILE))
+    return oof_predictions, train_labels, fitted_models
+
+def build_cached_stacking_model(base_models, train_data, train_labels, cache_dir, cv=5, n_jobs=-1,
+                                **meta_params):
+    """
+    构建Stacking集成模型，并行训练基础模型并缓存其折外预测
+    之后调整元学习器只需调用 refit_meta_learner，无需重新训练基础模型
+    :param base_models: 基础子模型字典
+    :param train_data: 训练数据
+    :param train_labels: 训练标签
+    :param cache_dir: 折外预测缓存目录
+    :param cv: 验证折数，按时间前推切分
+    :param n_jobs: 并行进程数
+    :param meta_params: 传给LogisticRegression的参数
+    :return: 训练好的集成模型
+    """
+    oof_predictions, fitted_models = compute_oof_predictions(
+        base_models, train_data, train_labels, cv, n_jobs)
+    save_oof_cache(cache_dir, oof_predictions, train_labels, fitted_models)
+    meta_model = fit_meta_learner(oof_predictions, train_labels, **meta_params)
+    return CachedStackingModel(fitted_models, meta_model, np.ndim(train_labels) == 2)
+
+def refit_meta_learner(cache_dir, **meta_params):
+    """
+    复用缓存的折外预测重新训练元学习器
+    :param cache_dir: build_cached_stacking_model 写入的缓存目录
+    :param meta_params: 传给LogisticRegression的新参数
+    :return: 使用新元学习器的集成模型
+    """
+    oof_predictions, train_labels, fitted_models = load_oof_cache(cache_dir)
+    meta_model = fit_meta_learner(oof_predictions, train_labels, **meta_params)
+    return CachedStackingModel(fitted_models, meta_model, train_labels.ndim == 2)
+
+def build_multilabel_stacking_model(base_models, train_data, train_labels, cv=5, n_jobs=-1):
+    """
+    构建多标签Stacking集成模型
+    基础模型以多标签方式训练，每折只需训练一次即可覆盖全部47个号码
+    :param base_models: 基础子模型字典（需支持多标签训练，如随机森林、XGBoost）
+    :param train_data: 训练数据
+    :param train_labels: 训练标签，形状为 (样本数, 47)
+    :param cv: 验证折数，按时间前推切分
+    :param n_jobs: 并行进程数
+    :return: 训练好的多标签集成模型
+    """
+    oof_predictions, fitted_models = compute_oof_predictions(
+        base_models, train_data, train_labels, cv, n_jobs)
+    meta_model = fit_meta_learner(oof_predictions, train_labels)
+    return CachedStackingModel(fitted_models, meta_model, multilabel=True)
+
+def _fit_and_predict(model, train_data, train_labels, train_idx, valid_idx, multilabel):
+    """在子进程中训练一个基础模型，并给出验证折上的预测"""
+    fitted = clone(model).fit(train_data[train_idx], train_labels[train_idx])
+    if valid_idx is None:
+        return fitted, None
+    # 折内模型只用于生成折外预测，不回传主进程
+    return None, _base_model_proba(fitted, train_data[valid_idx], multilabel)
+
+def _base_model_proba(model, data, multilabel):
+    """基础模型的概率输出：多标签为47列，二分类取正类一列"""
+    if multilabel:
+        return predict_multilabel_proba(model, data)
+    return model.predict_proba(data)[:, 1:]
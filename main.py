@@ -1,12 +1,218 @@
 # Main Entry Point
-from utils.data_processing import load_and_process_data
-from models.lstm_model import build_lstm_model
+import json
+import logging
+import os
+
+from utils.pipeline import Pipeline, Stage
+
+logging.basicConfig(level=logging.INFO)
+
+# 各阶段的输入输出文件
+RAW_DATA = os.environ.get('DRAW_HISTORY_FILE', 'data/sample.csv')
+CLEAN_DRAWS = 'data/processed_data/draws.npz'
+# 按期存储的特征库，开奖数据追加后只计算新增期的特征
+FEATURE_STORE = 'data/processed_data/feature_store'
+FEATURES = 'data/processed_data/features.npz'
+ARTIFACT_DIR = 'artifacts'
+LSTM_MODEL = os.path.join(ARTIFACT_DIR, 'lstm.keras')
+TRANSFORMER_MODEL = os.path.join(ARTIFACT_DIR, 'transformer.keras')
+XGBOOST_MODEL = os.path.join(ARTIFACT_DIR, 'xgboost.json')
+RF_MODEL = os.path.join(ARTIFACT_DIR, 'rf.joblib')
+STACKING_MODEL = os.path.join(ARTIFACT_DIR, 'stacking.joblib')
+ENSEMBLE_PREDICTION = os.path.join(ARTIFACT_DIR, 'ensemble_prediction.npz')
+PERTURBED_PREDICTION = os.path.join(ARTIFACT_DIR, 'perturbed_prediction.json')
+REPORT = os.path.join(ARTIFACT_DIR, 'report.md')
+# Keras模型训练中断后从这里的检查点继续
+CHECKPOINT_DIR = os.path.join(ARTIFACT_DIR, 'checkpoints')
+
+# 特征库相关阶段用到的项目内模块，源码变化时重新计算特征
+FEATURE_STORE_DEPS = ['utils.feature_store', 'utils.features', 'utils.draws']
+
+def process_data_stage(inputs, outputs):
+    """清洗原始开奖数据"""
+    import numpy as np
+    from utils.draws import load_draw_history
+
+    dates, front_zone, back_zone = load_draw_history(inputs[0])
+    np.savez(outputs[0], dates=dates, front_zone=front_zone, back_zone=back_zone)
+
+def feature_store_stage(inputs, outputs):
+    """将清洗后的开奖数据同步到特征库，只为新增的期计算特征"""
+    import numpy as np
+    from utils.feature_store import FeatureStore
+
+    with np.load(inputs[0]) as draws:
+        FeatureStore(outputs[0]).sync(draws['dates'], draws['front_zone'], draws['back_zone'])
+
+def features_stage(inputs, outputs, window, holdout_fraction):
+    """
+    构建滑动窗口特征：每期输入为47维多标签加缩放后的号码形态特征，
+    序列输入供Keras模型使用，窗口均值+上一期特征供树模型使用
+    """
+    import numpy as np
+    from utils.draws import build_feature_windows, window_tree_features
+    from utils.feature_store import FeatureStore
+
+    store = FeatureStore(inputs[0])
+    labels = store.read(['labels'])['labels']
+    step_features = np.hstack([labels, store.feature_matrix(normalize=True)])
+    sequences, targets = build_feature_windows(step_features, labels, window)
+    tree_features = window_tree_features(sequences)
+
+    # 最近 window 期作为预测下一期时的输入
+    next_sequence = step_features[-window:].astype(np.float32)
+    next_tree_features = window_tree_features(next_sequence[None])[0]
+    np.savez(outputs[0], sequences=sequences, tree_features=tree_features, targets=targets,
+             split=int(len(targets) * (1 - holdout_fraction)),
+             next_sequence=next_sequence, next_tree_features=next_tree_features)
+
+def lstm_stage(inputs, outputs, checkpoint_dir, epochs):
+    """训练47维多标签LSTM模型"""
+    import numpy as np
+    from models.lstm_model import train_lstm_model
+
+    with np.load(inputs[0]) as features:
+        split = int(features['split'])
+        sequences, targets = features['sequences'][:split], features['targets'][:split]
+    model = train_lstm_model(sequences, targets, (None, sequences.shape[2]), targets.shape[1],
+                             epochs=epochs, checkpoint_dir=checkpoint_dir)
+    model.save(outputs[0])
+
+def transformer_stage(inputs, outputs, checkpoint_dir, epochs):
+    """训练47维多标签Transformer模型"""
+    import numpy as np
+    from models.transformer_model import train_transformer_model
+
+    with np.load(inputs[0]) as features:
+        split = int(features['split'])
+        sequences, targets = features['sequences'][:split], features['targets'][:split]
+    model = train_transformer_model(sequences, targets, (None, sequences.shape[2]), targets.shape[1],
+                                    epochs=epochs, checkpoint_dir=checkpoint_dir)
+    model.save(outputs[0])
+
+def xgboost_stage(inputs, outputs):
+    """训练多标签XGBoost模型"""
+    import numpy as np
+    from models.xgboost_model import train_xgboost_multilabel_model
+
+    with np.load(inputs[0]) as features:
+        split = int(features['split'])
+        model = train_xgboost_multilabel_model(features['tree_features'][:split],
+                                               features['targets'][:split])
+    model.save_model(outputs[0])
+
+def rf_stage(inputs, outputs):
+    """训练多标签随机森林模型"""
+    import joblib
+    import numpy as np
+    from models.rf_model import train_rf_multilabel_model
+
+    with np.load(inputs[0]) as features:
+        split = int(features['split'])
+        model = train_rf_multilabel_model(features['tree_features'][:split],
+                                          features['targets'][:split])
+    joblib.dump(model, outputs[0])
+
+def stacking_stage(inputs, outputs):
+    """在留出集上用四个模型的输出训练元学习器，并给出下一期的集成概率"""
+    import joblib
+    import numpy as np
+    import tensorflow as tf
+    import xgboost as xgb
+    from ensemble.stacking import fit_meta_learner
+    from models.rf_model import predict_multilabel_proba
+
+    features_path, lstm_path, transformer_path, xgboost_path, rf_path = inputs
+    with np.load(features_path) as features:
+        split = int(features['split'])
+        sequences = np.concatenate([features['sequences'][split:], features['next_sequence'][None]])
+        tree_features = np.vstack([features['tree_features'][split:], features['next_tree_features']])
+        holdout_targets = features['targets'][split:]
+
+    xgboost_model = xgb.XGBClassifier()
+    xgboost_model.load_model(xgboost_path)
+    model_outputs = np.hstack([
+        tf.keras.models.load_model(lstm_path).predict(sequences, verbose=0),
+        tf.keras.models.load_model(transformer_path).predict(sequences, verbose=0),
+        predict_multilabel_proba(xgboost_model, tree_features),
+        predict_multilabel_proba(joblib.load(rf_path), tree_features)
+    ])
+
+    # 最后一行是下一期的输入，不参与元学习器训练
+    meta_model = fit_meta_learner(model_outputs[:-1], holdout_targets)
+    joblib.dump(meta_model, outputs[0])
+    np.savez(outputs[1], probabilities=predict_multilabel_proba(meta_model, model_outputs[-1:])[0])
+
+def perturbation_stage(inputs, outputs):
+    """应用灵修扰动并选出最终号码"""
+    import numpy as np
+    from spiritual.perturbation import apply_perturbation
+    from utils.draws import BACK_PICKS, FRONT_PICKS, split_multilabel
+
+    with np.load(inputs[0]) as prediction:
+        probabilities = apply_perturbation(list(prediction['probabilities']), None)
+    front_scores, back_scores = split_multilabel(np.array(probabilities))
+    result = {
+        'front_zone': sorted(int(n) + 1 for n in np.argsort(-front_scores)[:FRONT_PICKS]),
+        'back_zone': sorted(int(n) + 1 for n in np.argsort(-back_scores)[:BACK_PICKS]),
+        'probabilities': [round(float(p), 4) for p in probabilities]
+    }
+    with open(outputs[0], 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+def report_stage(inputs, outputs):
+    """生成Markdown预测推文"""
+    with open(inputs[0], 'r', encoding='utf-8') as f:
+        prediction = json.load(f)
+    content = f"""# 🎯 大乐透AI预测
+
+- 🔴 前区：{' '.join(f'{n:02d}' for n in prediction['front_zone'])}
+- 🔵 后区：{' '.join(f'{n:02d}' for n in prediction['back_zone'])}
+
+模型融合：LSTM + Transformer + XGBoost + Random Forest（Stacking）
+
+⚠️ 本预测仅供参考，彩票投注需理性。
+"""
+    with open(outputs[0], 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def build_pipeline(window=10, holdout_fraction=0.2, raw_data=RAW_DATA, output_root='.', epochs=10,
+                   max_workers=None):
+    """
+    数据处理 → 特征 → 四个模型 → Stacking → 灵修扰动 → 推文
+    :param raw_data: 原始开奖数据CSV
+    :param output_root: 中间文件、模型与流水线清单的根目录
+    :param epochs: Keras模型的训练轮数
+    :param max_workers: 并行执行阶段的进程数
+    """
+    def path(relative):
+        return os.path.join(output_root, relative)
+
+    return Pipeline([
+        Stage('process_data', process_data_stage, [raw_data], [path(CLEAN_DRAWS)], deps=['utils.draws']),
+        Stage('feature_store', feature_store_stage, [path(CLEAN_DRAWS)], [path(FEATURE_STORE)],
+              deps=FEATURE_STORE_DEPS),
+        Stage('features', features_stage, [path(FEATURE_STORE)], [path(FEATURES)],
+              {'window': window, 'holdout_fraction': holdout_fraction}, deps=FEATURE_STORE_DEPS),
+        Stage('lstm', lstm_stage, [path(FEATURES)], [path(LSTM_MODEL)],
+              {'checkpoint_dir': path(os.path.join(CHECKPOINT_DIR, 'lstm')), 'epochs': epochs},
+              deps=['models.lstm_model', 'models.checkpointing']),
+        Stage('transformer', transformer_stage, [path(FEATURES)], [path(TRANSFORMER_MODEL)],
+              {'checkpoint_dir': path(os.path.join(CHECKPOINT_DIR, 'transformer')), 'epochs': epochs},
+              deps=['models.transformer_model', 'models.checkpointing']),
+        Stage('xgboost', xgboost_stage, [path(FEATURES)], [path(XGBOOST_MODEL)], deps=['models.xgboost_model']),
+        Stage('rf', rf_stage, [path(FEATURES)], [path(RF_MODEL)], deps=['models.rf_model']),
+        Stage('stacking', stacking_stage,
+              [path(FEATURES), path(LSTM_MODEL), path(TRANSFORMER_MODEL), path(XGBOOST_MODEL), path(RF_MODEL)],
+              [path(STACKING_MODEL), path(ENSEMBLE_PREDICTION)], deps=['ensemble.stacking', 'models.rf_model']),
+        Stage('perturbation', perturbation_stage, [path(ENSEMBLE_PREDICTION)], [path(PERTURBED_PREDICTION)],
+              deps=['spiritual.perturbation', 'utils.draws']),
+        Stage('report', report_stage, [path(PERTURBED_PREDICTION)], [path(REPORT)])
+    ], manifest_path=path(os.path.join('.pipeline', 'manifest.json')), max_workers=max_workers)
 
 def main():
-    # Example usage
-    data = load_and_process_data('data/raw_data/sample.csv')
-    model = build_lstm_model(input_shape=(None, data.shape[1]))
-    print("Model built successfully.")
+    results = build_pipeline().run()
+    print(f"流水线执行完成: {results}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+
+import numpy as np
+import tensorflow as tf
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_FILE = 'run.json'
+
+def fit_with_checkpoints(model, train_data, train_labels, checkpoint_dir, epochs=10, batch_size=32,
+                         checkpoint_every=None, max_to_keep=3, seed=42):
+    """
+    可中断、可恢复的训练循环：定期保存模型权重、优化器状态以及当前训练到的轮次和批次位置，
+    重启后从最近的检查点继续，已完成的轮次和批次不会重复训练
+    :param model: 已编译的Keras模型
+    :param train_data: 训练数据
+    :param train_labels: 训练标签
+    :param checkpoint_dir: 检查点目录，同一目录下模型结构、超参数、数据、批大小或随机种子变化时会清空旧检查点重新开始
+    :param epochs: 训练轮数
+    :param batch_size: 批大小
+    :param checkpoint_every: 每隔多少个批次额外保存一次，None表示只在每轮结束时保存
+    :param max_to_keep: 保留最近的检查点个数
+    :param seed: 打乱顺序的随机种子，每轮的样本顺序由 seed+轮次 决定，恢复后批次划分保持一致
+    :return: 训练好的模型
+    """
+    fingerprint = _run_fingerprint(model, train_data, train_labels, batch_size, seed)
+    _prepare_checkpoint_dir(checkpoint_dir, fingerprint)
+
+    epoch_var = tf.Variable(0, dtype=tf.int64, trainable=False)
+    batch_var = tf.Variable(0, dtype=tf.int64, trainable=False)
+    # 先创建优化器的状态变量，检查点中的动量等状态才能立即恢复
+    model.optimizer.build(model.trainable_variables)
+    checkpoint = tf.train.Checkpoint(model=model, optimizer=model.optimizer, epoch=epoch_var, batch=batch_var)
+    manager = tf.train.CheckpointManager(checkpoint, checkpoint_dir, max_to_keep=max_to_keep)
+    if manager.latest_checkpoint:
+        checkpoint.restore(manager.latest_checkpoint).assert_existing_objects_matched()
+        logger.info(f"从检查点 {manager.latest_checkpoint} 恢复：第 {int(epoch_var)} 轮第 {int(batch_var)} 批")
+
+    n_samples = len(train_data)
+    steps = math.ceil(n_samples / batch_size)
+    for epoch in range(int(epoch_var), epochs):
+        order = np.random.default_rng(seed + epoch).permutation(n_samples)
+        model.reset_metrics()
+        logs = {}
+        for step in range(int(batch_var), steps):
+            index = np.sort(order[step * batch_size:(step + 1) * batch_size])
+            logs = model.train_on_batch(train_data[index], train_labels[index], return_dict=True)
+            batch_var.assign(step + 1)
+            if checkpoint_every and (step + 1) % checkpoint_every == 0 and step + 1 < steps:
+                manager.save()
+
+        epoch_var.assign(epoch + 1)
+        batch_var.assign(0)
+        manager.save()
+        logger.info(f"第 {epoch + 1}/{epochs} 轮完成：" + ', '.join(f'{k}={float(v):.4f}' for k, v in logs.items()))
+
+    return model
+
+def checkpoint_progress(checkpoint_dir):
+    """
+    读取检查点目录中最近一次保存的训练进度
+    :param checkpoint_dir: 检查点目录
+    :return: (已完成轮数, 当前轮已完成批次数)，没有检查点时返回 None
+    """
+    latest = tf.train.latest_checkpoint(checkpoint_dir)
+    if latest is None:
+        return None
+    reader = tf.train.load_checkpoint(latest)
+    return (int(reader.get_tensor('epoch/.ATTRIBUTES/VARIABLE_VALUE')),
+            int(reader.get_tensor('batch/.ATTRIBUTES/VARIABLE_VALUE')))
+
+def _run_fingerprint(model, train_data, train_labels, batch_size, seed):
+    """
+    模型结构与超参数、训练数据以及批次划分参数的指纹，用于判断检查点是否属于本次训练；
+    增加训练轮数时可在原检查点上继续
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(_model_config(model), sort_keys=True, default=str).encode())
+    for array in (train_data, train_labels):
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.shape, array.dtype.str)).encode())
+        digest.update(array.tobytes())
+    digest.update(json.dumps([batch_size, seed]).encode())
+    return digest.hexdigest()
+
+def _model_config(model):
+    """
+    模型各层的类型与配置、优化器配置和损失函数。
+    Keras按创建顺序自动生成层名（如 lstm_3），名称不计入，同一结构在不同进程中重建时指纹一致
+    """
+    return {
+        'layers': [[type(layer).__name__, _strip_names(layer.get_config())] for layer in model.layers],
+        'weights': [[list(weight.shape), str(weight.dtype)] for weight in model.weights],
+        'optimizer': _strip_names(model.optimizer.get_config()),
+        'loss': str(model.loss)
+    }
+
+def _strip_names(config):
+    """递归去掉配置中的 name 字段"""
+    if isinstance(config, dict):
+        return {key: _strip_names(value) for key, value in config.items() if key != 'name'}
+    if isinstance(config, (list, tuple)):
+        return [_strip_names(value) for value in config]
+    return config
+
+def _prepare_checkpoint_dir(checkpoint_dir, fingerprint):
+    """检查点目录与本次训练不匹配时清空，避免从其他数据训练出的状态恢复"""
+    fingerprint_path = os.path.join(checkpoint_dir, FINGERPRINT_FILE)
+    if os.path.exists(fingerprint_path):
+        with open(fingerprint_path) as f:
+            if json.load(f).get('fingerprint') == fingerprint:
+                return
+        logger.info(f"{checkpoint_dir} 中的检查点来自不同的模型、数据或训练参数，重新开始训练")
+        shutil.rmtree(checkpoint_dir)
+
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    with open(fingerprint_path, 'w') as f:
+        json.dump({'fingerprint': fingerprint}, f)
@@ -0,0 +1,230 @@
+import json
+import numpy as np
+
+# 推理时只依赖numpy：导出函数只读取模型对象的属性，不导入sklearn或xgboost
+
+class CompiledForest:
+    """
+    扁平化的树集成模型：全部树的节点按行连续存放在数组中，feature < 0 表示叶子节点
+    随机森林输出各树叶子概率的平均值，XGBoost输出叶子权重之和经sigmoid变换后的概率
+    """
+
+    def __init__(self, kind, feature, threshold, left, right, default_left, value, roots,
+                 max_depth, tree_output=None, base_margin=None):
+        self.kind = kind
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.tree_output = tree_output
+        self.base_margin = base_margin
+
+    @property
+    def n_outputs(self):
+        if self.kind == 'rf':
+            return self.value.shape[1]
+        return len(self.base_margin)
+
+    def predict_proba(self, data, batch_size=4096):
+        """
+        批量预测概率
+        :param data: 形状为 (样本数, 特征数) 的输入
+        :param batch_size: 每批样本数，控制 (样本数 × 树数) 中间矩阵的内存占用
+        :return: 单输出时与sklearn一致为 (样本数, 2)；多标签时为 (样本数, 标签数) 的正类概率
+        """
+        # 与sklearn/xgboost一致，先按float32比较分裂阈值
+        data = np.asarray(data, dtype=np.float32).astype(np.float64)
+        batches = [self._predict_batch(data[i:i + batch_size])
+                   for i in range(0, len(data), batch_size)]
+        proba = np.vstack(batches) if batches else np.zeros((0, self.n_outputs))
+        if self.n_outputs == 1:
+            return np.column_stack([1 - proba[:, 0], proba[:, 0]])
+        return proba
+
+    def _predict_batch(self, data):
+        leaves = self._leaf_indices(data)
+        if self.kind == 'rf':
+            return self.value[leaves].mean(axis=1)
+        # 每棵树的叶子权重按所属标签累加为margin
+        output_matrix = np.zeros((len(self.roots), self.n_outputs))
+        output_matrix[np.arange(len(self.roots)), self.tree_output] = 1.0
+        margins = self.value[leaves] @ output_matrix + self.base_margin
+        return 1.0 / (1.0 + np.exp(-margins))
+
+    def _leaf_indices(self, data):
+        """所有样本在所有树上同步逐层下降，返回 (样本数, 树数) 的叶子节点编号"""
+        rows = np.arange(len(data))[:, None]
+        nodes = np.tile(self.roots, (len(data), 1))
+        for _ in range(self.max_depth):
+            features = self.feature[nodes]
+            active = features >= 0
+            if not active.any():
+                break
+            x = data[rows, np.where(active, features, 0)]
+            if self.kind == 'rf':
+                go_left = x <= self.threshold[nodes]
+            else:
+                go_left = np.where(np.isnan(x), self.default_left[nodes], x < self.threshold[nodes])
+            next_nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            nodes = np.where(active, next_nodes, nodes)
+        return nodes
+
+    def save(self, path):
+        """保存为npz文件"""
+        arrays = {
+            'kind': np.array(self.kind),
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'default_left': self.default_left,
+            'value': self.value,
+            'roots': self.roots,
+            'max_depth': np.array(self.max_depth)
+        }
+        if self.kind == 'xgboost':
+            arrays['tree_output'] = self.tree_output
+            arrays['base_margin'] = self.base_margin
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """从npz文件加载"""
+        with np.load(path) as arrays:
+            kind = str(arrays['kind'])
+            return cls(kind, arrays['feature'], arrays['threshold'], arrays['left'],
+                       arrays['right'], arrays['default_left'], arrays['value'],
+                       arrays['roots'], int(arrays['max_depth']),
+                       arrays['tree_output'] if kind == 'xgboost' else None,
+                       arrays['base_margin'] if kind == 'xgboost' else None)
+
+def export_rf_model(model):
+    """
+    将 train_rf_model / train_rf_multilabel_model 训练的随机森林扁平化
+    :param model: 训练好的RandomForestClassifier
+    :return: CompiledForest
+    """
+    classes = model.classes_ if isinstance(model.classes_, list) else [model.classes_]
+    arrays = {'feature': [], 'threshold': [], 'left': [], 'right': [], 'value': []}
+    roots = []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left < 0
+        roots.append(offset)
+        arrays['feature'].append(np.where(is_leaf, -1, tree.feature))
+        arrays['threshold'].append(tree.threshold)
+        arrays['left'].append(np.where(is_leaf, -1, tree.children_left + offset))
+        arrays['right'].append(np.where(is_leaf, -1, tree.children_right + offset))
+
+        # 叶子上各输出的正类概率
+        counts = tree.value
+        proba = counts / np.maximum(counts.sum(axis=2, keepdims=True), 1e-12)
+        columns = []
+        for output, output_classes in enumerate(classes):
+            output_classes = list(output_classes)
+            if 1 in output_classes:
+                columns.append(proba[:, output, output_classes.index(1)])
+            else:
+                columns.append(np.zeros(tree.node_count))
+        arrays['value'].append(np.column_stack(columns))
+
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    return CompiledForest(
+        'rf',
+        np.concatenate(arrays['feature']).astype(np.int32),
+        np.concatenate(arrays['threshold']).astype(np.float64),
+        np.concatenate(arrays['left']).astype(np.int32),
+        np.concatenate(arrays['right']).astype(np.int32),
+        np.zeros(offset, dtype=bool),
+        np.concatenate(arrays['value']),
+        np.array(roots, dtype=np.int32),
+        max_depth
+    )
+
+def export_xgboost_model(model):
+    """
+    将 train_xgboost_model 等训练的XGBoost模型扁平化，支持binary:logistic二分类与多标签
+    使用早停得到的模型只导出最佳轮数以内的树
+    :param model: XGBClassifier 或 Booster
+    :return: CompiledForest
+    """
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+    if learner['objective']['name'] != 'binary:logistic':
+        raise ValueError(f"暂不支持的目标函数: {learner['objective']['name']}")
+
+    model_param = learner['learner_model_param']
+    num_target = int(model_param.get('num_target', 1))
+    base_score = [float(v) for v in model_param['base_score'].strip('[]').split(',')]
+    if len(base_score) == 1:
+        base_score = base_score * num_target
+    base_score = np.clip(np.array(base_score), 1e-12, 1 - 1e-12)
+
+    booster_model = learner['gradient_booster']
+    trees_model = booster_model['gbtree']['model'] if 'gbtree' in booster_model else booster_model['model']
+    trees = trees_model['trees']
+    tree_info = trees_model['tree_info']
+
+    best_iteration = _best_iteration(booster)
+    n_trees = len(trees)
+    if best_iteration is not None:
+        num_parallel_tree = int(trees_model['gbtree_model_param'].get('num_parallel_tree', 1))
+        n_trees = min(n_trees, (best_iteration + 1) * num_target * num_parallel_tree)
+
+    arrays = {'feature': [], 'threshold': [], 'left': [], 'right': [], 'default_left': [], 'value': []}
+    roots = []
+    offset = 0
+    max_depth = 0
+    for tree in trees[:n_trees]:
+        left = np.array(tree['left_children'], dtype=np.int64)
+        right = np.array(tree['right_children'], dtype=np.int64)
+        conditions = np.array(tree['split_conditions'], dtype=np.float32).astype(np.float64)
+        is_leaf = left < 0
+        roots.append(offset)
+        arrays['feature'].append(np.where(is_leaf, -1, tree['split_indices']))
+        arrays['threshold'].append(conditions)
+        arrays['left'].append(np.where(is_leaf, -1, left + offset))
+        arrays['right'].append(np.where(is_leaf, -1, right + offset))
+        arrays['default_left'].append(np.array(tree['default_left'], dtype=bool))
+        # 叶子节点的 split_conditions 即叶子权重（已乘学习率）
+        arrays['value'].append(np.where(is_leaf, conditions, 0.0))
+        offset += len(left)
+        max_depth = max(max_depth, _tree_depth(left, right))
+
+    return CompiledForest(
+        'xgboost',
+        np.concatenate(arrays['feature']).astype(np.int32),
+        np.concatenate(arrays['threshold']),
+        np.concatenate(arrays['left']).astype(np.int32),
+        np.concatenate(arrays['right']).astype(np.int32),
+        np.concatenate(arrays['default_left']),
+        np.concatenate(arrays['value']),
+        np.array(roots, dtype=np.int32),
+        max_depth,
+        tree_output=np.array(tree_info[:n_trees], dtype=np.int32),
+        base_margin=np.log(base_score / (1 - base_score))
+    )
+
+def _best_iteration(booster):
+    """读取早停记录的最佳轮数，未使用早停时返回None"""
+    value = booster.attr('best_iteration')
+    return int(value) if value is not None else None
+
+def _tree_depth(left, right):
+    """按层遍历计算单棵树的深度"""
+    depth = 0
+    level = [0]
+    while level:
+        children = [c for node in level for c in (left[node], right[node]) if c >= 0]
+        if children:
+            depth += 1
+        level = children
+    return depth
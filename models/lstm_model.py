@@ -0,0 +1,44 @@
+import tensorflow as tf
+
+from models.checkpointing import fit_with_checkpoints
+
+def build_lstm_model(input_shape, output_dim=1, lstm_units=(128, 64), dense_units=32):
+    """
+    构建LSTM模型
+    :param input_shape: 输入数据的形状
+    :param output_dim: 输出维度，1为单号码二分类，NUM_LABELS(47)为前后区全部号码的多标签输出
+    :param lstm_units: 两层LSTM的单元数
+    :param dense_units: 全连接层单元数
+    :return: 编译后的模型
+    """
+    model = tf.keras.Sequential([
+        tf.keras.layers.LSTM(lstm_units[0], input_shape=input_shape, return_sequences=True),
+        tf.keras.layers.LSTM(lstm_units[1]),
+        tf.keras.layers.Dense(dense_units, activation='relu'),
+        tf.keras.layers.Dense(output_dim, activation='sigmoid')
+    ])
+    model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
+    return model
+
+def train_lstm_model(train_data, train_labels, input_shape, output_dim=1, epochs=10, batch_size=32,
+                     checkpoint_dir=None, checkpoint_every=None, max_to_keep=3, **model_params):
+    """
+    训练LSTM模型
+    :param train_data: 训练数据
+    :param train_labels: 训练标签，多标签模式下形状为 (样本数, 47)
+    :param input_shape: 输入数据的形状
+    :param output_dim: 输出维度，多标签模式下一次训练即覆盖全部47个号码
+    :param epochs: 训练轮数
+    :param batch_size: 批大小
+    :param checkpoint_dir: 检查点目录，指定后定期保存训练状态，中断后以相同参数再次调用即从断点继续
+    :param checkpoint_every: 每隔多少个批次保存一次，None表示每轮结束时保存
+    :param max_to_keep: 保留最近的检查点个数
+    :param model_params: 传给 build_lstm_model 的结构参数
+    :return: 训练好的模型
+    """
+    model = build_lstm_model(input_shape, output_dim, **model_params)
+    if checkpoint_dir:
+        return fit_with_checkpoints(model, train_data, train_labels, checkpoint_dir, epochs, batch_size,
+                                    checkpoint_every, max_to_keep)
+    model.fit(train_data, train_labels, epochs=epochs, batch_size=batch_size)
+    return model
@@ -0,0 +1,207 @@
+import json
+import logging
+import os
+import shutil
+import time
+import numpy as np
+import tensorflow as tf
+import xgboost as xgb
+
+from models.compiled_forest import export_xgboost_model
+from models.tflite_export import export_tflite_model
+from models.xgboost_model import FAST_TRAIN_PARAMS
+from utils.draws import NUM_LABELS, draws_to_multilabel, multilabel_log_loss
+
+logger = logging.getLogger(__name__)
+
+# 服务目录结构：versions/<版本号>/ 存放各版本模型，current 为指向在线版本的符号链接
+VERSIONS_DIR = 'versions'
+CURRENT_LINK = 'current'
+
+# 各版本目录中的模型文件
+KERAS_MODELS = ('lstm', 'transformer')
+XGBOOST_FILE = 'xgboost.json'
+WEIGHTS_FILE = 'ensemble_weights.json'
+REPLAY_FILE = 'replay.npz'
+
+# 回放缓冲区保留的最近样本数。只在单期样本上反复更新会让模型记住这一期，
+# 微调与追加提升都在最近若干期的样本上进行
+REPLAY_SIZE = 64
+
+def fine_tune_keras_model(model, new_data, new_labels, max_steps=2, batch_size=32, seed=None):
+    """
+    在回放样本上对Keras模型做有限步数的小批量微调，沿用模型中保存的优化器状态（步数与一、二阶矩）；
+    各版本保存前都已构建优化器变量，加载时不会因变量数不符而跳过
+    :param model: 从上一次检查点加载的模型
+    :param new_data: 回放样本，形状为 (样本数, 时间步, 特征数)
+    :param new_labels: 回放标签，形状为 (样本数, 47)
+    :param max_steps: 梯度更新步数，耗时与历史长度无关
+    :param batch_size: 每步从回放样本中抽取的样本数
+    :param seed: 抽样随机种子
+    :return: 微调后的模型
+    """
+    new_data = np.asarray(new_data, dtype=np.float32)
+    new_labels = np.asarray(new_labels, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    for _ in range(max_steps):
+        batch = rng.choice(len(new_data), size=min(batch_size, len(new_data)), replace=False)
+        model.train_on_batch(new_data[batch], new_labels[batch])
+    return model
+
+def continue_xgboost_boosting(booster, new_data, new_labels, num_rounds=5, params=None):
+    """
+    在已有的XGBoost Booster上继续追加提升轮数
+    :param booster: 上一版本的Booster
+    :param new_data: 新数据的特征
+    :param new_labels: 新数据的标签
+    :param num_rounds: 追加的提升轮数
+    :param params: 覆盖 FAST_TRAIN_PARAMS 的训练参数
+    :return: 追加轮数后的Booster
+    """
+    train_params = dict(FAST_TRAIN_PARAMS, **(params or {}))
+    dtrain = xgb.DMatrix(np.asarray(new_data), label=np.asarray(new_labels))
+    return xgb.train(train_params, dtrain, num_boost_round=num_rounds, xgb_model=booster)
+
+def update_ensemble_weights(weights, model_losses, learning_rate=0.5):
+    """
+    按各模型在新开奖上的损失做乘性权重更新（Hedge算法），损失越小的模型权重越高。
+    更新的是服务端加权平均集成的权重，并不重新拟合Stacking元学习器
+    :param weights: 当前权重字典，如 {'lstm': 0.35, 'transformer': 0.40, 'xgboost': 0.25}
+    :param model_losses: 各模型在新开奖上的损失
+    :param learning_rate: 更新步长
+    :return: 归一化后的新权重字典
+    """
+    updated = {name: weight * np.exp(-learning_rate * model_losses.get(name, 0.0))
+               for name, weight in weights.items()}
+    total = sum(updated.values())
+    return {name: float(weight / total) for name, weight in updated.items()}
+
+class OnlineUpdater:
+    """每期开奖后增量更新在线模型，并原子切换服务版本"""
+
+    def __init__(self, serve_dir, keras_steps=2, xgboost_rounds=1, sequence_length=None, replay_size=REPLAY_SIZE):
+        """
+        :param serve_dir: 服务目录，MODEL_EXPORT_DIR 应指向其中的 current 链接
+        :param keras_steps: 每期Keras模型的微调步数
+        :param xgboost_rounds: 每期XGBoost追加的提升轮数
+        :param sequence_length: 导出TFLite时的固定时间步长度，为None时不导出TFLite
+        :param replay_size: 回放缓冲区保留的最近样本数
+        """
+        self.serve_dir = serve_dir
+        self.keras_steps = keras_steps
+        self.xgboost_rounds = xgboost_rounds
+        self.sequence_length = sequence_length
+        self.replay_size = replay_size
+
+    @property
+    def current_dir(self):
+        return os.path.join(self.serve_dir, CURRENT_LINK)
+
+    def initialize(self, keras_models, booster, weights, replay=None):
+        """
+        发布初始版本，通常在全量训练完成后调用一次
+        :param keras_models: {'lstm': 模型, 'transformer': 模型}，需为47维多标签输出
+        :param booster: 多标签XGBoost Booster
+        :param weights: 初始集成权重
+        :param replay: 用于初始化回放缓冲区的最近样本 (Keras模型输入, 树模型特征, 标签)，按时间先后排列
+        :return: 初始版本目录
+        """
+        if replay is None:
+            replay = ([], [], np.zeros((0, NUM_LABELS)))
+        version_dir = self._write_version(keras_models, booster, weights, self._trim_replay(*replay))
+        self.publish(version_dir)
+        return version_dir
+
+    def ingest_draw(self, front_zone, back_zone, sequence_input, feature_vector):
+        """
+        摄入一期新开奖：评估各模型损失、更新集成权重，把本期样本加入回放缓冲区后在缓冲区上微调模型，然后发布新版本
+        :param front_zone: 新开奖前区号码
+        :param back_zone: 新开奖后区号码
+        :param sequence_input: 该期对应的Keras模型输入窗口，形状为 (时间步, 特征数)
+        :param feature_vector: 该期对应的树模型特征向量
+        :return: 新版本目录
+        """
+        start_time = time.time()
+        labels = draws_to_multilabel([front_zone], [back_zone])
+        sequence_batch = np.asarray([sequence_input], dtype=np.float32)
+        feature_batch = np.asarray([feature_vector])
+
+        keras_models = {name: tf.keras.models.load_model(os.path.join(self.current_dir, f'{name}.keras'))
+                        for name in KERAS_MODELS}
+        booster = xgb.Booster(model_file=os.path.join(self.current_dir, XGBOOST_FILE))
+        with open(os.path.join(self.current_dir, WEIGHTS_FILE), 'r', encoding='utf-8') as f:
+            weights = json.load(f)
+        with np.load(os.path.join(self.current_dir, REPLAY_FILE)) as replay:
+            replay_sequences, replay_features, replay_labels = self._trim_replay(
+                _append_rows(replay['sequences'], sequence_batch),
+                _append_rows(replay['features'], feature_batch),
+                np.vstack([replay['labels'], labels]))
+
+        # 先用更新前的模型评估本期损失，作为集成权重更新的依据
+        model_losses = {name: multilabel_log_loss(model.predict(sequence_batch, verbose=0), labels)
+                        for name, model in keras_models.items()}
+        model_losses['xgboost'] = multilabel_log_loss(booster.predict(xgb.DMatrix(feature_batch)), labels)
+        weights = update_ensemble_weights(weights, model_losses)
+
+        for model in keras_models.values():
+            fine_tune_keras_model(model, replay_sequences, replay_labels, self.keras_steps)
+        booster = continue_xgboost_boosting(booster, replay_features, replay_labels, self.xgboost_rounds)
+
+        version_dir = self._write_version(keras_models, booster, weights,
+                                          (replay_sequences, replay_features, replay_labels))
+        self.publish(version_dir)
+        logger.info(f"在线更新完成: {version_dir}，耗时 {time.time() - start_time:.2f} 秒")
+        return version_dir
+
+    def _trim_replay(self, sequences, features, labels):
+        """只保留最近 replay_size 个样本"""
+        start = max(len(labels) - self.replay_size, 0)
+        return (np.asarray(sequences, dtype=np.float32)[start:], np.asarray(features, dtype=np.float32)[start:],
+                np.asarray(labels, dtype=np.float32)[start:])
+
+    def _write_version(self, keras_models, booster, weights, replay):
+        """写入新版本目录，同时导出推理用的TFLite与扁平化树模型"""
+        # 以纳秒时间戳作为版本号，按字符串排序即为发布顺序
+        version_dir = os.path.join(self.serve_dir, VERSIONS_DIR, str(time.time_ns()))
+        staging_dir = version_dir + '.tmp'
+        os.makedirs(staging_dir)
+
+        for name, model in keras_models.items():
+            # 未训练过的模型优化器只有步数与学习率两个变量，按这样保存的文件加载时Keras会跳过全部优化器状态
+            if model.optimizer is not None and not model.optimizer.built:
+                model.optimizer.build(model.trainable_variables)
+            model.save(os.path.join(staging_dir, f'{name}.keras'))
+            if self.sequence_length is not None:
+                export_tflite_model(model, os.path.join(staging_dir, f'{name}.tflite'),
+                                    sequence_length=self.sequence_length)
+        booster.save_model(os.path.join(staging_dir, XGBOOST_FILE))
+        export_xgboost_model(booster).save(os.path.join(staging_dir, 'xgboost.npz'))
+        with open(os.path.join(staging_dir, WEIGHTS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(weights, f, ensure_ascii=False, indent=2)
+        sequences, features, labels = replay
+        np.savez(os.path.join(staging_dir, REPLAY_FILE), sequences=sequences, features=features, labels=labels)
+
+        os.rename(staging_dir, version_dir)
+        return version_dir
+
+    def publish(self, version_dir, keep_versions=5):
+        """
+        原子切换在线版本：先创建临时符号链接，再用 os.replace 覆盖 current，
+        读取方在任何时刻看到的都是完整的旧版本或新版本
+        :param version_dir: 要发布的版本目录
+        :param keep_versions: 保留的历史版本数
+        """
+        temp_link = self.current_dir + '.tmp'
+        if os.path.lexists(temp_link):
+            os.remove(temp_link)
+        os.symlink(os.path.relpath(version_dir, self.serve_dir), temp_link)
+        os.replace(temp_link, self.current_dir)
+
+        versions_root = os.path.join(self.serve_dir, VERSIONS_DIR)
+        versions = sorted(v for v in os.listdir(versions_root) if not v.endswith('.tmp'))
+        for old_version in versions[:-keep_versions]:
+            shutil.rmtree(os.path.join(versions_root, old_version))
+
+def _append_rows(rows, new_rows):
+    """在已有样本后追加新样本；缓冲区为空时已有样本没有后续维度"""
+    return new_rows if len(rows) == 0 else np.concatenate([rows, new_rows])
@@ -0,0 +1,102 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+# 随机森林默认超参数
+DEFAULT_RF_PARAMS = {'n_estimators': 100, 'random_state': 42}
+
+def train_rf_model(train_data, train_labels, n_jobs=-1, **params):
+    """
+    训练随机森林模型
+    :param train_data: 训练数据
+    :param train_labels: 训练标签
+    :param n_jobs: 并行构建树的进程数，-1表示使用全部CPU核心
+    :param params: 覆盖 DEFAULT_RF_PARAMS 的超参数，如 max_depth、min_samples_leaf
+    :return: 训练好的模型
+    """
+    model = RandomForestClassifier(n_jobs=n_jobs, **dict(DEFAULT_RF_PARAMS, **params))
+    model.fit(train_data, train_labels)
+    return model
+
+def update_rf_model(model, recent_data, recent_labels, n_new_trees=10, max_trees=300):
+    """
+    增量更新随机森林：只在最近窗口的数据上追加少量新树，并淘汰超出上限的最旧的树
+    每次新开奖后只需训练 n_new_trees 棵树，无需重新训练整片森林
+    :param model: 已训练的随机森林模型，会被原地更新
+    :param recent_data: 最近窗口的训练数据
+    :param recent_labels: 最近窗口的训练标签，须包含与原模型相同的全部类别
+    :param n_new_trees: 本次追加的树数量
+    :param max_trees: 森林中保留的最大树数量
+    :return: 更新后的模型
+    """
+    _check_label_classes(model, recent_labels)
+
+    # warm_start 只跳过与现存树数相同个数的随机数，森林达到上限后每次都会得到同一组种子；
+    # 整数种子按累计训练过的树数推进，保证每次新增的树都有新的随机性
+    n_trees_grown = getattr(model, 'n_trees_grown_', len(model.estimators_))
+    random_state = model.get_params()['random_state']
+    if isinstance(random_state, (int, np.integer)):
+        base_seed = getattr(model, 'base_random_state_', int(random_state))
+        model.base_random_state_ = base_seed
+        random_state = int(np.random.SeedSequence([base_seed, n_trees_grown]).generate_state(1)[0])
+
+    # warm_start 模式下增大 n_estimators 只会训练新增的树
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new_trees,
+                     random_state=random_state)
+    model.fit(recent_data, recent_labels)
+    model.n_trees_grown_ = n_trees_grown + n_new_trees
+
+    # estimators_ 按加入顺序排列，超出上限时淘汰最早训练的树
+    if len(model.estimators_) > max_trees:
+        model.estimators_ = model.estimators_[-max_trees:]
+        model.set_params(n_estimators=max_trees)
+    return model
+
+def _check_label_classes(model, labels):
+    """检查最近窗口的标签类别与原模型一致，否则新旧树的概率输出无法对齐"""
+    labels = np.asarray(labels)
+    if labels.ndim == 1:
+        label_columns, model_classes = [labels], [model.classes_]
+    else:
+        label_columns, model_classes = labels.T, model.classes_
+    for column, classes in zip(label_columns, model_classes):
+        if not np.array_equal(np.unique(column), classes):
+            raise ValueError("最近窗口的标签类别与原模型不一致，请扩大窗口后再追加树")
+
+def train_rf_multilabel_model(train_data, train_labels, n_jobs=-1, **params):
+    """
+    训练多标签随机森林模型
+    随机森林原生支持多输出，每棵树的分裂同时考虑全部47个标签，
+    训练开销与单个二分类模型相当，而不是47个模型
+    :param train_data: 训练数据
+    :param train_labels: 训练标签，形状为 (样本数, 47)
+    :param n_jobs: 并行构建树的进程数，-1表示使用全部CPU核心
+    :param params: 覆盖 DEFAULT_RF_PARAMS 的超参数
+    :return: 训练好的模型
+    """
+    model = RandomForestClassifier(n_jobs=n_jobs, **dict(DEFAULT_RF_PARAMS, **params))
+    model.fit(train_data, train_labels)
+    return model
+
+def predict_multilabel_proba(model, data):
+    """
+    获取多标签模型中每个标签取1的概率
+    :param model: 训练好的多标签模型（随机森林、XGBoost或MultiOutputClassifier）
+    :param data: 输入数据
+    :return: 形状为 (样本数, 标签数) 的概率矩阵
+    """
+    proba = model.predict_proba(data)
+    if not isinstance(proba, list):
+        # XGBoost多标签直接返回 (样本数, 标签数) 矩阵
+        return np.asarray(proba)
+
+    # 随机森林等多输出模型按标签返回 (样本数, 类别数) 数组列表
+    classes = getattr(model, 'classes_', None)
+    columns = []
+    for i, label_proba in enumerate(proba):
+        label_classes = list(classes[i]) if classes is not None else [0, 1]
+        if 1 in label_classes:
+            columns.append(label_proba[:, label_classes.index(1)])
+        else:
+            # 训练集中该号码从未出现
+            columns.append(np.zeros(label_proba.shape[0]))
+    return np.column_stack(columns)
@@ -0,0 +1,149 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 量化方式：不量化 / 动态范围量化（权重int8）/ 全整数int8量化（需校准数据）
+QUANTIZATION_MODES = ('none', 'dynamic', 'int8')
+
+def export_tflite_model(model, output_path, quantization='dynamic', calibration_data=None,
+                        sequence_length=None, calibration_steps=200):
+    """
+    将训练好的LSTM/Transformer Keras模型转换为TFLite模型
+    :param model: build_lstm_model / build_transformer_model 训练后的模型
+    :param output_path: 输出的 .tflite 文件路径
+    :param quantization: 量化方式，见 QUANTIZATION_MODES
+    :param calibration_data: int8量化所用的校准样本，形状为 (样本数, 时间步, 特征数)
+    :param sequence_length: 固定时间步长度；含LSTM等循环层的模型必须指定，
+                            循环层按该长度展开为逐时间步的内置算子，批大小维度保持可变
+    :param calibration_steps: 最多使用的校准样本数
+    :return: 输出文件路径
+    """
+    import tensorflow as tf
+
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"不支持的量化方式: {quantization}")
+
+    recurrent = _has_recurrent_layer(model)
+    if sequence_length is None and (quantization == 'int8' or recurrent):
+        raise ValueError("int8量化或含循环层的模型需要指定固定的 sequence_length")
+    if sequence_length is not None:
+        model = _fixed_shape_model(model, sequence_length, unroll=quantization == 'int8' or recurrent)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if quantization != 'none':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if quantization == 'int8':
+        if calibration_data is None:
+            raise ValueError("int8量化需要提供校准数据")
+        calibration_data = np.asarray(calibration_data, dtype=np.float32)
+
+        def representative_dataset():
+            for sample in calibration_data[:calibration_steps]:
+                yield [sample[np.newaxis, ...]]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    tflite_model = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+    logger.info(f"TFLite模型已导出: {output_path} ({len(tflite_model) / 1024:.1f} KB)")
+    return output_path
+
+def _fixed_shape_model(model, sequence_length, unroll):
+    """
+    以固定时间步、可变批大小的输入重建模型并复制权重
+    循环层需展开为逐时间步的矩阵运算：未展开的循环算子只能在固定批大小下转换，也无法全整数量化
+    """
+    import tensorflow as tf
+
+    inputs = tf.keras.Input(shape=(sequence_length, model.input_shape[-1]))
+    if not unroll:
+        return tf.keras.Model(inputs, model(inputs))
+
+    def clone_layer(layer):
+        config = layer.get_config()
+        if 'unroll' in config:
+            config['unroll'] = True
+        return layer.__class__.from_config(config)
+
+    fixed_model = tf.keras.models.clone_model(model, input_tensors=inputs, clone_function=clone_layer)
+    fixed_model.set_weights(model.get_weights())
+    return fixed_model
+
+def _has_recurrent_layer(model):
+    """模型（含嵌套子模型）中是否有LSTM等循环层"""
+    import tensorflow as tf
+
+    for layer in model.layers:
+        if isinstance(layer, tf.keras.layers.RNN):
+            return True
+        if hasattr(layer, 'layers') and _has_recurrent_layer(layer):
+            return True
+    return False
+
+class TFLitePredictor:
+    """基于TFLite解释器的轻量预测器，推理时无需加载完整的TensorFlow"""
+
+    def __init__(self, model_path, num_threads=1):
+        interpreter_class = _load_interpreter_class()
+        self.interpreter = interpreter_class(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._refresh_details()
+
+    def predict(self, data):
+        """
+        执行推理
+        :param data: 形状为 (样本数, 时间步, 特征数) 的输入
+        :return: 模型sigmoid输出的概率，已反量化为float32
+        """
+        data = np.asarray(data, dtype=np.float32)
+        if data.shape != tuple(self._input_detail['shape']):
+            self.interpreter.resize_tensor_input(self._input_detail['index'], data.shape)
+            self.interpreter.allocate_tensors()
+            self._refresh_details()
+
+        self.interpreter.set_tensor(self._input_detail['index'],
+                                   _quantize(data, self._input_detail))
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self._output_detail['index'])
+        return _dequantize(output, self._output_detail)
+
+    def _refresh_details(self):
+        self._input_detail = self.interpreter.get_input_details()[0]
+        self._output_detail = self.interpreter.get_output_details()[0]
+
+def _load_interpreter_class():
+    """依次尝试 LiteRT、tflite_runtime，最后退回完整TensorFlow中的解释器"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+def _quantize(data, detail):
+    """按输入张量的量化参数把float32转换为int8"""
+    if detail['dtype'] != np.int8:
+        return data.astype(detail['dtype'])
+    scale, zero_point = detail['quantization']
+    quantized = np.round(data / scale + zero_point)
+    return np.clip(quantized, -128, 127).astype(np.int8)
+
+def _dequantize(data, detail):
+    """按输出张量的量化参数把int8还原为float32"""
+    if detail['dtype'] != np.int8:
+        return data.astype(np.float32)
+    scale, zero_point = detail['quantization']
+    return (data.astype(np.float32) - zero_point) * scale
@@ -0,0 +1,222 @@
+import hashlib
+import logging
+import math
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.draws import build_feature_windows, multilabel_log_loss, window_tree_features
+
+logger = logging.getLogger(__name__)
+
+# 各模型的搜索空间；资源维度（Keras的训练轮数、树模型的树数量）由逐次减半算法分配
+SEARCH_SPACES = {
+    'lstm': {
+        'lstm_units': [(32, 16), (64, 32), (128, 64), (256, 128)],
+        'dense_units': [16, 32, 64],
+        'batch_size': [16, 32, 64]
+    },
+    'transformer': {
+        'num_heads': [2, 4, 8],
+        'key_dim': [16, 32, 64],
+        'dense_units': [32, 64, 128],
+        'batch_size': [16, 32, 64]
+    },
+    'xgboost': {
+        'max_depth': [3, 4, 6, 8],
+        'learning_rate': [0.01, 0.03, 0.1, 0.3],
+        'subsample': [0.6, 0.8, 1.0],
+        'colsample_bytree': [0.6, 0.8, 1.0],
+        'min_child_weight': [1, 5, 10]
+    },
+    'rf': {
+        'max_depth': [None, 6, 10, 16],
+        'min_samples_leaf': [1, 3, 5, 10],
+        'max_features': ['sqrt', 'log2', 0.3]
+    }
+}
+
+# 资源单位：Keras模型为训练轮数，树模型为树的数量
+RESOURCE_RANGES = {
+    'lstm': (1, 27),
+    'transformer': (1, 27),
+    'xgboost': (20, 540),
+    'rf': (20, 540)
+}
+
+def walk_forward_splits(n_samples, n_folds=3, min_train_fraction=0.5):
+    """
+    时间序列前向验证切分：训练集逐折向后扩展，验证集为紧随其后的一段
+    :param n_samples: 样本数
+    :param n_folds: 折数
+    :param min_train_fraction: 第一折训练集占全部样本的比例
+    :return: [(训练集结束位置, 验证集结束位置), ...]
+    """
+    start = int(n_samples * min_train_fraction)
+    fold_size = (n_samples - start) // n_folds
+    return [(start + i * fold_size, start + (i + 1) * fold_size) for i in range(n_folds)]
+
+def cache_feature_windows(step_features, labels, window, cache_dir):
+    """
+    构建滑动窗口特征并保存为npy文件，各工作进程以内存映射方式共享读取，不重复构建
+    :param step_features: 每期的特征，形状为 (期数, 特征数)
+    :param labels: 每期的47维标签
+    :param window: 窗口长度
+    :param cache_dir: 缓存目录
+    :return: {'sequences': 路径, 'tree_features': 路径, 'targets': 路径}
+    """
+    step_features = np.ascontiguousarray(step_features, dtype=np.float32)
+    digest = hashlib.sha256(step_features.tobytes() + np.asarray(labels).tobytes()).hexdigest()[:16]
+    prefix = os.path.join(cache_dir, f'windows_{window}_{digest}')
+    paths = {name: f'{prefix}_{name}.npy' for name in ('sequences', 'tree_features', 'targets')}
+    if all(os.path.exists(path) for path in paths.values()):
+        return paths
+
+    os.makedirs(cache_dir, exist_ok=True)
+    sequences, targets = build_feature_windows(step_features, labels, window)
+    np.save(paths['sequences'], sequences)
+    np.save(paths['tree_features'], window_tree_features(sequences))
+    np.save(paths['targets'], targets)
+    return paths
+
+def sample_configs(model_type, n_configs, seed=42):
+    """
+    从搜索空间中随机采样不重复的超参数组合
+    :param model_type: 模型类型，见 SEARCH_SPACES
+    :param n_configs: 采样数量
+    :param seed: 随机种子
+    :return: 超参数字典列表
+    """
+    space = SEARCH_SPACES[model_type]
+    rng = random.Random(seed)
+    total = math.prod(len(values) for values in space.values())
+    configs, seen = [], set()
+    while len(configs) < min(n_configs, total):
+        config = {name: rng.choice(values) for name, values in space.items()}
+        key = repr(sorted(config.items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+def successive_halving(model_type, configs, cache_paths, min_resource, max_resource, eta=3,
+                       n_folds=3, max_workers=None):
+    """
+    逐次减半：所有配置先以最小资源评估，每一轮只保留最好的 1/eta 并把资源提高 eta 倍，
+    表现差的配置在低资源阶段即被淘汰
+    :param model_type: 模型类型
+    :param configs: 候选超参数列表
+    :param cache_paths: cache_feature_windows 返回的缓存路径
+    :param min_resource: 第一轮的资源量
+    :param max_resource: 资源上限
+    :param eta: 淘汰比例
+    :param n_folds: 前向验证折数
+    :param max_workers: 并行进程数，默认为CPU核心数
+    :return: 按最终损失排序的 [(损失, 配置, 资源量), ...]
+    """
+    targets = np.load(cache_paths['targets'], mmap_mode='r')
+    folds = walk_forward_splits(len(targets), n_folds)
+    survivors = list(configs)
+    resource = min_resource
+    history = []
+
+    # Keras配置在工作进程中训练，fork出的子进程可能继承主进程TensorFlow线程持有的锁而死锁，改用spawn启动
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        while survivors:
+            losses = list(executor.map(
+                _evaluate_config,
+                [model_type] * len(survivors), survivors, [resource] * len(survivors),
+                [cache_paths] * len(survivors), [folds] * len(survivors)))
+            ranked = sorted(zip(losses, range(len(survivors))))
+            history.extend((loss, survivors[i], resource) for loss, i in ranked)
+            logger.info(f"{model_type} 资源 {resource}：评估 {len(survivors)} 个配置，最佳损失 {ranked[0][0]:.5f}")
+
+            keep = len(survivors) // eta
+            if keep < 1 or resource * eta > max_resource:
+                break
+            survivors = [survivors[i] for _, i in ranked[:keep]]
+            resource = min(resource * eta, max_resource)
+
+    return sorted(history, key=lambda item: (-item[2], item[0]))
+
+def hyperband(model_type, cache_paths, n_folds=3, eta=3, max_workers=None, seed=42):
+    """
+    Hyperband：以不同的 (配置数, 起始资源) 组合运行多轮逐次减半，兼顾广度与深度
+    :param model_type: 模型类型
+    :param cache_paths: cache_feature_windows 返回的缓存路径
+    :param n_folds: 前向验证折数
+    :param eta: 淘汰比例
+    :param max_workers: 并行进程数
+    :param seed: 随机种子
+    :return: (最佳配置, 最佳资源量, 最佳损失)
+    """
+    min_resource, max_resource = RESOURCE_RANGES[model_type]
+    s_max = int(math.log(max_resource / min_resource, eta) + 1e-9)
+    best = (float('inf'), None, None)
+
+    for bracket in range(s_max, -1, -1):
+        n_configs = int(math.ceil((s_max + 1) / (bracket + 1) * eta ** bracket))
+        start_resource = max_resource / eta ** bracket
+        if model_type in ('xgboost', 'rf'):
+            start_resource = max(min_resource, int(start_resource))
+        else:
+            start_resource = max(1, int(round(start_resource)))
+        configs = sample_configs(model_type, n_configs, seed + bracket)
+        results = successive_halving(model_type, configs, cache_paths, start_resource, max_resource,
+                                     eta, n_folds, max_workers)
+        # 只比较达到最大资源的结果，避免低资源下的损失与高资源不可比
+        finished = [r for r in results if r[2] == results[0][2]]
+        loss, config, resource = min(finished, key=lambda r: r[0])
+        if loss < best[0]:
+            best = (loss, config, resource)
+        logger.info(f"{model_type} bracket {bracket}：最佳损失 {loss:.5f}，配置 {config}")
+
+    return best[1], best[2], best[0]
+
+def _evaluate_config(model_type, config, resource, cache_paths, folds):
+    """在子进程中按前向验证评估一个配置，返回各折平均的多标签交叉熵"""
+    targets = np.load(cache_paths['targets'], mmap_mode='r')
+    if model_type in ('lstm', 'transformer'):
+        inputs = np.load(cache_paths['sequences'], mmap_mode='r')
+    else:
+        inputs = np.load(cache_paths['tree_features'], mmap_mode='r')
+
+    losses = []
+    for train_end, valid_end in folds:
+        predict = _fit_model(model_type, config, resource, inputs[:train_end], targets[:train_end])
+        losses.append(multilabel_log_loss(predict(inputs[train_end:valid_end]),
+                                          targets[train_end:valid_end]))
+    return float(np.mean(losses))
+
+def _fit_model(model_type, config, resource, train_data, train_labels):
+    """按模型类型训练，返回预测函数；每个工作进程单线程运行，由进程池提供并行度"""
+    params = dict(config)
+    if model_type in ('lstm', 'transformer'):
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(1)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+        batch_size = params.pop('batch_size', 32)
+        input_shape = (None, train_data.shape[2])
+        if model_type == 'lstm':
+            from models.lstm_model import build_lstm_model
+            model = build_lstm_model(input_shape, train_labels.shape[1], **params)
+        else:
+            from models.transformer_model import build_transformer_model
+            model = build_transformer_model(input_shape, train_labels.shape[1], **params)
+        model.fit(np.asarray(train_data), np.asarray(train_labels), epochs=resource,
+                  batch_size=batch_size, verbose=0)
+        return lambda data: model.predict(np.asarray(data), verbose=0)
+
+    if model_type == 'xgboost':
+        from models.xgboost_model import train_xgboost_multilabel_model
+        model = train_xgboost_multilabel_model(train_data, train_labels, n_jobs=1,
+                                               n_estimators=resource, **params)
+        return model.predict_proba
+
+    from models.rf_model import predict_multilabel_proba, train_rf_multilabel_model
+    model = train_rf_multilabel_model(train_data, train_labels, n_jobs=1, n_estimators=resource, **params)
+    return lambda data: predict_multilabel_proba(model, data)
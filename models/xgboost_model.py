@@ -0,0 +1,156 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+import xgboost as xgb
+
+# 高吞吐训练模式的默认参数：直方图算法 + 全部CPU核心
+FAST_TRAIN_PARAMS = {
+    'objective': 'binary:logistic',
+    'eval_metric': 'logloss',
+    'tree_method': 'hist',
+    'max_bin': 256,
+    'nthread': os.cpu_count() or 1
+}
+
+# 分位数DMatrix缓存：键为 (数据版本标识, 验证集占比, 分桶数)，值为 (训练集, 验证集)。
+# 缓存只在当前进程内有效，供同一进程内的重复训练（如超参数搜索）复用，按最近使用淘汰
+DMATRIX_CACHE_SIZE = 4
+_quantile_dmatrix_cache = OrderedDict()
+
+def train_xgboost_model(train_data, train_labels, **params):
+    """
+    训练XGBoost模型
+    :param train_data: 训练数据
+    :param train_labels: 训练标签
+    :param params: XGBClassifier超参数，如 n_estimators、max_depth、learning_rate
+    :return: 训练好的模型
+    """
+    model = xgb.XGBClassifier(objective='binary:logistic', eval_metric='logloss', **params)
+    model.fit(train_data, train_labels)
+    return model
+
+def train_xgboost_multilabel_model(train_data, train_labels, n_jobs=-1, **params):
+    """
+    训练多标签XGBoost模型
+    47个标签共享同一份特征矩阵与直方图分桶，特征分位数只需计算一次，
+    各标签的树在同一次训练中并行生长
+    :param train_data: 训练数据
+    :param train_labels: 训练标签，形状为 (样本数, 47)
+    :param n_jobs: 训练线程数，-1表示使用全部CPU核心
+    :param params: XGBClassifier超参数
+    :return: 训练好的模型
+    """
+    model = xgb.XGBClassifier(objective='binary:logistic', eval_metric='logloss',
+                              tree_method='hist', n_jobs=n_jobs, **params)
+    model.fit(train_data, train_labels)
+    return model
+
+def time_ordered_split(train_data, train_labels, valid_fraction=0.1):
+    """
+    按时间顺序切分训练集与验证集，最后一段数据作为验证集，避免用未来数据训练
+    :param train_data: 按期号升序排列的训练数据
+    :param train_labels: 训练标签
+    :param valid_fraction: 验证集占比
+    :return: (训练数据, 训练标签, 验证数据, 验证标签)
+    """
+    split = int(len(train_data) * (1 - valid_fraction))
+    return train_data[:split], train_labels[:split], train_data[split:], train_labels[split:]
+
+def build_quantile_dmatrices(train_data, train_labels, valid_fraction=0.1, cache_key=None,
+                             max_bin=FAST_TRAIN_PARAMS['max_bin']):
+    """
+    构建训练集与验证集的分位数DMatrix，验证集复用训练集的分桶切分点
+    :param cache_key: 数据版本标识（如特征文件的哈希），标识、验证集占比与分桶数都相同时直接复用缓存
+    :return: (训练集DMatrix, 验证集DMatrix)
+    """
+    full_key = (cache_key, float(valid_fraction), int(max_bin))
+    if cache_key is not None and full_key in _quantile_dmatrix_cache:
+        _quantile_dmatrix_cache.move_to_end(full_key)
+        return _quantile_dmatrix_cache[full_key]
+
+    x_train, y_train, x_valid, y_valid = time_ordered_split(
+        train_data, train_labels, valid_fraction)
+    dtrain = xgb.QuantileDMatrix(x_train, label=y_train, max_bin=max_bin)
+    dvalid = xgb.QuantileDMatrix(x_valid, label=y_valid, ref=dtrain, max_bin=max_bin)
+
+    if cache_key is not None:
+        _quantile_dmatrix_cache[full_key] = (dtrain, dvalid)
+        while len(_quantile_dmatrix_cache) > DMATRIX_CACHE_SIZE:
+            _quantile_dmatrix_cache.popitem(last=False)
+    return dtrain, dvalid
+
+def clear_dmatrix_cache():
+    """清空分位数DMatrix缓存"""
+    _quantile_dmatrix_cache.clear()
+
+def train_xgboost_model_fast(train_data, train_labels, params=None, num_boost_round=1000,
+                             early_stopping_rounds=50, valid_fraction=0.1, cache_key=None):
+    """
+    高吞吐模式训练XGBoost模型：直方图算法、全部CPU核心、分位数DMatrix缓存，
+    并在按时间顺序切分的验证集上提前停止
+    :param train_data: 按期号升序排列的训练数据
+    :param train_labels: 训练标签
+    :param params: 覆盖 FAST_TRAIN_PARAMS 的训练参数
+    :param num_boost_round: 最大提升轮数
+    :param early_stopping_rounds: 验证集指标连续多少轮未改善即停止
+    :param valid_fraction: 验证集占比
+    :param cache_key: 数据版本标识，相同标识的重复训练跳过分位数计算
+    :return: 训练好的Booster，best_iteration 为最佳轮数
+    """
+    train_params = dict(FAST_TRAIN_PARAMS, **(params or {}))
+    dtrain, dvalid = build_quantile_dmatrices(
+        np.asarray(train_data), np.asarray(train_labels), valid_fraction, cache_key,
+        train_params['max_bin'])
+    return xgb.train(train_params, dtrain, num_boost_round=num_boost_round,
+                     evals=[(dvalid, 'valid')], early_stopping_rounds=early_stopping_rounds,
+                     verbose_eval=False)
+
+class NpzChunkIterator(xgb.DataIter):
+    """按块读取磁盘上的npz数据文件（每个文件包含data和labels数组），用于外存训练"""
+
+    def __init__(self, chunk_paths, cache_prefix):
+        self._chunk_paths = list(chunk_paths)
+        self._position = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._position == len(self._chunk_paths):
+            return False
+        with np.load(self._chunk_paths[self._position]) as chunk:
+            input_data(data=chunk['data'], label=chunk['labels'])
+        self._position += 1
+        return True
+
+    def reset(self):
+        self._position = 0
+
+def train_xgboost_external_memory(chunk_paths, cache_dir, params=None, num_boost_round=1000,
+                                  early_stopping_rounds=50, valid_chunks=1):
+    """
+    外存模式训练XGBoost模型，适用于超出内存的特征数据
+    数据块按时间顺序流式读取，内存中只需容纳单个数据块与直方图索引
+    :param chunk_paths: 按时间顺序排列的npz数据块路径
+    :param cache_dir: 外存缓存目录
+    :param params: 覆盖 FAST_TRAIN_PARAMS 的训练参数
+    :param num_boost_round: 最大提升轮数
+    :param early_stopping_rounds: 验证集指标连续多少轮未改善即停止
+    :param valid_chunks: 最后若干个数据块作为验证集
+    :return: 训练好的Booster
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    train_params = dict(FAST_TRAIN_PARAMS, **(params or {}))
+    train_iter = NpzChunkIterator(chunk_paths[:-valid_chunks], os.path.join(cache_dir, 'train'))
+    valid_iter = NpzChunkIterator(chunk_paths[-valid_chunks:], os.path.join(cache_dir, 'valid'))
+
+    if hasattr(xgb, 'ExtMemQuantileDMatrix'):
+        # xgboost>=3.0：外存数据直接按分位数分桶，验证集复用训练集切分点
+        dtrain = xgb.ExtMemQuantileDMatrix(train_iter, max_bin=train_params['max_bin'])
+        dvalid = xgb.ExtMemQuantileDMatrix(valid_iter, ref=dtrain, max_bin=train_params['max_bin'])
+    else:
+        dtrain = xgb.DMatrix(train_iter)
+        dvalid = xgb.DMatrix(valid_iter)
+
+    return xgb.train(train_params, dtrain, num_boost_round=num_boost_round,
+                     evals=[(dvalid, 'valid')], early_stopping_rounds=early_stopping_rounds,
+                     verbose_eval=False)
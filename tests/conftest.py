@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 将项目根目录加入模块搜索路径，以便测试导入 models/、utils/ 等目录中的代码
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
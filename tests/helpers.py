@@ -0,0 +1,70 @@
+import importlib.util
+import io
+import json
+import os
+from unittest import mock
+
+import numpy as np
+
+from utils.draws import draws_to_multilabel
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def random_draws(n_draws, seed=0):
+    """
+    随机生成开奖号码
+    :return: (前区号码 (期数, 5), 后区号码 (期数, 2))，每期号码升序
+    """
+    rng = np.random.default_rng(seed)
+    front = np.sort(rng.random((n_draws, 35)).argsort(axis=1)[:, :5] + 1, axis=1)
+    back = np.sort(rng.random((n_draws, 12)).argsort(axis=1)[:, :2] + 1, axis=1)
+    return front.astype(np.int16), back.astype(np.int16)
+
+def random_labels(n_draws, seed=0):
+    """随机开奖的47维多标签"""
+    return draws_to_multilabel(*random_draws(n_draws, seed))
+
+def write_history(path, front_zone, back_zone, start='2024-01-01', step_days=2):
+    """把开奖号码写成原始数据CSV"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('Date,Number1,Number2,Number3,Number4,Number5,Bonus1,Bonus2\n')
+        for i, (front, back) in enumerate(zip(front_zone, back_zone)):
+            date = np.datetime64(start) + i * step_days
+            f.write(f"{date},{','.join(map(str, front))},{','.join(map(str, back))}\n")
+
+def load_api_module(filename, **env):
+    """
+    以给定的环境变量加载 api/ 下的接口模块（文件名含连字符，无法直接import）
+    接口模块只在导入时读取环境变量，加载完成后恢复原环境
+    """
+    path = os.path.join(PROJECT_ROOT, 'api', filename)
+    name = 'api_' + os.path.splitext(filename)[0].replace('-', '_')
+    with mock.patch.dict(os.environ, {key: str(value) for key, value in env.items()}):
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+def call_handler(module, method, body=None, path='/', **attributes):
+    """
+    不经过HTTP服务器直接调用接口模块的 handler，返回 (状态码, 响应数据)
+    :param module: load_api_module 加载的接口模块
+    :param method: 'GET' 或 'POST'
+    :param body: POST请求体，字典会编码为JSON
+    :param attributes: handler.__init__ 中创建的属性（如分析引擎），绕过服务器时需直接提供
+    """
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body).encode('utf-8')
+    body = body or b''
+    handler = module.handler.__new__(module.handler)
+    handler.path = path
+    handler.headers = {'Content-Length': str(len(body))}
+    handler.rfile = io.BytesIO(body)
+    responses = []
+    handler._send_json_response = lambda status, data: responses.append((status, data))
+    handler._send_error_response = lambda status, message: responses.append((status, {'error': message}))
+    for name, value in attributes.items():
+        setattr(handler, name, value)
+    getattr(handler, f'do_{method}')()
+    assert len(responses) == 1, responses
+    return responses[0]
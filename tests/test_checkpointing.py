@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from helpers import random_labels
+from models.checkpointing import _run_fingerprint, checkpoint_progress, fit_with_checkpoints
+from models.lstm_model import build_lstm_model
+from utils.draws import NUM_LABELS
+
+def small_lstm(lstm_units=(4, 4)):
+    return build_lstm_model((None, 3), NUM_LABELS, lstm_units=lstm_units, dense_units=4)
+
+class TestCheckpointing(unittest.TestCase):
+    def setUp(self):
+        self.data = np.random.default_rng(0).random((40, 5, 3)).astype(np.float32)
+        self.labels = random_labels(40).astype(np.float32)
+
+    def fingerprint(self, model, batch_size=8, seed=42):
+        return _run_fingerprint(model, self.data, self.labels, batch_size, seed)
+
+    def test_fingerprint_ignores_generated_layer_names(self):
+        self.assertEqual(self.fingerprint(small_lstm()), self.fingerprint(small_lstm()))
+
+    def test_fingerprint_covers_architecture_and_hyperparameters(self):
+        base = self.fingerprint(small_lstm())
+        self.assertNotEqual(self.fingerprint(small_lstm(lstm_units=(8, 4))), base)
+
+        model = small_lstm()
+        model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=0.01), loss='binary_crossentropy')
+        self.assertNotEqual(self.fingerprint(model), base)
+        self.assertNotEqual(self.fingerprint(small_lstm(), batch_size=16), base)
+
+    def test_resume_only_with_same_model(self):
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            fit_with_checkpoints(small_lstm(), self.data, self.labels, checkpoint_dir, epochs=1, batch_size=8)
+            self.assertEqual(checkpoint_progress(checkpoint_dir), (1, 0))
+
+            # 同一结构增加轮数时在原检查点上继续
+            fit_with_checkpoints(small_lstm(), self.data, self.labels, checkpoint_dir, epochs=2, batch_size=8)
+            self.assertEqual(checkpoint_progress(checkpoint_dir), (2, 0))
+
+            # 结构变化时清空检查点重新开始，而不是恢复出形状不匹配的权重
+            fit_with_checkpoints(small_lstm(lstm_units=(8, 4)), self.data, self.labels, checkpoint_dir,
+                                 epochs=1, batch_size=8)
+            self.assertEqual(checkpoint_progress(checkpoint_dir), (1, 0))
+            self.assertTrue(os.path.exists(os.path.join(checkpoint_dir, 'run.json')))
+
+if __name__ == '__main__':
+    unittest.main()
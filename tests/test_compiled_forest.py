@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import xgboost as xgb
+
+from helpers import random_labels
+from models.compiled_forest import CompiledForest, export_rf_model, export_xgboost_model
+from models.rf_model import predict_multilabel_proba, train_rf_model, train_rf_multilabel_model
+from models.xgboost_model import train_xgboost_model, train_xgboost_multilabel_model
+
+class TestCompiledForest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.data = rng.random((120, 6)).astype(np.float32)
+        self.labels = (self.data[:, 0] + self.data[:, 1] > 1).astype(int)
+        self.multilabels = random_labels(120)
+        self.test_data = rng.random((30, 6)).astype(np.float32)
+
+    def test_rf_matches_sklearn(self):
+        model = train_rf_model(self.data, self.labels, n_jobs=1, n_estimators=10)
+        np.testing.assert_allclose(export_rf_model(model).predict_proba(self.test_data),
+                                   model.predict_proba(self.test_data))
+
+    def test_rf_multilabel_matches_sklearn(self):
+        model = train_rf_multilabel_model(self.data, self.multilabels, n_jobs=1, n_estimators=5, max_depth=4)
+        np.testing.assert_allclose(export_rf_model(model).predict_proba(self.test_data),
+                                   predict_multilabel_proba(model, self.test_data))
+
+    def test_xgboost_matches_booster(self):
+        model = train_xgboost_model(self.data, self.labels, n_estimators=20, max_depth=3, n_jobs=1)
+        data = self.test_data.copy()
+        data[::5, 2] = np.nan
+        np.testing.assert_allclose(export_xgboost_model(model).predict_proba(data),
+                                   model.predict_proba(data), rtol=1e-5, atol=1e-6)
+
+    def test_xgboost_multilabel_matches_booster(self):
+        model = train_xgboost_multilabel_model(self.data, self.multilabels, n_jobs=1, n_estimators=5, max_depth=3)
+        np.testing.assert_allclose(export_xgboost_model(model).predict_proba(self.test_data),
+                                   model.predict_proba(self.test_data), rtol=1e-5, atol=1e-6)
+
+    def test_xgboost_early_stopping_uses_best_iteration(self):
+        dtrain = xgb.DMatrix(self.data[:90], label=self.labels[:90])
+        dvalid = xgb.DMatrix(self.data[90:], label=self.labels[90:])
+        booster = xgb.train({'objective': 'binary:logistic', 'max_depth': 6, 'eta': 0.5, 'nthread': 1}, dtrain,
+                            num_boost_round=200, evals=[(dvalid, 'valid')], early_stopping_rounds=3,
+                            verbose_eval=False)
+        compiled = export_xgboost_model(booster)
+        self.assertEqual(len(compiled.roots), booster.best_iteration + 1)
+        expected = booster.predict(xgb.DMatrix(self.test_data), iteration_range=(0, booster.best_iteration + 1))
+        np.testing.assert_allclose(compiled.predict_proba(self.test_data)[:, 1], expected, rtol=1e-5, atol=1e-6)
+
+    def test_save_and_load(self):
+        compiled = export_xgboost_model(train_xgboost_model(self.data, self.labels, n_estimators=5, n_jobs=1))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'xgboost.npz')
+            compiled.save(path)
+            loaded = CompiledForest.load(path)
+        np.testing.assert_array_equal(loaded.predict_proba(self.test_data), compiled.predict_proba(self.test_data))
+
+if __name__ == '__main__':
+    unittest.main()
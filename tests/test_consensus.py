@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from utils import consensus
+from utils.consensus import PARALLEL_THRESHOLD, _sample_model, monte_carlo_consensus
+
+FIXED_SPEC = {'kind': 'fixed', 'front_zone': [1, 5, 9, 20, 33], 'back_zone': [2, 12], 'confidence_range': (0.8, 0.8)}
+
+def heuristic_specs():
+    return {
+        'lstm': {'kind': 'weighted', 'front_weights': [5.0] * 5 + [1.0] * 30, 'back_weights': [1.0] * 12,
+                 'confidence_range': (0.65, 0.85), 'confidence_cap': 0.8},
+        'transformer': {'kind': 'pair_attention', 'pairs': [(7, 8), (12, 13)], 'confidence_range': (0.7, 0.9)},
+        'xgboost': {'kind': 'odd_even', 'confidence_range': (0.68, 0.82)}
+    }
+
+class TestMonteCarloConsensus(unittest.TestCase):
+    def test_frequencies_count_every_pick(self):
+        result = monte_carlo_consensus(heuristic_specs(), {'lstm': 0.4, 'transformer': 0.35, 'xgboost': 0.25},
+                                       n_seeds=2000, seed=0)
+        self.assertAlmostEqual(sum(f['frequency'] for f in result['front_frequencies']), 5, places=2)
+        self.assertAlmostEqual(sum(f['frequency'] for f in result['back_frequencies']), 2, places=2)
+        self.assertEqual(result['n_seeds'], 2000)
+        self.assertEqual(len(result['front_zone']), 5)
+        self.assertEqual(len(result['back_zone']), 2)
+        for entry in result['front_frequencies']:
+            low, high = entry['interval']
+            self.assertLessEqual(low, high)
+        low, high = result['confidence_interval']
+        self.assertTrue(0.65 <= low <= high <= 0.9)
+
+    def test_same_seed_same_result(self):
+        weights = {'lstm': 0.4, 'transformer': 0.35, 'xgboost': 0.25}
+        first = monte_carlo_consensus(heuristic_specs(), weights, n_seeds=500, seed=7)
+        self.assertEqual(monte_carlo_consensus(heuristic_specs(), weights, n_seeds=500, seed=7), first)
+
+    def test_dominant_fixed_model_wins(self):
+        specs = dict(heuristic_specs(), fixed=FIXED_SPEC)
+        weights = {'lstm': 0.1, 'transformer': 0.1, 'xgboost': 0.1, 'fixed': 0.7}
+        result = monte_carlo_consensus(specs, weights, n_seeds=300, seed=1, spiritual_boost=0.5)
+        self.assertEqual(result['front_zone'], FIXED_SPEC['front_zone'])
+        self.assertEqual(result['back_zone'], FIXED_SPEC['back_zone'])
+        self.assertEqual(result['front_frequencies'][0]['frequency'], 1.0)
+        self.assertEqual(result['confidence'], 0.95)
+
+    def test_single_worker_stays_in_process(self):
+        with mock.patch.object(consensus, 'ProcessPoolExecutor', side_effect=AssertionError('进程池')):
+            result = monte_carlo_consensus({'fixed': FIXED_SPEC}, {'fixed': 1.0}, n_seeds=PARALLEL_THRESHOLD,
+                                           seed=0, max_workers=1)
+        self.assertEqual(result['front_zone'], FIXED_SPEC['front_zone'])
+        self.assertEqual(result['n_seeds'], PARALLEL_THRESHOLD)
+
+class TestSampleModel(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_each_ticket_has_five_and_two(self):
+        for spec in heuristic_specs().values():
+            front, back, confidence = _sample_model(spec, 1000, self.rng)
+            np.testing.assert_array_equal(front.sum(axis=1), 5)
+            np.testing.assert_array_equal(back.sum(axis=1), 2)
+            self.assertEqual(confidence.shape, (1000,))
+
+    def test_odd_even_split(self):
+        front, _, _ = _sample_model(heuristic_specs()['xgboost'], 1000, self.rng)
+        odd = front[:, 0::2].sum(axis=1)
+        self.assertTrue(np.isin(odd, [2, 3]).all())
+        self.assertTrue(0.4 < (odd == 3).mean() < 0.6)
+
+    def test_weighted_prefers_heavy_numbers(self):
+        front, _, confidence = _sample_model(heuristic_specs()['lstm'], 4000, self.rng)
+        frequency = front.mean(axis=0)
+        self.assertGreater(frequency[:5].min(), frequency[5:].max())
+        self.assertLessEqual(confidence.max(), 0.8)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            _sample_model({'kind': 'unknown', 'confidence_range': (0, 1)}, 10, self.rng)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from helpers import call_handler, load_api_module, random_draws, write_history
+from utils.draw_index import DrawIndex
+
+class TestDrawIndexSync(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.history = os.path.join(self.tmpdir.name, 'history.csv')
+        self.front_zone, self.back_zone = random_draws(80)
+        self.write(50)
+        self.api = load_api_module('data-analysis.py', DRAW_HISTORY_FILE=self.history,
+                                   FEATURE_STORE_DIR=os.path.join(self.tmpdir.name, 'store'),
+                                   HOT_COLD_SHM_NAME='')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, n_draws):
+        write_history(self.history, self.front_zone[:n_draws], self.back_zone[:n_draws])
+        # 保证修改时间变化，不依赖文件系统的时间精度
+        stat = os.stat(self.history)
+        os.utime(self.history, ns=(stat.st_atime_ns, stat.st_mtime_ns + n_draws * 10 ** 9))
+
+    def assert_index_matches(self, index, n_draws):
+        expected = DrawIndex(self.front_zone[:n_draws], self.back_zone[:n_draws])
+        self.assertEqual(index.n_periods, n_draws)
+        np.testing.assert_array_equal(index.front_bitmaps[:, :expected.front_bitmaps.shape[1]],
+                                      expected.front_bitmaps)
+        np.testing.assert_array_equal(index.back_bitmaps[:, :expected.back_bitmaps.shape[1]],
+                                      expected.back_bitmaps)
+
+    def test_new_draws_extend_index(self):
+        index = self.api.get_draw_index()
+        self.assert_index_matches(index, 50)
+        self.assertEqual(self.api.get_itemset_miner().counted_periods, 50)
+
+        self.write(80)
+        self.assertIs(self.api.get_draw_index(), index)
+        self.assert_index_matches(index, 80)
+        self.assertEqual(self.api.get_itemset_miner().counted_periods, 80)
+        self.assertEqual(self.api.get_hot_cold_scorer().n_periods, 80)
+
+    def test_shorter_history_rebuilds_index(self):
+        self.api.get_itemset_miner()
+        self.write(30)
+        self.assert_index_matches(self.api.get_draw_index(), 30)
+        self.assertEqual(self.api.get_itemset_miner().counted_periods, 30)
+
+    def test_non_finite_query_numbers_rejected(self):
+        engine = self.api.DataAnalysisEngine()
+        for query in ({'type': 'subset', 'front': [float('inf')]}, {'type': 'count', 'limit': float('nan')}):
+            status, data = call_handler(self.api, 'POST', query, analysis_engine=engine)
+            self.assertEqual(status, 400, query)
+            self.assertIn('error', data)
+
+    def test_rewritten_history_rebuilds_statistics(self):
+        self.assertEqual(self.api.get_draw_statistics().n_periods, 50)
+        # 期数不变但号码被改写
+        self.front_zone, self.back_zone = random_draws(50, seed=1)
+        self.write(50)
+        stats = self.api.get_draw_statistics()
+        self.assertEqual(stats.n_periods, 50)
+        np.testing.assert_array_equal(stats.counts['front'], np.bincount(self.front_zone.ravel() - 1, minlength=35))
+        np.testing.assert_array_equal(stats.counts['back'], np.bincount(self.back_zone.ravel() - 1, minlength=12))
+        self.assertIs(self.api.get_draw_statistics(), stats)
+
+    def test_rewritten_history_rebuilds_seasonal_cube(self):
+        self.assertEqual(self.api.get_seasonal_cube().n_periods, 50)
+        self.front_zone, self.back_zone = random_draws(50, seed=1)
+        self.write(50)
+        cube = self.api.get_seasonal_cube()
+        self.assertEqual(cube.n_periods, 50)
+        np.testing.assert_array_equal(cube.counts.sum(axis=(1, 2, 3))[:35],
+                                      np.bincount(self.front_zone.ravel() - 1, minlength=35))
+        self.assertIs(self.api.get_seasonal_cube(), cube)
+
+if __name__ == '__main__':
+    unittest.main()
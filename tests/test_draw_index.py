@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from helpers import random_draws, write_history
+from utils.draw_index import DrawIndex
+
+def consecutive_run(front, length):
+    """前区是否含有至少 length 个连续号码"""
+    run = best = 1
+    for previous, current in zip(front[:-1], front[1:]):
+        run = run + 1 if current == previous + 1 else 1
+        best = max(best, run)
+    return best >= length
+
+class TestDrawIndex(unittest.TestCase):
+    def setUp(self):
+        self.front, self.back = random_draws(300, seed=0)
+        # 分三次追加，覆盖位图按容量增长后未满的字
+        self.index = DrawIndex(self.front[:65], self.back[:65])
+        self.index.extend(self.front[65:130], self.back[65:130])
+        self.index.extend(self.front[130:], self.back[130:])
+
+    def expected_periods(self, front_numbers=(), back_numbers=()):
+        return [i for i, (front, back) in enumerate(zip(self.front, self.back))
+                if set(front_numbers) <= set(front) and set(back_numbers) <= set(back)]
+
+    def test_subset_matches_brute_force(self):
+        for front_numbers, back_numbers in (((3,), ()), ((3, 17), ()), ((), (5,)), ((8,), (1, 12))):
+            bitmap = self.index.subset_bitmap(front_numbers, back_numbers)
+            expected = self.expected_periods(front_numbers, back_numbers)
+            self.assertEqual(self.index.count(bitmap), len(expected))
+            self.assertEqual(list(self.index.periods(bitmap, latest_first=False)), expected)
+            self.assertEqual(list(self.index.periods(bitmap, limit=3)), expected[::-1][:3])
+            self.assertEqual(self.index.last_period(bitmap), expected[-1] if expected else None)
+
+    def test_empty_query_covers_all_periods(self):
+        bitmap = self.index.subset_bitmap()
+        self.assertEqual(self.index.count(bitmap), 300)
+        self.assertEqual(self.index.last_period(bitmap), 299)
+
+    def test_consecutive_matches_brute_force(self):
+        for length in (2, 3):
+            expected = [i for i, front in enumerate(self.front) if consecutive_run(front, length)]
+            bitmap = self.index.consecutive_bitmap(length)
+            self.assertEqual(list(self.index.periods(bitmap, latest_first=False)), expected)
+
+    def test_incremental_matches_batch(self):
+        batch = DrawIndex(self.front, self.back)
+        words = batch.front_bitmaps.shape[1]
+        np.testing.assert_array_equal(self.index.front_bitmaps[:, :words], batch.front_bitmaps)
+        np.testing.assert_array_equal(self.index.back_bitmaps[:, :words], batch.back_bitmaps)
+        self.assertFalse(self.index.front_bitmaps[:, words:].any())
+
+    def test_from_history_dates(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'history.csv')
+            write_history(path, self.front[:10], self.back[:10], start='2024-01-01', step_days=3)
+            index = DrawIndex.from_history(path)
+        self.assertEqual(index.n_periods, 10)
+        self.assertEqual(index.describe([0, 9]), [{'period': 0, 'date': '2024-01-01'},
+                                                   {'period': 9, 'date': '2024-01-28'}])
+        self.assertEqual(self.index.describe([0]), [{'period': 0, 'date': None}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import math
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from helpers import random_draws, random_labels
+from utils.draws import (build_feature_windows, draws_to_multilabel, load_draw_history, multilabel_log_loss,
+                         split_multilabel, window_tree_features)
+
+class TestLoadDrawHistory(unittest.TestCase):
+    def test_skips_invalid_rows_and_sorts(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'history.csv')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('# 注释行\n'
+                        'Date,Number1,Number2,Number3,Number4,Number5,Bonus1,Bonus2\n'
+                        '2024-01-03,35,1,17,9,22,12,3\n'
+                        '2024-01-01,1,2,3,4,5,1,2\n'
+                        '\n'
+                        '2024-01-05,1,1,3,4,5,1,2\n'
+                        '2024-01-06,1,2,3,4,36,1,2\n'
+                        '2024-01-07,1,2,3,4,5,0,2\n'
+                        'not-a-date,1,2,3,4,5,1,2\n'
+                        '2024-01-08,1,2,x,4,5,1,2\n')
+            dates, front, back = load_draw_history(path)
+        np.testing.assert_array_equal(dates, np.array(['2024-01-01', '2024-01-03'], dtype='datetime64[D]'))
+        np.testing.assert_array_equal(front, [[1, 2, 3, 4, 5], [1, 9, 17, 22, 35]])
+        np.testing.assert_array_equal(back, [[1, 2], [3, 12]])
+
+class TestEncoding(unittest.TestCase):
+    def test_multilabel_round_trip(self):
+        front, back = random_draws(20)
+        labels = draws_to_multilabel(front, back)
+        front_scores, back_scores = split_multilabel(labels)
+        np.testing.assert_array_equal(np.argwhere(front_scores)[:, 1].reshape(20, 5) + 1, front)
+        np.testing.assert_array_equal(np.argwhere(back_scores)[:, 1].reshape(20, 2) + 1, back)
+
+    def test_feature_windows(self):
+        labels = random_labels(10)
+        steps = np.arange(30, dtype=np.float32).reshape(10, 3)
+        sequences, targets = build_feature_windows(steps, labels, window=4)
+        self.assertEqual(sequences.shape, (6, 4, 3))
+        np.testing.assert_array_equal(sequences[2], steps[2:6])
+        np.testing.assert_array_equal(targets, labels[4:])
+        tree = window_tree_features(sequences)
+        np.testing.assert_array_equal(tree[2], np.concatenate([steps[2:6].mean(axis=0), steps[5]]))
+        empty, empty_labels = build_feature_windows(steps[:4], labels[:4], window=4)
+        self.assertEqual((empty.shape, empty_labels.shape), ((0, 4, 3), (0, 47)))
+
+    def test_log_loss(self):
+        labels = random_labels(5)
+        self.assertAlmostEqual(multilabel_log_loss(np.full(labels.shape, 0.5), labels), math.log(2))
+        self.assertLess(multilabel_log_loss(labels, labels), 1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from helpers import random_draws, write_history
+from utils.feature_store import (MANIFEST_FILE, STORE_COLUMNS, FeatureStore, build_columns,
+                                 open_feature_store)
+from utils.features import FEATURE_COLUMNS, draw_features
+
+def draw_dates(n_draws):
+    return np.datetime64('2024-01-01') + np.arange(n_draws) * 2
+
+class TestFeatureStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmpdir.name, 'store')
+        self.front, self.back = random_draws(120, seed=0)
+        self.dates = draw_dates(120)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def assert_matches_history(self, store, n_draws):
+        expected = build_columns(self.front[:n_draws], self.back[:n_draws], self.dates[:n_draws])
+        columns = store.read(STORE_COLUMNS)
+        for name in STORE_COLUMNS:
+            np.testing.assert_array_equal(columns[name], expected[name], err_msg=name)
+
+    def test_sync_appends_new_periods_only(self):
+        for compress in (False, True):
+            store = FeatureStore(os.path.join(self.root, str(compress)), compress=compress)
+            self.assertEqual(store.sync(self.dates[:80], self.front[:80], self.back[:80]), 80)
+            self.assertEqual(store.sync(self.dates, self.front, self.back), 40)
+            self.assertEqual(store.sync(self.dates, self.front, self.back), 0)
+            self.assertEqual(len(store.manifest['segments']), 2)
+            self.assert_matches_history(store, 120)
+            # 重新打开时从清单恢复
+            self.assert_matches_history(FeatureStore(os.path.join(self.root, str(compress))), 120)
+
+    def test_read_ranges_across_segments(self):
+        store = FeatureStore(self.root)
+        store.sync(self.dates[:50], self.front[:50], self.back[:50])
+        store.sync(self.dates, self.front, self.back)
+        front = store.read(['front_zone'], 30, 90)['front_zone']
+        np.testing.assert_array_equal(front, self.front[30:90])
+        single = store.read(['span'], 60, 70)['span']
+        self.assertIsInstance(single, np.memmap)
+        self.assertEqual(len(store.read(['labels'], 200)['labels']), 0)
+        with self.assertRaises(KeyError):
+            store.read(['unknown'])
+
+    def test_feature_matrix(self):
+        store = FeatureStore(self.root)
+        store.sync(self.dates, self.front, self.back)
+        np.testing.assert_allclose(store.feature_matrix(normalize=True),
+                                   draw_features(self.front, self.back, normalize=True))
+        np.testing.assert_array_equal(store.feature_matrix(['span', 'odd_count'], stop=10),
+                                      draw_features(self.front[:10], self.back[:10])[
+                                          :, [FEATURE_COLUMNS.index('span'), FEATURE_COLUMNS.index('odd_count')]])
+
+    def test_rebuild_on_changed_history(self):
+        store = FeatureStore(self.root)
+        store.sync(self.dates[:100], self.front[:100], self.back[:100])
+        front = self.front.copy()
+        front[99] = [1, 2, 3, 4, 5]
+        self.assertEqual(store.sync(self.dates, front, self.back), 120)
+        self.front = front
+        self.assert_matches_history(store, 120)
+        # 历史变短时同样重建
+        self.assertEqual(store.sync(self.dates[:60], self.front[:60], self.back[:60]), 60)
+        self.assert_matches_history(store, 60)
+
+    def test_version_change_discards_data(self):
+        store = FeatureStore(self.root)
+        store.sync(self.dates, self.front, self.back)
+        manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest['version'] = 'outdated'
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        self.assertEqual(FeatureStore(self.root).n_periods, 0)
+
+    def test_compact(self):
+        store = FeatureStore(self.root)
+        for stop in (40, 80, 120):
+            store.sync(self.dates[:stop], self.front[:stop], self.back[:stop])
+        store.compact()
+        self.assertEqual(len(store.manifest['segments']), 1)
+        self.assertEqual(len(os.listdir(os.path.join(self.root, store.version))), 1)
+        self.assert_matches_history(store, 120)
+
+    def test_open_feature_store(self):
+        history = os.path.join(self.tmpdir.name, 'history.csv')
+        write_history(history, self.front, self.back, start='2024-01-01', step_days=2)
+        store = open_feature_store(self.root, history)
+        self.assert_matches_history(store, 120)
+        self.assertIsNone(open_feature_store(self.root, os.path.join(self.tmpdir.name, 'missing.csv')))
+
+if __name__ == '__main__':
+    unittest.main()
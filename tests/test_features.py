@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from helpers import random_draws
+from utils.features import FEATURE_COLUMNS, FEATURE_SCALES, draw_features, feature_column
+
+class TestDrawFeatures(unittest.TestCase):
+    def test_known_ticket(self):
+        features = dict(zip(FEATURE_COLUMNS, draw_features([1, 2, 3, 20, 35], [6, 11])))
+        self.assertEqual(features['odd_count'], 3)
+        self.assertEqual(features['even_count'], 2)
+        self.assertEqual(features['large_count'], 2)
+        self.assertEqual(features['small_count'], 3)
+        self.assertEqual(features['front_sum'], 61)
+        self.assertEqual(features['back_sum'], 17)
+        self.assertEqual(features['sum_value'], 78)
+        self.assertEqual(features['span'], 34)
+        self.assertEqual(features['consecutive_pairs'], 2)
+        self.assertAlmostEqual(features['evenness'], 1 / (1 + np.var([1, 1, 17, 15])), places=6)
+        self.assertEqual(features['back_odd_count'], 1)
+        self.assertEqual(features['back_large_count'], 1)
+        self.assertEqual(features['back_span'], 5)
+
+    def test_unsorted_input_and_batch(self):
+        front, back = random_draws(50, seed=2)
+        batch = draw_features(front, back)
+        self.assertEqual(batch.shape, (50, len(FEATURE_COLUMNS)))
+        self.assertEqual(batch.dtype, np.float32)
+        np.testing.assert_array_equal(draw_features(front[7][::-1], back[7][::-1]), batch[7])
+
+    def test_normalized_range(self):
+        extremes = np.array([[1, 2, 3, 4, 5], [31, 32, 33, 34, 35]]), np.array([[1, 2], [11, 12]])
+        for features in (draw_features(*random_draws(200, seed=3), normalize=True),
+                         draw_features(*extremes, normalize=True)):
+            self.assertTrue(((features >= 0) & (features <= 1)).all())
+        np.testing.assert_allclose(draw_features(*extremes)[1] / FEATURE_SCALES,
+                                   draw_features(*extremes, normalize=True)[1])
+
+class TestFeatureColumn(unittest.TestCase):
+    def test_matrix_and_single_ticket(self):
+        front, back = random_draws(20, seed=0)
+        features = draw_features(front, back)
+        np.testing.assert_array_equal(feature_column(features, 'front_sum'), front.sum(axis=1))
+        single = draw_features(front[0], back[0])
+        self.assertEqual(feature_column(single, 'span'), front[0, -1] - front[0, 0])
+
+    def test_columns_in_order(self):
+        features = draw_features(*random_draws(5, seed=1))
+        stacked = np.stack([feature_column(features, name) for name in FEATURE_COLUMNS], axis=1)
+        np.testing.assert_array_equal(stacked, features)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import unittest
+
+import numpy as np
+
+from helpers import random_draws
+from utils.draws import draws_to_multilabel
+from utils.hot_cold import HALF_LIVES, HotColdScorer
+
+def decayed_scores(front_zone, back_zone, half_lives=HALF_LIVES):
+    """逐期按定义计算的衰减得分"""
+    labels = draws_to_multilabel(front_zone, back_zone).astype(np.float64)
+    ages = np.arange(len(labels) - 1, -1, -1)
+    return np.stack([(0.5 ** (ages / h)) @ labels for h in half_lives])
+
+class TestHotColdScorer(unittest.TestCase):
+    def setUp(self):
+        self.front, self.back = random_draws(300, seed=0)
+
+    def test_update_and_extend_match_definition(self):
+        extended = HotColdScorer()
+        extended.extend(self.front, self.back)
+        updated = HotColdScorer()
+        for front, back in zip(self.front, self.back):
+            updated.update(front, back)
+        expected = decayed_scores(self.front, self.back)
+        for scorer in (extended, updated):
+            n_periods, scores = scorer.snapshot()
+            self.assertEqual(n_periods, 300)
+            np.testing.assert_allclose(scores, expected)
+
+    def test_rates_are_weighted_frequencies(self):
+        scorer = HotColdScorer()
+        scorer.extend(self.front, self.back)
+        rates = scorer.rates()
+        # 每期开出5个前区、2个后区号码，加权频率之和恒为5与2
+        np.testing.assert_allclose(rates[:, :35].sum(axis=1), 5)
+        np.testing.assert_allclose(rates[:, 35:].sum(axis=1), 2)
+        np.testing.assert_array_equal(HotColdScorer().rates(), 0)
+
+    def test_rankings(self):
+        scorer = HotColdScorer()
+        scorer.extend(self.front, self.back)
+        # 最近20期都开出前区1-5与后区11、12
+        scorer.extend(np.tile([1, 2, 3, 4, 5], (20, 1)), np.tile([11, 12], (20, 1)))
+        rankings = scorer.rankings(half_life=10, hot_count=5, cold_count=3)
+        self.assertEqual(sorted(rankings['hot_front']), [1, 2, 3, 4, 5])
+        self.assertEqual(sorted(rankings['hot_back'][:2]), [11, 12])
+        rates = scorer.rates()[HALF_LIVES.index(10)]
+        cold = rankings['cold_front']
+        self.assertEqual(len(cold), 3)
+        self.assertTrue(all(rates[n - 1] <= rates[m - 1] for n in cold for m in range(6, 36) if m not in cold))
+
+    def test_ties_rank_smaller_numbers_first(self):
+        scorer = HotColdScorer()
+        scorer.update([20, 9, 31, 2, 14], [7, 3])
+        rankings = scorer.rankings(hot_count=7, cold_count=3, back_hot_count=3, back_cold_count=2)
+        self.assertEqual(rankings['hot_front'], [2, 9, 14, 20, 31, 1, 3])
+        self.assertEqual(rankings['cold_front'], [1, 3, 4])
+        self.assertEqual(rankings['hot_back'], [3, 7, 1])
+        self.assertEqual(rankings['cold_back'], [1, 2])
+
+    def test_sync(self):
+        scorer = HotColdScorer()
+        self.assertEqual(scorer.sync(self.front[:200], self.back[:200]), 200)
+        self.assertEqual(scorer.sync(self.front, self.back), 100)
+        self.assertEqual(scorer.sync(self.front, self.back), 0)
+        np.testing.assert_allclose(scorer.snapshot()[1], decayed_scores(self.front, self.back))
+        # 历史变短时从头重建
+        self.assertEqual(scorer.sync(self.front[:50], self.back[:50]), 50)
+        np.testing.assert_allclose(scorer.snapshot()[1], decayed_scores(self.front[:50], self.back[:50]))
+
+    def test_sync_rebuilds_rewritten_history(self):
+        scorer = HotColdScorer()
+        for front, back in zip(self.front[:100], self.back[:100]):
+            scorer.update(front, back)
+        self.assertEqual(scorer.sync(self.front[:100], self.back[:100]), 0)
+        # 期数不变但号码被改写
+        front, back = random_draws(100, seed=1)
+        self.assertEqual(scorer.sync(front, back), 100)
+        np.testing.assert_allclose(scorer.snapshot()[1], decayed_scores(front, back))
+        # 改写的历史之后追加新的期只计入新增部分
+        more_front, more_back = random_draws(20, seed=2)
+        front, back = np.concatenate([front, more_front]), np.concatenate([back, more_back])
+        self.assertEqual(scorer.sync(front, back), 20)
+        np.testing.assert_allclose(scorer.snapshot()[1], decayed_scores(front, back))
+
+    def test_shared_memory_between_scorers(self):
+        name = f'test_hot_cold_{os.getpid()}'
+        writer = HotColdScorer(shm_name=name)
+        try:
+            writer.sync(self.front, self.back)
+            reader = HotColdScorer(shm_name=name)
+            n_periods, scores = reader.snapshot()
+            self.assertEqual(n_periods, 300)
+            np.testing.assert_allclose(scores, writer.snapshot()[1])
+            self.assertEqual(reader.sync(self.front, self.back), 0)
+            reader.close()
+            with self.assertRaises(OSError):
+                HotColdScorer(half_lives=(5, 10, 20, 40), shm_name=name)
+        finally:
+            writer.unlink()
+        self.assertEqual(HotColdScorer(shm_name=name).n_periods, 0)
+        HotColdScorer(shm_name=name).unlink()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from helpers import random_draws
+from utils.draw_index import DrawIndex
+from utils.draws import FRONT_NUMBERS
+from utils.itemsets import FrequentItemsetMiner, _expected_support
+
+def brute_force_supports(front_zone, back_zone, size):
+    """逐期枚举号码组合得到的各项集出现次数"""
+    counts = {}
+    for front, back in zip(front_zone, back_zone):
+        items = sorted([int(n) - 1 for n in front] + [int(n) - 1 + FRONT_NUMBERS for n in back])
+        for itemset in itertools.combinations(items, size):
+            counts[itemset] = counts.get(itemset, 0) + 1
+    return counts
+
+class TestFrequentItemsetMiner(unittest.TestCase):
+    def test_supports_match_brute_force(self):
+        front, back = random_draws(300, seed=0)
+        miner = FrequentItemsetMiner(min_support=0.02, max_workers=1).fit(DrawIndex(front, back))
+        threshold = np.ceil(0.02 * 300)
+        for size in (1, 2, 3):
+            expected = {k: v for k, v in brute_force_supports(front, back, size).items() if v >= threshold}
+            mined = {k: v for k, v in miner.frequent.items() if len(k) == size}
+            self.assertEqual(mined, expected)
+
+    def test_incremental_update_matches_refit(self):
+        front, back = random_draws(400, seed=1)
+        index = DrawIndex(front[:250], back[:250])
+        miner = FrequentItemsetMiner(min_support=0.02, max_workers=1).fit(index)
+        index.extend(front[250:], back[250:])
+        miner.update(index)
+        refit = FrequentItemsetMiner(min_support=0.02, max_workers=1).fit(DrawIndex(front, back))
+        self.assertEqual(miner.frequent, refit.frequent)
+        self.assertEqual(miner.itemsets(), refit.itemsets())
+
+    def test_default_support_above_random_pairs(self):
+        # 随机开奖下的二元组不应在默认阈值下大量被判为频繁，也不应被判为显著
+        front, back = random_draws(2000, seed=2)
+        miner = FrequentItemsetMiner(max_workers=1).fit(DrawIndex(front, back))
+        for front_count, back_count in ((2, 0), (1, 1), (0, 2)):
+            self.assertGreater(miner.min_support, _expected_support(front_count, back_count))
+        pairs = miner.itemsets(2)
+        self.assertLess(len(pairs), 20)
+        self.assertFalse(any(s['significant'] for s in miner.itemsets()))
+
+    def test_planted_pair_is_significant(self):
+        front, back = random_draws(1000, seed=3)
+        # 每4期把前区3、7同时放入开奖号码
+        for row in front[::4]:
+            others = [n for n in row if n not in (3, 7)][:3]
+            row[:] = sorted(others + [3, 7])
+        miner = FrequentItemsetMiner(max_workers=1).fit(DrawIndex(front, back))
+        planted = [s for s in miner.itemsets(2) if s['front'] == [3, 7]]
+        self.assertEqual(len(planted), 1)
+        self.assertTrue(planted[0]['significant'])
+        self.assertGreater(planted[0]['lift'], 10)
+        self.assertGreater(planted[0]['z_score'], 20)
+
+if __name__ == '__main__':
+    unittest.main()
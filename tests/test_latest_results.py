@@ -0,0 +1,64 @@
+import unittest
+
+from helpers import call_handler, load_api_module
+
+VALID_TICKET = {'front_zone': [1, 7, 12, 23, 35], 'back_zone': [3, 12]}
+
+class TestTicketSimulation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.api = load_api_module('latest-results.py')
+
+    def post(self, body):
+        return call_handler(self.api, 'POST', body)
+
+    def test_valid_tickets(self):
+        status, data = self.post({'tickets': [VALID_TICKET], 'n_draws': 2000})
+        self.assertEqual(status, 200)
+        self.assertEqual(data['simulation']['n_draws'], 2000)
+
+    def test_invalid_tickets_rejected(self):
+        invalid = [
+            {'front_zone': [0, 7, 12, 23, 35], 'back_zone': [3, 12]},
+            {'front_zone': [1, 7, 12, 23, 36], 'back_zone': [3, 12]},
+            {'front_zone': [1, 7, 12, 23, 35], 'back_zone': [3, 13]},
+            {'front_zone': [1, 7, 7, 23, 35], 'back_zone': [3, 12]},
+            {'front_zone': [1, 7, 12, 23], 'back_zone': [3, 12]},
+            {'front_zone': [1, 7, 12, 23, 35], 'back_zone': [3, 3]},
+            {'front_zone': [1, 7, 12, 23, 35.5], 'back_zone': [3, 12]},
+            {'front_zone': [1, 7, 12, 23, float('inf')], 'back_zone': [3, 12]},
+            {'front_zone': [1, 7, 12, 23, 35], 'back_zone': [3, float('nan')]},
+            {'front_zone': '1 7 12 23 35', 'back_zone': [3, 12]},
+            {'front_zone': [1, 7, 12, 23, 35]},
+            [1, 7, 12, 23, 35]
+        ]
+        for ticket in invalid:
+            status, data = self.post({'tickets': [ticket]})
+            self.assertEqual(status, 400, ticket)
+            self.assertIn('error', data)
+
+    def test_ticket_count_and_parameters_capped(self):
+        status, _ = self.post({'tickets': [VALID_TICKET] * (self.api.MAX_SIMULATED_TICKETS + 1)})
+        self.assertEqual(status, 400)
+        status, _ = self.post({'tickets': [VALID_TICKET], 'n_draws': 'many'})
+        self.assertEqual(status, 400)
+        status, _ = self.post({'tickets': [VALID_TICKET], 'n_draws': float('inf')})
+        self.assertEqual(status, 400)
+        status, _ = self.post({'tickets': [VALID_TICKET], 'jackpot': -1})
+        self.assertEqual(status, 400)
+
+        handler = self.api.handler.__new__(self.api.handler)
+        request = handler._validate_simulation_request({'tickets': [VALID_TICKET] * 100, 'n_draws': 10 ** 9})
+        self.assertEqual(request['n_draws'], self.api.MAX_SIMULATED_TICKET_DRAWS // 100)
+
+    def test_simulation_module_unavailable(self):
+        api = load_api_module('latest-results.py')
+        api.simulate_prizes = api.simulate_jackpot_pool = None
+        status, _ = call_handler(api, 'POST', {'tickets': [VALID_TICKET]})
+        self.assertEqual(status, 503)
+        status, data = call_handler(api, 'GET')
+        self.assertEqual(status, 200)
+        self.assertEqual(data['latest_results']['prize_breakdown'], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+
+from helpers import random_labels
+from utils.draws import NUM_LABELS, draws_to_multilabel, split_multilabel
+
+class TestMultilabelEncoding(unittest.TestCase):
+    def test_draws_to_multilabel(self):
+        labels = draws_to_multilabel([[1, 2, 3, 4, 35]], [[1, 12]])
+        self.assertEqual(labels.shape, (1, NUM_LABELS))
+        self.assertEqual(labels.sum(), 7)
+        front, back = split_multilabel(labels)
+        np.testing.assert_array_equal(np.flatnonzero(front[0]) + 1, [1, 2, 3, 4, 35])
+        np.testing.assert_array_equal(np.flatnonzero(back[0]) + 1, [1, 12])
+
+class TestModels(unittest.TestCase):
+    def test_lstm_model(self):
+        from models.lstm_model import build_lstm_model
+
+        model = build_lstm_model((None, 8), NUM_LABELS, lstm_units=(8, 4), dense_units=4)
+        output = model.predict(np.zeros((3, 5, 8), dtype=np.float32), verbose=0)
+        self.assertEqual(output.shape, (3, NUM_LABELS))
+        self.assertTrue(((output > 0) & (output < 1)).all())
+
+    def test_transformer_model(self):
+        from models.transformer_model import build_transformer_model
+
+        model = build_transformer_model((None, 8), NUM_LABELS, num_heads=2, key_dim=4, dense_units=8)
+        output = model.predict(np.zeros((3, 5, 8), dtype=np.float32), verbose=0)
+        self.assertEqual(output.shape, (3, NUM_LABELS))
+
+    def test_rf_multilabel_proba(self):
+        from models.rf_model import predict_multilabel_proba, train_rf_multilabel_model
+
+        labels = random_labels(120)
+        data = np.random.default_rng(1).random((120, 6))
+        model = train_rf_multilabel_model(data, labels, n_jobs=1, n_estimators=5)
+        proba = predict_multilabel_proba(model, data[:4])
+        self.assertEqual(proba.shape, (4, NUM_LABELS))
+        self.assertTrue(((proba >= 0) & (proba <= 1)).all())
+
+    def test_xgboost_multilabel_proba(self):
+        from models.rf_model import predict_multilabel_proba
+        from models.xgboost_model import train_xgboost_multilabel_model
+
+        labels = random_labels(120)
+        data = np.random.default_rng(1).random((120, 6))
+        model = train_xgboost_multilabel_model(data, labels, n_jobs=1, n_estimators=3)
+        self.assertEqual(predict_multilabel_proba(model, data[:4]).shape, (4, NUM_LABELS))
+
+class TestRandomForestUpdate(unittest.TestCase):
+    def setUp(self):
+        from models.rf_model import train_rf_model
+
+        rng = np.random.default_rng(0)
+        self.data = rng.random((100, 4))
+        self.labels = (self.data[:, 0] > 0.5).astype(int)
+        self.model = train_rf_model(self.data, self.labels, n_jobs=1, n_estimators=6)
+
+    def test_sliding_window_keeps_cap(self):
+        from models.rf_model import update_rf_model
+
+        update_rf_model(self.model, self.data[-50:], self.labels[-50:], n_new_trees=4, max_trees=8)
+        self.assertEqual(len(self.model.estimators_), 8)
+        self.assertEqual(self.model.n_estimators, 8)
+
+    def test_capped_updates_get_fresh_seeds(self):
+        from models.rf_model import update_rf_model
+
+        seeds = []
+        for _ in range(3):
+            update_rf_model(self.model, self.data[-50:], self.labels[-50:], n_new_trees=3, max_trees=6)
+            seeds.append([tree.random_state for tree in self.model.estimators_[-3:]])
+        self.assertEqual(len({tuple(s) for s in seeds}), 3)
+        self.assertEqual(len(set(sum(seeds, []))), 9)
+
+if __name__ == '__main__':
+    unittest.main()
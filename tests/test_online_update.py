@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+import tensorflow as tf
+import xgboost as xgb
+
+from helpers import load_api_module, random_draws, random_labels
+from models.lstm_model import build_lstm_model
+from models.online_update import (CURRENT_LINK, KERAS_MODELS, REPLAY_FILE, WEIGHTS_FILE, XGBOOST_FILE,
+                                  OnlineUpdater)
+from models.transformer_model import build_transformer_model
+from models.xgboost_model import FAST_TRAIN_PARAMS
+from utils.draws import NUM_LABELS, draws_to_multilabel
+
+N_SAMPLES = 12
+TIMESTEPS = 3
+N_FEATURES = 4
+
+class TestOnlineUpdater(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.serve_dir = self.tmpdir.name
+        rng = np.random.default_rng(0)
+        self.sequences = rng.random((N_SAMPLES, TIMESTEPS, N_FEATURES)).astype(np.float32)
+        self.features = rng.random((N_SAMPLES, 6)).astype(np.float32)
+        self.labels = random_labels(N_SAMPLES)
+
+        keras_models = {
+            'lstm': build_lstm_model((None, N_FEATURES), NUM_LABELS, lstm_units=(4, 4), dense_units=4),
+            'transformer': build_transformer_model((None, N_FEATURES), NUM_LABELS, num_heads=1, key_dim=4,
+                                                   dense_units=4)
+        }
+        booster = xgb.train(dict(FAST_TRAIN_PARAMS, nthread=1),
+                            xgb.DMatrix(self.features, label=self.labels), num_boost_round=2)
+        self.updater = OnlineUpdater(self.serve_dir, replay_size=8)
+        self.updater.initialize(keras_models, booster, {'lstm': 0.35, 'transformer': 0.40, 'xgboost': 0.25},
+                                replay=(self.sequences, self.features, self.labels))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def load_replay(self):
+        with np.load(os.path.join(self.updater.current_dir, REPLAY_FILE)) as replay:
+            return {key: replay[key] for key in replay.files}
+
+    def test_ingest_draw_updates_replay_and_weights(self):
+        replay = self.load_replay()
+        self.assertEqual(len(replay['labels']), 8)
+        np.testing.assert_array_equal(replay['labels'], self.labels[-8:])
+
+        front, back = random_draws(1, seed=5)
+        first_version = os.path.realpath(self.updater.current_dir)
+        self.updater.ingest_draw(front[0], back[0], self.sequences[0], self.features[0])
+        self.assertNotEqual(os.path.realpath(self.updater.current_dir), first_version)
+
+        replay = self.load_replay()
+        self.assertEqual(replay['sequences'].shape, (8, TIMESTEPS, N_FEATURES))
+        np.testing.assert_array_equal(replay['labels'][-1], draws_to_multilabel(front, back)[0])
+        np.testing.assert_array_equal(replay['labels'][:-1], self.labels[-7:])
+        with open(os.path.join(self.updater.current_dir, WEIGHTS_FILE), encoding='utf-8') as f:
+            self.assertAlmostEqual(sum(json.load(f).values()), 1.0)
+
+    def test_empty_replay_grows_from_ingested_draws(self):
+        self.updater.initialize(*self._reload_models(), {'lstm': 0.35, 'transformer': 0.40, 'xgboost': 0.25})
+        self.assertEqual(len(self.load_replay()['labels']), 0)
+        front, back = random_draws(2, seed=6)
+        for i in range(2):
+            self.updater.ingest_draw(front[i], back[i], self.sequences[i], self.features[i])
+        self.assertEqual(len(self.load_replay()['labels']), 2)
+
+    def test_optimizer_state_persists_across_ingests(self):
+        front, back = random_draws(2, seed=8)
+        for i in range(2):
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                self.updater.ingest_draw(front[i], back[i], self.sequences[i], self.features[i])
+                keras_models, _ = self._reload_models()
+            self.assertFalse([w for w in caught if 'Skipping variable loading' in str(w.message)])
+            for model in keras_models.values():
+                self.assertEqual(int(model.optimizer.iterations), (i + 1) * self.updater.keras_steps)
+
+    def test_served_models_reload_after_publish(self):
+        current = os.path.join(self.serve_dir, CURRENT_LINK)
+        predict = load_api_module('predict.py', MODEL_EXPORT_DIR=current, HOT_COLD_SHM_NAME='')
+        forest = predict.get_compiled_forest('xgboost')
+        self.assertIsNotNone(forest)
+        self.assertIs(predict.get_compiled_forest('xgboost'), forest)
+
+        front, back = random_draws(1, seed=7)
+        self.updater.ingest_draw(front[0], back[0], self.sequences[0], self.features[0])
+        self.assertIsNot(predict.get_compiled_forest('xgboost'), forest)
+
+    def _reload_models(self):
+        keras_models = {name: tf.keras.models.load_model(os.path.join(self.updater.current_dir, f'{name}.keras'))
+                        for name in KERAS_MODELS}
+        booster = xgb.Booster(model_file=os.path.join(self.updater.current_dir, XGBOOST_FILE))
+        return keras_models, booster
+
+if __name__ == '__main__':
+    unittest.main()
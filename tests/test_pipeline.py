@@ -0,0 +1,58 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+import main
+from helpers import random_draws, write_history
+from utils.pipeline import Pipeline, Stage, module_source
+
+class TestPipeline(unittest.TestCase):
+    def test_build_pipeline_end_to_end(self):
+        with tempfile.TemporaryDirectory() as root:
+            raw_data = os.path.join(root, 'history.csv')
+            write_history(raw_data, *random_draws(80))
+            results = main.build_pipeline(window=5, raw_data=raw_data, output_root=root, epochs=1,
+                                          max_workers=2).run()
+            self.assertEqual(set(results.values()), {'executed'})
+
+            with open(os.path.join(root, main.PERTURBED_PREDICTION), encoding='utf-8') as f:
+                prediction = json.load(f)
+            self.assertEqual(len(prediction['front_zone']), 5)
+            self.assertEqual(len(prediction['back_zone']), 2)
+            self.assertTrue(os.path.exists(os.path.join(root, main.REPORT)))
+
+            # 输入未变化时再次运行全部跳过
+            rerun = main.build_pipeline(window=5, raw_data=raw_data, output_root=root, epochs=1,
+                                        max_workers=2).run()
+            self.assertEqual(set(rerun.values()), {'skipped'})
+
+    def test_default_sample_history_is_not_empty(self):
+        from utils.draws import load_draw_history
+
+        sample = os.path.join(os.path.dirname(os.path.abspath(main.__file__)), 'data', 'sample.csv')
+        _, front_zone, _ = load_draw_history(sample)
+        self.assertGreater(len(front_zone), 20)
+
+    def test_dependency_source_changes_fingerprint(self):
+        with tempfile.TemporaryDirectory() as root:
+            module_path = os.path.join(root, 'pipeline_dep_module.py')
+            with open(module_path, 'w', encoding='utf-8') as f:
+                f.write('SCALE = 1\n')
+            sys.path.insert(0, root)
+            try:
+                self.assertEqual(module_source('pipeline_dep_module'), module_path)
+                self.assertEqual(module_source('pipeline_missing_module'), '')
+                stage = Stage('report', main.report_stage, deps=['pipeline_dep_module'])
+                pipeline = Pipeline([stage], manifest_path=os.path.join(root, 'manifest.json'))
+                before = pipeline._fingerprint(stage)
+                self.assertEqual(pipeline._fingerprint(stage), before)
+                with open(module_path, 'w', encoding='utf-8') as f:
+                    f.write('SCALE = 2\n')
+                self.assertNotEqual(pipeline._fingerprint(stage), before)
+            finally:
+                sys.path.remove(root)
+
+if __name__ == '__main__':
+    unittest.main()
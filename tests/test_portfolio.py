@@ -0,0 +1,54 @@
+import multiprocessing
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.portfolio import TICKET_PRICE, solve_portfolio
+
+FRONT_POOL = [2, 5, 8, 13, 19, 21, 27, 30, 34]
+BACK_POOL = [3, 7, 11]
+
+class TestSolvePortfolio(unittest.TestCase):
+    def test_tickets_drawn_from_pools(self):
+        result = solve_portfolio(FRONT_POOL, BACK_POOL, budget=6, seed=0)
+        self.assertEqual(result['ticket_count'], 6)
+        self.assertEqual(result['cost'], 6 * TICKET_PRICE)
+        for ticket in result['tickets']:
+            self.assertEqual(len(set(ticket['front_zone'])), 5)
+            self.assertTrue(set(ticket['front_zone']) <= set(FRONT_POOL))
+            self.assertTrue(set(ticket['back_zone']) <= set(BACK_POOL))
+        self.assertTrue(0 < result['coverage'] < 1)
+
+    def test_full_coverage_with_enough_budget(self):
+        # 7个号码中任意3个：全部21个5号组合必然全覆盖，贪心应以更少的注数做到
+        result = solve_portfolio(FRONT_POOL[:7], BACK_POOL[:2], budget=21, seed=0)
+        self.assertTrue(result['fully_covered'])
+        self.assertLess(result['ticket_count'], 21)
+
+    def test_executor_matches_serial(self):
+        serial = solve_portfolio(FRONT_POOL, BACK_POOL, budget=5, front_matches=3, back_matches=1, seed=7)
+        with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn')) as executor:
+            parallel = solve_portfolio(FRONT_POOL, BACK_POOL, budget=5, front_matches=3, back_matches=1, seed=7,
+                                       executor=executor)
+        self.assertEqual(serial, parallel)
+
+    def test_expected_mode(self):
+        front_probabilities = np.linspace(0.3, 0.1, len(FRONT_POOL))
+        back_probabilities = np.array([0.4, 0.2, 0.1])
+        result = solve_portfolio(FRONT_POOL, BACK_POOL, budget=4, mode='expected',
+                                 front_probabilities=front_probabilities, back_probabilities=back_probabilities,
+                                 seed=0)
+        self.assertEqual(result['mode'], 'expected')
+        self.assertTrue(0 < result['coverage'] <= 1)
+
+    def test_invalid_requests(self):
+        with self.assertRaises(ValueError):
+            solve_portfolio(FRONT_POOL, BACK_POOL, budget=3, mode='unknown')
+        with self.assertRaises(ValueError):
+            solve_portfolio(FRONT_POOL[:4], BACK_POOL, budget=3)
+        with self.assertRaises(ValueError):
+            solve_portfolio(FRONT_POOL, BACK_POOL, budget=3, mode='expected')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import tempfile
+import unittest
+
+from helpers import call_handler, load_api_module
+
+class TestPredictRequest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.export_dir = tempfile.TemporaryDirectory()
+        cls.api = load_api_module('predict.py', MODEL_EXPORT_DIR=cls.export_dir.name, HOT_COLD_SHM_NAME='')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.export_dir.cleanup()
+
+    def test_non_numeric_parameters_rejected(self):
+        invalid = [
+            {'alternative_count': 'many'},
+            {'alternative_count': float('inf')},
+            {'alternative_min_distance': float('nan')},
+            {'alternative_min_distance': [4]},
+            {'prediction_type': 'consensus', 'consensus_seeds': float('-inf')}
+        ]
+        for body in invalid:
+            status, data = call_handler(self.api, 'POST', body, prediction_engine=self.api.PredictionEngine())
+            self.assertEqual(status, 400, body)
+            self.assertIn('error', data)
+
+    def test_parameters_clamped(self):
+        handler = self.api.handler.__new__(self.api.handler)
+        self.assertEqual(handler._parse_request_options({'consensus_seeds': 10 ** 9, 'alternative_count': 0,
+                                                         'alternative_min_distance': 99.7}),
+                         {'consensus_seeds': 200000, 'alternative_count': 1, 'alternative_min_distance': 14})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from helpers import load_api_module
+from utils import prize_simulation
+from utils.prize_simulation import (FIRST_PRIZE_CAP_THRESHOLD, simulate_jackpot_pool, simulate_prizes,
+                                    tier_payouts, tier_probabilities)
+
+class TestPrizeSimulation(unittest.TestCase):
+    def test_tier_probabilities(self):
+        probabilities = tier_probabilities()
+        self.assertAlmostEqual(probabilities.sum(), 1.0)
+        self.assertAlmostEqual(1 / probabilities[1], 21425712)
+
+    def test_simulated_frequencies_match_probabilities(self):
+        result = simulate_prizes([[1, 2, 3, 4, 5]], [[1, 2]], n_draws=200000, seed=0, max_workers=1)
+        frequencies = np.array([tier['frequency'] for tier in result['tiers']])
+        probabilities = tier_probabilities()[1:]
+        # 九等奖约6%，二十万次开奖的标准误约0.05个百分点
+        self.assertAlmostEqual(frequencies[-1], probabilities[-1], delta=0.003)
+        # 该种子下没有命中浮动奖级，期望回报与固定奖级的理论值一致
+        self.assertEqual(result['tiers'][0]['hits'] + result['tiers'][1]['hits'], 0)
+        fixed_return = (probabilities[2:] * tier_payouts()[3:]).sum()
+        self.assertAlmostEqual(result['expected_return'], fixed_return, delta=0.05)
+        self.assertEqual(simulate_prizes([[1, 2, 3, 4, 5]], [[1, 2]], n_draws=5000, seed=1, max_workers=1),
+                         simulate_prizes([[1, 2, 3, 4, 5]], [[1, 2]], n_draws=5000, seed=1, max_workers=1))
+
+    def test_small_runs_stay_in_process(self):
+        with mock.patch.object(prize_simulation, 'ProcessPoolExecutor', side_effect=AssertionError('进程池')):
+            result = simulate_prizes([[1, 2, 3, 4, 5]] * 2, [[1, 2]] * 2, n_draws=10000, seed=0)
+        self.assertEqual(result, simulate_prizes([[1, 2, 3, 4, 5]] * 2, [[1, 2]] * 2, n_draws=10000, seed=0,
+                                                 max_workers=1))
+
+class TestJackpotPool(unittest.TestCase):
+    def test_pool_parameters_required(self):
+        with self.assertRaises(TypeError):
+            simulate_jackpot_pool(10, 10)
+
+    def test_served_parameters_keep_pool_and_rollovers(self):
+        params = load_api_module('latest-results.py').POOL_PARAMS
+        result = simulate_jackpot_pool(300, 200, seed=0, **params)
+        # 奖池不会被一等奖持续掏空，也不会无限累积
+        median_pool = result['pool_quantiles'][-50:, 1].mean()
+        self.assertGreater(median_pool, 0.8 * FIRST_PRIZE_CAP_THRESHOLD)
+        self.assertLess(median_pool, 1.5 * FIRST_PRIZE_CAP_THRESHOLD)
+        hit_rate = result['jackpot_hit_rate'].mean()
+        self.assertTrue(0.6 < hit_rate < 0.97, hit_rate)
+
+    def test_ticket_multiple_clusters_winners(self):
+        kwargs = dict(initial_pool=8e8, base_sales=2.4e8, seed=0, record_paths=True)
+        single = simulate_jackpot_pool(200, 200, ticket_multiple=1.0, **kwargs)
+        clustered = simulate_jackpot_pool(200, 200, ticket_multiple=4.0, **kwargs)
+        # 中奖注数均值不变，但无人命中的期数更多
+        self.assertAlmostEqual(clustered['paths']['first_winners'].mean(),
+                               single['paths']['first_winners'].mean(), delta=0.2)
+        self.assertLess(clustered['jackpot_hit_rate'].mean(), single['jackpot_hit_rate'].mean() - 0.1)
+
+if __name__ == '__main__':
+    unittest.main()
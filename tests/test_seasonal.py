@@ -0,0 +1,102 @@
+import unittest
+
+import numpy as np
+
+from helpers import random_draws
+from utils.seasonal import SEASONS, SeasonalCube
+
+def draw_dates(n_draws, start='2021-01-04', step_days=3):
+    return np.datetime64(start) + np.arange(n_draws) * step_days
+
+class TestSeasonalCube(unittest.TestCase):
+    def setUp(self):
+        self.front, self.back = random_draws(900, seed=0)
+        self.dates = draw_dates(900)
+
+    def test_counts_match_brute_force(self):
+        cube = SeasonalCube()
+        cube.extend(self.front, self.back, self.dates)
+        self.assertEqual(cube.n_periods, 900)
+        for i in (0, 123, 899):
+            date = self.dates[i].item()
+            month, weekday, year = date.month - 1, date.weekday(), date.year - cube.base_year
+            same_cell = [j for j, d in enumerate(self.dates.tolist())
+                         if (d.month - 1, d.weekday(), d.year - cube.base_year) == (month, weekday, year)]
+            self.assertEqual(cube.draws[month, weekday, year], len(same_cell))
+            number = int(self.front[i, 0])
+            self.assertEqual(cube.counts[number - 1, month, weekday, year],
+                             sum(number in self.front[j] for j in same_cell))
+        self.assertEqual(cube.counts.sum(), 900 * 7)
+
+    def test_out_of_order_years_match_batch(self):
+        batch = SeasonalCube()
+        batch.extend(self.front, self.back, self.dates)
+        cube = SeasonalCube()
+        cube.extend(self.front[600:], self.back[600:], self.dates[600:])
+        cube.extend(self.front[:600], self.back[:600], self.dates[:600])
+        self.assertEqual((cube.base_year, cube.n_years), (batch.base_year, batch.n_years))
+        np.testing.assert_array_equal(cube.counts, batch.counts)
+        np.testing.assert_array_equal(cube.draws, batch.draws)
+
+    def test_missing_dates_only_count_periods(self):
+        cube = SeasonalCube()
+        cube.extend(self.front[:10], self.back[:10], np.full(10, np.datetime64('NaT'), dtype='datetime64[D]'))
+        self.assertEqual((cube.n_periods, cube.n_years), (10, 0))
+        rates, n_draws = cube.slice_rates()
+        self.assertEqual(n_draws, 0)
+        self.assertFalse(rates.any())
+
+    def test_slice_rates(self):
+        cube = SeasonalCube()
+        cube.extend(self.front, self.back, self.dates)
+        rates, n_draws = cube.slice_rates()
+        self.assertEqual(n_draws, 900)
+        self.assertAlmostEqual(float(rates[:35].mean()), 1.0)
+        # 2021-01-04 为星期一，间隔3天的开奖轮流落在每个星期
+        self.assertEqual(cube.slice_rates(weekdays=[0], years=[2021])[1],
+                         sum(d.weekday() == 0 and d.year == 2021 for d in self.dates.tolist()))
+        self.assertEqual(cube.slice_rates(years=[1990])[1], 0)
+
+    def test_seasonal_favorites(self):
+        front = self.front.copy()
+        months = self.dates.astype('datetime64[M]').astype(np.int64) % 12
+        summer = np.isin(months, SEASONS['summer'])
+        # 夏季每期都开出前区33
+        for row in np.flatnonzero(summer):
+            if 33 not in front[row]:
+                front[row, 0] = 33
+        cube = SeasonalCube()
+        cube.extend(front, self.back, self.dates)
+        favorites = cube.seasonal_favorites()
+        self.assertEqual(favorites['summer']['front'][0], 33)
+        self.assertEqual(favorites['summer']['draws'], int(summer.sum()))
+        self.assertEqual(sum(f['draws'] for f in favorites.values()), 900)
+        self.assertEqual(sorted(cube.weekday_favorites()), list(range(7)))
+
+    def cycle_with_peaks(self, peak_draws):
+        """在 peak_draws 标记的期都开出前区7后计算月度周期"""
+        front = self.front.copy()
+        for row in np.flatnonzero(peak_draws):
+            if 7 not in front[row]:
+                front[row, 0] = 7
+        cube = SeasonalCube()
+        cube.extend(front, self.back, self.dates)
+        return cube.cycle_statistics()
+
+    def test_cycle_statistics(self):
+        months = self.dates.astype('datetime64[M]').astype(np.int64)
+        result = self.cycle_with_peaks(months % 4 < 2)
+        # 主频取离散傅里叶变换的整数频点，周期为观测月数除以频点，与4个月相差不到一个频点
+        self.assertAlmostEqual(result['cycle_length'], 4.0, delta=0.1)
+        self.assertEqual(result['months_observed'], int(months[-1] - months[0] + 1))
+        # 最后一期之后的月份落在高点，错开两个月则落在低点
+        self.assertEqual((months[-1] + 1) % 4, 1)
+        self.assertIn(7, result['predicted_peak_numbers'])
+        self.assertNotIn(7, self.cycle_with_peaks(months % 4 >= 2)['predicted_peak_numbers'])
+
+        short = SeasonalCube()
+        short.extend(self.front[:30], self.back[:30], self.dates[:30])
+        self.assertIsNone(short.cycle_statistics())
+
+if __name__ == '__main__':
+    unittest.main()
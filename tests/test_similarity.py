@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from helpers import random_draws
+from utils import similarity
+from utils.similarity import SimilarDrawIndex
+
+def jaccard(front, back, query_front, query_back):
+    items = set(front) | {n + 100 for n in back}
+    query = set(query_front) | {n + 100 for n in query_back}
+    return len(items & query) / len(items | query)
+
+class TestSimilarDrawIndex(unittest.TestCase):
+    def setUp(self):
+        self.front, self.back = random_draws(500, seed=0)
+        self.index = SimilarDrawIndex()
+        self.index.extend(self.front, self.back)
+
+    def test_exact_draw_ranks_first(self):
+        results = self.index.query(self.front[123], self.back[123], k=3)
+        self.assertEqual(results[0]['period'], 123)
+        self.assertEqual(results[0]['jaccard'], 1.0)
+        self.assertEqual(results[0]['shared_front'], sorted(self.front[123].tolist()))
+        self.assertEqual(len(results), 3)
+        self.assertEqual([r['jaccard'] for r in results], sorted((r['jaccard'] for r in results), reverse=True))
+
+    def test_near_duplicate_matches_brute_force(self):
+        front = self.front[42].tolist()
+        front[0] = next(n for n in range(1, 36) if n not in front)
+        back = self.back[42].tolist()
+        result = self.index.query(front, back, k=1)[0]
+        best = max(jaccard(f, b, front, back) for f, b in zip(self.front, self.back))
+        self.assertEqual(result['jaccard'], round(best, 4))
+        self.assertEqual(result['jaccard'], 0.75)
+
+    def test_scan_fallback_returns_k(self):
+        results = self.index.query([1, 2, 3, 4, 5], [1, 2], k=50)
+        self.assertEqual(len(results), 50)
+        expected = sorted((jaccard(f, b, [1, 2, 3, 4, 5], [1, 2]) for f, b in zip(self.front, self.back)),
+                          reverse=True)[:50]
+        np.testing.assert_allclose([r['jaccard'] for r in results], expected, atol=1e-4)
+
+    def test_merged_and_tail_agree(self):
+        with mock.patch.object(similarity, 'MERGE_THRESHOLD', 100):
+            merged = SimilarDrawIndex()
+            merged.extend(self.front[:300], self.back[:300])
+            merged.extend(self.front[300:], self.back[300:])
+        self.assertEqual(merged.merged_periods, 500)
+        self.assertEqual(self.index.merged_periods, 0)
+        for period in (0, 250, 499):
+            self.assertEqual(merged.query(self.front[period], self.back[period], k=5),
+                             self.index.query(self.front[period], self.back[period], k=5))
+
+    def test_empty_index(self):
+        self.assertEqual(SimilarDrawIndex().query([1, 2, 3, 4, 5], [1, 2]), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.ensemble import RandomForestClassifier
+
+from ensemble.stacking import build_multilabel_stacking_model, compute_oof_predictions, fit_meta_learner
+from models.rf_model import predict_multilabel_proba
+from helpers import random_labels
+from utils.draws import NUM_LABELS
+
+class LatestTrainingPeriod(BaseEstimator, ClassifierMixin):
+    """第0列为期序号；预测的正类概率表示该期是否晚于训练用到的全部期"""
+
+    def fit(self, data, labels):
+        self.classes_ = np.unique(labels)
+        self.latest_ = data[:, 0].max()
+        return self
+
+    def predict_proba(self, data):
+        later = (data[:, 0] > self.latest_).astype(float)
+        return np.column_stack([1 - later, later])
+
+class TestMultilabelStacking(unittest.TestCase):
+    def setUp(self):
+        self.labels = random_labels(200)
+        self.data = np.random.default_rng(1).random((200, 6))
+        self.base_models = {
+            'rf_shallow': RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0),
+            'rf_deep': RandomForestClassifier(n_estimators=5, random_state=1)
+        }
+
+    def test_oof_predictions_in_worker_processes(self):
+        oof, fitted = compute_oof_predictions(self.base_models, self.data, self.labels, cv=3, n_jobs=2)
+        self.assertEqual(oof.shape, (200, 2 * NUM_LABELS))
+        self.assertEqual(set(fitted), set(self.base_models))
+        # 前推切分下最早的一段（200 // 4 期）没有折外预测，其余每期恰好落在一个验证折中
+        self.assertTrue(np.isnan(oof[:50]).all())
+        self.assertFalse(np.isnan(oof[50:]).any())
+
+    def test_oof_predictions_use_only_earlier_periods(self):
+        data = np.column_stack([np.arange(200), self.data])
+        labels = self.labels[:, 0]
+        oof, _ = compute_oof_predictions({'latest': LatestTrainingPeriod()}, data, labels, cv=4, n_jobs=1)
+        np.testing.assert_array_equal(oof[40:, 0], 1)
+        # 元学习器跳过没有折外预测的行
+        meta_model = fit_meta_learner(oof, labels)
+        self.assertEqual(meta_model.n_features_in_, 1)
+
+    def test_fit_and_predict(self):
+        model = build_multilabel_stacking_model(self.base_models, self.data, self.labels, cv=3, n_jobs=1)
+        proba = model.predict_proba(self.data[:5])
+        self.assertEqual(proba.shape, (5, NUM_LABELS))
+        self.assertTrue(((proba >= 0) & (proba <= 1)).all())
+
+    def test_meta_learner_with_single_class_labels(self):
+        # 留出集较短时冷门号码可能从未开出
+        labels = self.labels.copy()
+        labels[:, 3] = 0
+        labels[:, 40] = 1
+        meta_model = fit_meta_learner(np.random.default_rng(2).random((200, 10)), labels)
+        proba = predict_multilabel_proba(meta_model, np.random.default_rng(3).random((4, 10)))
+        self.assertEqual(proba.shape, (4, NUM_LABELS))
+        np.testing.assert_array_equal(proba[:, 3], 0)
+        np.testing.assert_array_equal(proba[:, 40], 1)
+        self.assertTrue(((proba[:, 0] > 0) & (proba[:, 0] < 1)).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import math
+import unittest
+
+import numpy as np
+
+from helpers import random_draws, random_labels
+from utils.stat_tests import DrawStatistics, chi2_sf, normal_two_sided_p, permutation_test, repeat_rate, runs_test
+from utils.tickets import ticket_masks
+
+class TestDistributions(unittest.TestCase):
+    def test_chi2_sf_closed_forms(self):
+        for x in (0.1, 1.0, 3.841459, 10.0, 60.0):
+            self.assertAlmostEqual(chi2_sf(x, 1), math.erfc(math.sqrt(x / 2)), places=10)
+            self.assertAlmostEqual(chi2_sf(x, 2), math.exp(-x / 2), places=10)
+            self.assertAlmostEqual(chi2_sf(x, 4), math.exp(-x / 2) * (1 + x / 2), places=10)
+        self.assertAlmostEqual(chi2_sf(3.841459, 1), 0.05, places=6)
+        self.assertEqual(chi2_sf(0, 34), 1.0)
+
+    def test_normal_two_sided_p(self):
+        np.testing.assert_allclose(normal_two_sided_p([0.0, 1.959964, -1.959964]), [1.0, 0.05, 0.05], atol=1e-6)
+
+class TestDrawStatistics(unittest.TestCase):
+    def setUp(self):
+        self.front, self.back = random_draws(400, seed=0)
+        self.stats = DrawStatistics()
+        self.stats.extend(self.front, self.back)
+
+    def test_update_matches_extend(self):
+        stats = DrawStatistics()
+        for front, back in zip(self.front, self.back):
+            stats.update(front, back)
+        self.assertEqual(stats.n_periods, 400)
+        for zone in ('front', 'back'):
+            np.testing.assert_array_equal(stats.counts[zone], self.stats.counts[zone])
+        np.testing.assert_allclose(stats.sum_moments, self.stats.sum_moments)
+
+    def test_chi_square(self):
+        result = self.stats.chi_square('front')
+        counts = np.bincount(self.front.ravel() - 1, minlength=35)
+        expected = 400 * 5 / 35
+        pearson = ((counts - expected) ** 2).sum() / expected
+        self.assertAlmostEqual(result['statistic'], pearson * 34 / 30)
+        self.assertEqual(result['df'], 34)
+        # 随机开奖下不应拒绝均匀性
+        self.assertGreater(result['p_value'], 0.01)
+        self.assertEqual(DrawStatistics().chi_square('back')['p_value'], 1.0)
+
+    def test_entropy(self):
+        result = self.stats.entropy('back')
+        p = np.bincount(self.back.ravel() - 1, minlength=12) / 800
+        self.assertAlmostEqual(result['entropy_bits'], -(p * np.log2(p)).sum())
+        self.assertAlmostEqual(result['max_entropy_bits'], math.log2(12))
+        self.assertTrue(0.95 < result['normalized_entropy'] <= 1)
+
+    def test_sum_normality_matches_direct_moments(self):
+        sums = self.front.sum(axis=1).astype(np.float64)
+        centered = sums - sums.mean()
+        skewness = (centered ** 3).mean() / (centered ** 2).mean() ** 1.5
+        kurtosis = (centered ** 4).mean() / (centered ** 2).mean() ** 2
+        result = self.stats.sum_normality()
+        self.assertAlmostEqual(result['mean'], sums.mean())
+        self.assertAlmostEqual(result['std'], sums.std())
+        self.assertAlmostEqual(result['skewness'], skewness)
+        self.assertAlmostEqual(result['kurtosis'], kurtosis)
+        self.assertAlmostEqual(result['statistic'], 400 / 6 * (skewness ** 2 + (kurtosis - 3) ** 2 / 4))
+        self.assertIsNone(DrawStatistics().sum_normality())
+
+class TestSequenceTests(unittest.TestCase):
+    def test_runs_test(self):
+        indicators = np.array([[1, 1, 0], [0, 1, 0], [1, 1, 1], [0, 1, 1], [1, 1, 0], [0, 1, 0]])
+        runs, z, p = runs_test(indicators)
+        np.testing.assert_array_equal(runs, [6, 1, 3])
+        # 0/1交替的第一列游程数偏多
+        self.assertGreater(z[0], 0)
+        self.assertEqual((z[1], p[1]), (0.0, 1.0))
+        runs, z, p = runs_test(random_labels(500))
+        self.assertEqual(runs.shape, (47,))
+        self.assertTrue((p > 0).all() and (p <= 1).all())
+
+    def test_repeat_rate(self):
+        masks = ticket_masks([[1, 2, 3, 4, 5], [1, 2, 6, 7, 8], [9, 10, 11, 12, 13]], [[1, 2], [1, 3], [4, 5]])
+        self.assertAlmostEqual(repeat_rate(masks), (3 + 0) / 2)
+        self.assertEqual(repeat_rate(masks[:1]), 0.0)
+
+    def test_permutation_test(self):
+        front, back = random_draws(200, seed=1)
+        result = permutation_test(front, back, n_resamples=200, seed=0, max_workers=1)
+        self.assertEqual(result, permutation_test(front, back, n_resamples=200, seed=0, max_workers=1))
+        self.assertAlmostEqual(result['statistic'], repeat_rate(ticket_masks(front, back)))
+        self.assertEqual(result['n_resamples'], 200)
+        self.assertTrue(1 / 201 <= result['p_value'] <= 1)
+        # 每期重复上一期号码的序列相关性显著
+        repeated_front, repeated_back = np.repeat(front[:100], 2, axis=0), np.repeat(back[:100], 2, axis=0)
+        repeated = permutation_test(repeated_front, repeated_back, n_resamples=200, seed=0, max_workers=1)
+        self.assertAlmostEqual(repeated['p_value'], 1 / 201)
+        self.assertIsNone(permutation_test(front[:2], back[:2])['p_value'])
+
+if __name__ == '__main__':
+    unittest.main()
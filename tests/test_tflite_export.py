@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import tensorflow as tf
+
+from helpers import load_api_module
+from models.lstm_model import build_lstm_model
+from models.tflite_export import TFLitePredictor, export_tflite_model
+from models.transformer_model import build_transformer_model
+from utils.draws import NUM_LABELS
+
+SEQUENCE_LENGTH = 5
+N_FEATURES = 8
+
+class TestTFLiteExport(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        tf.keras.utils.set_random_seed(0)
+        self.data = np.random.default_rng(0).random((3, SEQUENCE_LENGTH, N_FEATURES)).astype(np.float32)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def export(self, model, name, **kwargs):
+        path = os.path.join(self.tmpdir.name, f'{name}.tflite')
+        export_tflite_model(model, path, **kwargs)
+        return path
+
+    def test_recurrent_model_requires_sequence_length(self):
+        model = build_lstm_model((None, N_FEATURES), NUM_LABELS, lstm_units=(8, 4), dense_units=4)
+        with self.assertRaises(ValueError):
+            self.export(model, 'lstm')
+
+    def test_lstm_predicts_batches(self):
+        model = build_lstm_model((None, N_FEATURES), NUM_LABELS, lstm_units=(8, 4), dense_units=4)
+        predictor = TFLitePredictor(self.export(model, 'lstm', sequence_length=SEQUENCE_LENGTH))
+        predictions = predictor.predict(self.data)
+        self.assertEqual(predictions.shape, (3, NUM_LABELS))
+        np.testing.assert_allclose(predictions, model.predict(self.data, verbose=0), atol=1e-4)
+
+    def test_int8_transformer_predicts_batches(self):
+        model = build_transformer_model((None, N_FEATURES), NUM_LABELS, num_heads=2, key_dim=4, dense_units=8)
+        calibration_data = np.random.default_rng(1).random((32, SEQUENCE_LENGTH, N_FEATURES)).astype(np.float32)
+        path = self.export(model, 'transformer', quantization='int8', calibration_data=calibration_data,
+                           sequence_length=SEQUENCE_LENGTH)
+        predictions = TFLitePredictor(path).predict(self.data)
+        self.assertEqual(predictions.shape, (3, NUM_LABELS))
+        np.testing.assert_allclose(predictions, model.predict(self.data, verbose=0), atol=0.05)
+
+    def test_malformed_input_falls_back_to_heuristic(self):
+        model = build_lstm_model((None, N_FEATURES), NUM_LABELS, lstm_units=(8, 4), dense_units=4)
+        self.export(model, 'lstm', sequence_length=SEQUENCE_LENGTH)
+        predict = load_api_module('predict.py', TFLITE_MODEL_DIR=self.tmpdir.name, HOT_COLD_SHM_NAME='')
+        engine = predict.PredictionEngine()
+
+        prediction = engine.generate_lstm_prediction(1, model_input=self.data[0].tolist())
+        self.assertEqual(prediction['inference_backend'], 'tflite')
+        for malformed in ([[1.0, 2.0], [3.0]], [[0.0] * (N_FEATURES + 1)] * SEQUENCE_LENGTH, 'abc'):
+            prediction = engine.generate_lstm_prediction(1, model_input=malformed)
+            self.assertEqual(prediction['inference_backend'], 'heuristic')
+            self.assertEqual(len(prediction['front_zone']), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+from utils.tickets import diverse_alternatives, mask_numbers, popcount, ticket_masks
+
+MAIN_FRONT = [3, 9, 17, 25, 33]
+MAIN_BACK = [4, 11]
+
+class TestTicketMasks(unittest.TestCase):
+    def test_round_trip(self):
+        mask = ticket_masks(MAIN_FRONT, MAIN_BACK)
+        self.assertEqual(mask_numbers(mask), (MAIN_FRONT, MAIN_BACK))
+        self.assertEqual(popcount([mask])[0], 7)
+
+    def test_popcount(self):
+        masks = np.array([0, 1, 0b1011, (1 << 47) - 1], dtype=np.uint64)
+        np.testing.assert_array_equal(popcount(masks), [0, 1, 3, 47])
+
+class TestDiverseAlternatives(unittest.TestCase):
+    def check_distances(self, alternatives, min_distance):
+        masks = ticket_masks([a[0] for a in alternatives], [a[1] for a in alternatives])
+        main_mask = ticket_masks(MAIN_FRONT, MAIN_BACK)
+        np.testing.assert_array_equal(popcount(masks ^ main_mask), [a[2] for a in alternatives])
+        self.assertTrue(all(a[2] >= min_distance for a in alternatives))
+        pairwise = popcount(masks[:, None] ^ masks[None, :])
+        self.assertTrue((pairwise[~np.eye(len(masks), dtype=bool)] >= min_distance).all())
+
+    def test_distances_respected(self):
+        alternatives = diverse_alternatives(MAIN_FRONT, MAIN_BACK, 300, min_distance=6, seed=0)
+        self.assertEqual(len(alternatives), 300)
+        self.check_distances(alternatives, 6)
+
+    def test_small_pool_is_refilled(self):
+        # 第一轮的50个候选不够选出100注，后续加倍的候选池补足
+        alternatives = diverse_alternatives(MAIN_FRONT, MAIN_BACK, 100, min_distance=4, seed=1, pool_size=50)
+        self.assertEqual(len(alternatives), 100)
+        self.check_distances(alternatives, 4)
+
+    def test_infeasible_distance_reports_shortfall(self):
+        # 两两号码完全不重合时前区最多7注、后区最多6注，无法选出20注
+        with self.assertLogs('utils.tickets', level='WARNING'):
+            alternatives = diverse_alternatives(MAIN_FRONT, MAIN_BACK, 20, min_distance=14, seed=2)
+        self.assertLess(len(alternatives), 20)
+        self.check_distances(alternatives, 14)
+
+    def test_seed_is_reproducible(self):
+        self.assertEqual(diverse_alternatives(MAIN_FRONT, MAIN_BACK, 10, seed=3),
+                         diverse_alternatives(MAIN_FRONT, MAIN_BACK, 10, seed=3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from helpers import load_api_module, random_draws
+from utils.draws import NUM_LABELS, draws_to_multilabel
+from utils.transitions import TransitionModel
+
+class TestTransitionModel(unittest.TestCase):
+    def setUp(self):
+        self.front, self.back = random_draws(120, seed=0)
+        self.labels = draws_to_multilabel(self.front, self.back).astype(np.int64)
+
+    def test_counts_match_brute_force(self):
+        model = TransitionModel.from_draws(self.front, self.back, max_gap=10)
+        transitions = np.zeros((NUM_LABELS, NUM_LABELS), dtype=np.int64)
+        for previous, current in zip(self.labels[:-1], self.labels[1:]):
+            transitions += np.outer(previous, current)
+        np.testing.assert_array_equal(model.transitions, transitions)
+        np.testing.assert_array_equal(model.source_counts, self.labels[:-1].sum(axis=0))
+
+        hits = np.zeros_like(model.gap_hits)
+        trials = np.zeros_like(model.gap_trials)
+        last_seen = np.full(NUM_LABELS, -1)
+        for period, row in enumerate(self.labels):
+            if period > 0:
+                states = np.where(last_seen >= 0, np.minimum(period - 1 - last_seen, 10), 10)
+                trials[np.arange(NUM_LABELS), states] += 1
+                hits[np.arange(NUM_LABELS), states] += row
+            last_seen[row > 0] = period
+        np.testing.assert_array_equal(model.gap_trials, trials)
+        np.testing.assert_array_equal(model.gap_hits, hits)
+        np.testing.assert_array_equal(model.current_gaps(), np.where(last_seen >= 0, 119 - last_seen, 10))
+
+    def test_incremental_matches_batch(self):
+        model = TransitionModel.from_draws(self.front[:50], self.back[:50])
+        model.extend(self.front[50:119], self.back[50:119])
+        model.update(self.front[119], self.back[119])
+        batch = TransitionModel.from_draws(self.front, self.back)
+        for name in ('transitions', 'source_counts', 'gap_hits', 'gap_trials', 'last_labels', 'last_seen'):
+            np.testing.assert_array_equal(getattr(model, name), getattr(batch, name))
+        self.assertEqual(model.n_periods, batch.n_periods)
+
+    def test_probabilities_sum_to_picks(self):
+        model = TransitionModel.from_draws(self.front, self.back)
+        self.assertAlmostEqual(model.transition_probabilities().sum(), 7.0)
+        front, back = model.scores()
+        self.assertEqual((len(front), len(back)), (35, 12))
+        self.assertTrue(((front > 0) & (front < 1)).all() and ((back > 0) & (back < 1)).all())
+
+class TestEnsembleWeights(unittest.TestCase):
+    def engine_weights(self, served=None):
+        with tempfile.TemporaryDirectory() as export_dir:
+            if served is not None:
+                with open(os.path.join(export_dir, 'ensemble_weights.json'), 'w', encoding='utf-8') as f:
+                    json.dump(served, f)
+            predict = load_api_module('predict.py', MODEL_EXPORT_DIR=export_dir, HOT_COLD_SHM_NAME='')
+            return predict.PredictionEngine().model_weights
+
+    def test_default_weights_sum_to_one(self):
+        weights = self.engine_weights()
+        self.assertAlmostEqual(sum(weights.values()), 1.0)
+        self.assertAlmostEqual(weights['transition'], 0.10)
+        self.assertAlmostEqual(weights['transformer'] / weights['lstm'], 0.40 / 0.35)
+
+    def test_served_weights_keep_transition_share(self):
+        weights = self.engine_weights({'lstm': 0.5, 'transformer': 0.3, 'xgboost': 0.2})
+        self.assertAlmostEqual(sum(weights.values()), 1.0)
+        self.assertAlmostEqual(weights['transition'], 0.10)
+        self.assertAlmostEqual(weights['lstm'], 0.45)
+
+class TestStackingEnsemble(unittest.TestCase):
+    def test_picks_are_top_of_ranking(self):
+        with tempfile.TemporaryDirectory() as export_dir:
+            predict = load_api_module('predict.py', MODEL_EXPORT_DIR=export_dir, HOT_COLD_SHM_NAME='')
+            engine = predict.PredictionEngine()
+        predictions = {
+            'lstm': {'front_zone': [1, 2, 3, 4, 5], 'back_zone': [1, 2], 'confidence': 0.7},
+            'transformer': {'front_zone': [1, 2, 3, 9, 10], 'back_zone': [1, 3], 'confidence': 0.8},
+            'xgboost': {'front_zone': [1, 2, 11, 12, 13], 'back_zone': [1, 4], 'confidence': 0.6}
+        }
+        weights = {'lstm': 0.3, 'transformer': 0.4, 'xgboost': 0.3}
+        result = engine._stacking_ensemble(predictions, weights, None)
+        metadata = result['ensemble_metadata']
+        self.assertEqual(result['front_zone'], sorted(metadata['ranked_front'][:5]))
+        self.assertEqual(result['back_zone'], sorted(metadata['ranked_back'][:2]))
+        self.assertEqual(sorted(metadata['ranked_front']), list(range(1, 36)))
+        # 1、2全票，3得票0.7；后区1全票，3得票0.4
+        self.assertEqual(sorted(metadata['ranked_front'][:2]), [1, 2])
+        self.assertEqual(metadata['ranked_front'][2], 3)
+        self.assertEqual(result['back_zone'], [1, 3])
+        self.assertEqual(sorted(list(metadata['voting_details']['front_votes'])[:2]), [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
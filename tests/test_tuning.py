@@ -0,0 +1,46 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from helpers import random_labels
+from models.tuning import cache_feature_windows, sample_configs, successive_halving, walk_forward_splits
+
+WINDOW = 4
+
+class TestSuccessiveHalving(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        labels = random_labels(60)
+        self.cache_paths = cache_feature_windows(labels, labels, WINDOW, self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_walk_forward_splits(self):
+        self.assertEqual(walk_forward_splits(100, n_folds=2), [(50, 75), (75, 100)])
+
+    def test_cache_feature_windows_reuses_files(self):
+        labels = random_labels(60)
+        self.assertEqual(cache_feature_windows(labels, labels, WINDOW, self.tmpdir.name), self.cache_paths)
+        self.assertEqual(np.load(self.cache_paths['sequences']).shape, (60 - WINDOW, WINDOW, 47))
+
+    def test_tree_bracket_in_worker_processes(self):
+        configs = sample_configs('rf', 3)
+        results = successive_halving('rf', configs, self.cache_paths, min_resource=3, max_resource=9,
+                                     eta=3, n_folds=2, max_workers=2)
+        # 3个配置以3棵树评估，最好的1个以9棵树再评估
+        self.assertEqual([resource for _, _, resource in results], [9, 3, 3, 3])
+        self.assertTrue(all(np.isfinite(loss) for loss, _, _ in results))
+        self.assertIn(results[0][1], configs)
+
+    def test_keras_bracket_in_worker_processes(self):
+        configs = [{'lstm_units': (4, 4), 'dense_units': 4, 'batch_size': 16},
+                   {'lstm_units': (8, 4), 'dense_units': 4, 'batch_size': 16}]
+        results = successive_halving('lstm', configs, self.cache_paths, min_resource=1, max_resource=1,
+                                     eta=2, n_folds=1, max_workers=2)
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(np.isfinite(loss) for loss, _, _ in results))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+
+from models import xgboost_model
+from models.xgboost_model import (DMATRIX_CACHE_SIZE, build_quantile_dmatrices, clear_dmatrix_cache,
+                                  time_ordered_split, train_xgboost_model_fast)
+
+class TestQuantileDMatrixCache(unittest.TestCase):
+    def setUp(self):
+        clear_dmatrix_cache()
+        rng = np.random.default_rng(0)
+        self.data = rng.random((200, 4))
+        self.labels = (self.data[:, 0] > 0.5).astype(int)
+
+    def tearDown(self):
+        clear_dmatrix_cache()
+
+    def test_time_ordered_split(self):
+        x_train, _, x_valid, _ = time_ordered_split(self.data, self.labels, 0.25)
+        np.testing.assert_array_equal(x_train, self.data[:150])
+        np.testing.assert_array_equal(x_valid, self.data[150:])
+
+    def test_cache_key_includes_split_and_bins(self):
+        dtrain, dvalid = build_quantile_dmatrices(self.data, self.labels, 0.1, cache_key='v1')
+        self.assertIs(build_quantile_dmatrices(self.data, self.labels, 0.1, cache_key='v1')[0], dtrain)
+        other_train, other_valid = build_quantile_dmatrices(self.data, self.labels, 0.5, cache_key='v1')
+        self.assertEqual((dtrain.num_row(), dvalid.num_row()), (180, 20))
+        self.assertEqual((other_train.num_row(), other_valid.num_row()), (100, 100))
+        self.assertIsNot(build_quantile_dmatrices(self.data, self.labels, 0.1, cache_key='v1', max_bin=16)[0],
+                         dtrain)
+
+    def test_cache_is_bounded(self):
+        for i in range(DMATRIX_CACHE_SIZE + 3):
+            build_quantile_dmatrices(self.data, self.labels, 0.1, cache_key=f'v{i}')
+        self.assertEqual(len(xgboost_model._quantile_dmatrix_cache), DMATRIX_CACHE_SIZE)
+
+    def test_train_fast(self):
+        booster = train_xgboost_model_fast(self.data, self.labels, {'nthread': 1}, num_boost_round=20,
+                                           early_stopping_rounds=5)
+        self.assertGreaterEqual(booster.best_iteration, 0)
+
+if __name__ == '__main__':
+    unittest.main()
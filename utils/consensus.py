@@ -0,0 +1,139 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.draws import BACK_NUMBERS, BACK_PICKS, FRONT_NUMBERS, FRONT_PICKS
+
+logger = logging.getLogger(__name__)
+
+# 种子数超过该值时才启用进程池，较少的种子单进程向量化计算已足够快，进程启动开销反而更大
+PARALLEL_THRESHOLD = 50000
+
+def monte_carlo_consensus(model_specs, weights, n_seeds=10000, seed=None, spiritual_boost=None,
+                          n_batches=20, max_workers=None):
+    """
+    多种子蒙特卡洛共识预测：一次性向量化地模拟大量随机种子下各模型与集成投票的选号结果，
+    统计每个号码被集成选中的频率
+    :param model_specs: {模型名称: 采样规格}，见 _sample_model
+    :param weights: {模型名称: 集成权重}
+    :param n_seeds: 模拟的种子数
+    :param seed: 基础种子，相同的基础种子与种子数得到相同的结果
+    :param spiritual_boost: 灵修增强带来的集成置信度加成，None表示不加成
+    :param n_batches: 分批数，各批次的选中频率用于估计经验区间，也是并行任务的切分单位
+    :param max_workers: 进程数，None时按种子数自动决定是否并行，1表示在当前进程内计算
+    :return: 共识结果字典
+    """
+    names = list(model_specs)
+    weight_vector = np.array([weights.get(name, 0.0) for name in names])
+    n_batches = max(1, min(n_batches, n_seeds))
+    batch_sizes = np.full(n_batches, n_seeds // n_batches)
+    batch_sizes[:n_seeds % n_batches] += 1
+    child_seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    tasks = [(model_specs, names, weight_vector, int(size), spiritual_boost, child)
+             for size, child in zip(batch_sizes, child_seeds)]
+
+    if max_workers == 1 or (max_workers is None and n_seeds < PARALLEL_THRESHOLD):
+        results = [_simulate_batch(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_simulate_batch, *zip(*tasks)))
+
+    front_counts = np.stack([r[0] for r in results])
+    back_counts = np.stack([r[1] for r in results])
+    confidences = np.concatenate([r[2] for r in results])
+    front_frequency = front_counts.sum(axis=0) / n_seeds
+    back_frequency = back_counts.sum(axis=0) / n_seeds
+
+    return {
+        'front_zone': sorted(int(n) + 1 for n in np.argsort(-front_frequency, kind='stable')[:FRONT_PICKS]),
+        'back_zone': sorted(int(n) + 1 for n in np.argsort(-back_frequency, kind='stable')[:BACK_PICKS]),
+        'front_frequencies': _frequency_table(front_frequency, front_counts / batch_sizes[:, None]),
+        'back_frequencies': _frequency_table(back_frequency, back_counts / batch_sizes[:, None]),
+        'confidence': round(float(np.median(confidences)), 3),
+        'confidence_interval': [round(float(v), 3) for v in np.percentile(confidences, [5, 95])],
+        'n_seeds': int(n_seeds)
+    }
+
+def _frequency_table(frequency, batch_frequency):
+    """按选中频率从高到低列出号码，区间为各批次频率的5%与95%分位数"""
+    low, high = np.percentile(batch_frequency, [5, 95], axis=0)
+    return [
+        {'number': int(i) + 1, 'frequency': round(float(frequency[i]), 4),
+         'interval': [round(float(low[i]), 4), round(float(high[i]), 4)]}
+        for i in np.argsort(-frequency, kind='stable')
+    ]
+
+def _simulate_batch(model_specs, names, weight_vector, size, spiritual_boost, seed_sequence):
+    """模拟一批种子，返回 (前区选中次数, 后区选中次数, 集成置信度)"""
+    rng = np.random.default_rng(seed_sequence)
+    front_votes = np.zeros((size, FRONT_NUMBERS))
+    back_votes = np.zeros((size, BACK_NUMBERS))
+    confidence = np.zeros(size)
+    for name, weight in zip(names, weight_vector):
+        front_mask, back_mask, model_confidence = _sample_model(model_specs[name], size, rng)
+        front_votes += weight * front_mask
+        back_votes += weight * back_mask
+        confidence += weight * model_confidence
+
+    # 与 _stacking_ensemble 相同：同票号码随机排序
+    front_pick = _top_k_mask(front_votes + rng.random(front_votes.shape) * 1e-9, FRONT_PICKS)
+    back_pick = _top_k_mask(back_votes + rng.random(back_votes.shape) * 1e-9, BACK_PICKS)
+    if spiritual_boost is not None:
+        confidence = np.minimum(0.95, confidence + spiritual_boost)
+    return front_pick.sum(axis=0), back_pick.sum(axis=0), confidence
+
+def _sample_model(spec, size, rng):
+    """
+    按采样规格批量生成单个模型的选号结果，规格类型：
+    - fixed：号码由导出模型给出，与种子无关，需提供 front_zone / back_zone
+    - weighted：按号码权重不放回抽样（LSTM记忆过滤器），需提供 front_weights / back_weights
+    - pair_attention：以一定概率纳入关联号码对后随机补齐（Transformer注意力），需提供 pairs
+    - odd_even：奇偶各半概率取3:2或2:3后随机抽取（XGBoost统计特征）
+    所有规格都需提供 confidence_range，可选 confidence_scale 与 confidence_cap
+    :return: (前区选中矩阵 (size, 35), 后区选中矩阵 (size, 12), 置信度 (size,))
+    """
+    kind = spec['kind']
+    if kind == 'fixed':
+        front = np.zeros((size, FRONT_NUMBERS))
+        back = np.zeros((size, BACK_NUMBERS))
+        front[:, np.asarray(spec['front_zone']) - 1] = 1.0
+        back[:, np.asarray(spec['back_zone']) - 1] = 1.0
+    elif kind == 'weighted':
+        # Gumbel-top-k：加权不放回抽样的向量化等价形式
+        front = _top_k_mask(np.log(spec['front_weights']) + rng.gumbel(size=(size, FRONT_NUMBERS)), FRONT_PICKS)
+        back = _top_k_mask(np.log(spec['back_weights']) + rng.gumbel(size=(size, BACK_NUMBERS)), BACK_PICKS)
+    elif kind == 'pair_attention':
+        pairs = np.asarray(spec['pairs']) - 1
+        keys = rng.random((size, FRONT_NUMBERS))
+        included = rng.random((size, len(pairs))) > 0.6
+        use_pair = included.any(axis=1) & (rng.random(size) > 0.4)
+        chosen = pairs[np.argmax(np.where(included, rng.random(included.shape), -1.0), axis=1)]
+        rows = np.flatnonzero(use_pair)
+        keys[rows[:, None], chosen[rows]] = 2.0
+        front = _top_k_mask(keys, FRONT_PICKS)
+        back = _top_k_mask(rng.random((size, BACK_NUMBERS)), BACK_PICKS)
+    elif kind == 'odd_even':
+        odd_count = np.where(rng.random(size) < 0.5, 3, 2)[:, None]
+        front = np.zeros((size, FRONT_NUMBERS))
+        front[:, 0::2] = _rank(rng.random((size, (FRONT_NUMBERS + 1) // 2))) < odd_count
+        front[:, 1::2] = _rank(rng.random((size, FRONT_NUMBERS // 2))) < FRONT_PICKS - odd_count
+        back = _top_k_mask(rng.random((size, BACK_NUMBERS)), BACK_PICKS)
+    else:
+        raise ValueError(f"未知的采样规格: {kind}")
+
+    low, high = spec['confidence_range']
+    confidence = rng.uniform(low, high, size) * spec.get('confidence_scale', 1.0)
+    if spec.get('confidence_cap') is not None:
+        confidence = np.minimum(spec['confidence_cap'], confidence)
+    return front, back, confidence
+
+def _top_k_mask(keys, k):
+    """每行取值最大的 k 个位置置1"""
+    mask = np.zeros(keys.shape)
+    np.put_along_axis(mask, np.argpartition(-keys, k - 1, axis=1)[:, :k], 1.0, axis=1)
+    return mask
+
+def _rank(keys):
+    """每行元素从大到小的名次（从0开始）"""
+    return np.argsort(np.argsort(-keys, axis=1), axis=1)
@@ -0,0 +1,123 @@
+import logging
+
+import numpy as np
+
+from utils.draws import BACK_NUMBERS, FRONT_NUMBERS, load_draw_history
+from utils.tickets import popcount
+
+logger = logging.getLogger(__name__)
+
+class DrawIndex:
+    """
+    号码 -> 开奖期位图的倒排索引：每个号码对应一个uint64位图，第i位表示第i期是否开出该号码。
+    前区号码在每期出现的概率约为1/7，稠密位图比期号列表更紧凑，子集与模式查询都化为按字的位运算
+    """
+    
+    def __init__(self, front_zone=None, back_zone=None, dates=None):
+        """
+        :param front_zone: 前区号码，形状为 (期数, 5)，按时间先后排列
+        :param back_zone: 后区号码，形状为 (期数, 2)
+        :param dates: 各期开奖日期
+        """
+        self.n_periods = 0
+        self.front_bitmaps = np.zeros((FRONT_NUMBERS, 0), dtype=np.uint64)
+        self.back_bitmaps = np.zeros((BACK_NUMBERS, 0), dtype=np.uint64)
+        self.dates = np.array([], dtype='datetime64[D]')
+        if front_zone is not None and len(front_zone):
+            self.extend(front_zone, back_zone, dates)
+    
+    @classmethod
+    def from_history(cls, filepath):
+        """从原始开奖数据文件构建索引"""
+        dates, front_zone, back_zone = load_draw_history(filepath)
+        return cls(front_zone, back_zone, dates)
+    
+    def extend(self, front_zone, back_zone, dates=None):
+        """追加新开奖的若干期，只写入新增期对应的位"""
+        front_zone = np.atleast_2d(np.asarray(front_zone, dtype=np.int64))
+        back_zone = np.atleast_2d(np.asarray(back_zone, dtype=np.int64))
+        periods = self.n_periods + np.arange(len(front_zone))
+        self._grow(self.n_periods + len(front_zone))
+        
+        words, bits = periods // 64, (periods % 64).astype(np.uint64)
+        values = np.left_shift(np.uint64(1), bits)
+        np.bitwise_or.at(self.front_bitmaps, (front_zone - 1, words[:, None]), values[:, None])
+        np.bitwise_or.at(self.back_bitmaps, (back_zone - 1, words[:, None]), values[:, None])
+        
+        if dates is None:
+            dates = np.full(len(front_zone), np.datetime64('NaT'), dtype='datetime64[D]')
+        self.dates = np.concatenate([self.dates, np.asarray(dates, dtype='datetime64[D]')])
+        self.n_periods += len(front_zone)
+    
+    def subset_bitmap(self, front_numbers=(), back_numbers=()):
+        """同时包含给定前区与后区号码的期的位图（各号码位图按位与）"""
+        bitmap = self._all_periods()
+        for number in front_numbers:
+            bitmap &= self.front_bitmaps[number - 1]
+        for number in back_numbers:
+            bitmap &= self.back_bitmaps[number - 1]
+        return bitmap
+    
+    def consecutive_bitmap(self, length=3):
+        """前区出现至少 length 个连续号码的期的位图"""
+        bitmap = np.zeros(self.front_bitmaps.shape[1], dtype=np.uint64)
+        run = self.front_bitmaps[:FRONT_NUMBERS - length + 1].copy()
+        for offset in range(1, length):
+            run &= self.front_bitmaps[offset:FRONT_NUMBERS - length + 1 + offset]
+        np.bitwise_or.reduce(run, axis=0, out=bitmap)
+        return bitmap
+    
+    def count(self, bitmap):
+        """位图中的期数"""
+        return int(popcount(bitmap).sum())
+    
+    def periods(self, bitmap, limit=None, latest_first=True):
+        """将位图解码为期序号（从0开始），默认最近的期在前"""
+        words = np.flatnonzero(bitmap)
+        if limit is not None and latest_first:
+            # 只解码末尾足够覆盖 limit 期的字
+            counts = np.cumsum(popcount(bitmap[words[::-1]]))
+            words = words[len(words) - min(int(np.searchsorted(counts, limit)) + 1, len(words)):]
+        flags = np.unpackbits(bitmap[words].view(np.uint8), bitorder='little').reshape(len(words), 64)
+        word_index, bit_index = np.nonzero(flags)
+        indices = words[word_index] * 64 + bit_index
+        if latest_first:
+            indices = indices[::-1]
+        return indices[:limit] if limit is not None else indices
+    
+    def last_period(self, bitmap):
+        """位图中最近的一期，没有时返回None"""
+        nonzero = np.flatnonzero(bitmap)
+        if nonzero.size == 0:
+            return None
+        word = nonzero[-1]
+        return int(word * 64 + int(bitmap[word]).bit_length() - 1)
+    
+    def describe(self, indices):
+        """期序号 -> [{'period': 序号, 'date': 日期}, ...]"""
+        return [
+            {'period': int(i), 'date': None if np.isnat(self.dates[i]) else str(self.dates[i])}
+            for i in indices
+        ]
+    
+    def _all_periods(self):
+        """全部已收录期的位图；位图按容量预留了多余的字，收录范围之后的字保持为0"""
+        bitmap = np.zeros(self.front_bitmaps.shape[1], dtype=np.uint64)
+        full_words, tail = divmod(self.n_periods, 64)
+        bitmap[:full_words] = np.uint64(0xFFFFFFFFFFFFFFFF)
+        if tail:
+            bitmap[full_words] = np.uint64((1 << tail) - 1)
+        return bitmap
+    
+    def _grow(self, n_periods):
+        """按需扩展位图的字数，容量翻倍增长以摊销追加成本"""
+        needed = (n_periods + 63) // 64
+        capacity = self.front_bitmaps.shape[1]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for name in ('front_bitmaps', 'back_bitmaps'):
+            old = getattr(self, name)
+            grown = np.zeros((old.shape[0], new_capacity), dtype=np.uint64)
+            grown[:, :capacity] = old
+            setattr(self, name, grown)
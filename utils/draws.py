@@ -0,0 +1,128 @@
+import csv
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 大乐透号码空间：前区35选5，后区12选2
+FRONT_NUMBERS = 35
+BACK_NUMBERS = 12
+FRONT_PICKS = 5
+BACK_PICKS = 2
+
+# 多标签模式下的标签总数（前区35个号码 + 后区12个号码）
+NUM_LABELS = FRONT_NUMBERS + BACK_NUMBERS
+
+# 原始开奖数据的列名
+DATE_COLUMN = 'Date'
+FRONT_COLUMNS = ['Number1', 'Number2', 'Number3', 'Number4', 'Number5']
+BACK_COLUMNS = ['Bonus1', 'Bonus2']
+
+
+def load_draw_history(filepath):
+    """
+    读取原始开奖数据CSV（列为 Date,Number1-5,Bonus1-2，以#开头的行为注释），
+    号码越界或重复的记录会被跳过
+    :param filepath: 原始数据文件路径
+    :return: (日期数组 datetime64[D], 前区号码 (期数, 5), 后区号码 (期数, 2))，按日期升序、号码升序排列
+    """
+    dates, fronts, backs = [], [], []
+    skipped = 0
+    with open(filepath, 'r', encoding='utf-8') as f:
+        lines = (line for line in f if line.strip() and not line.lstrip().startswith('#'))
+        for row in csv.DictReader(lines):
+            try:
+                front = sorted(int(row[col]) for col in FRONT_COLUMNS)
+                back = sorted(int(row[col]) for col in BACK_COLUMNS)
+                date = np.datetime64(row[DATE_COLUMN].strip(), 'D')
+            except (KeyError, TypeError, ValueError):
+                skipped += 1
+                continue
+            if not _is_valid_draw(front, back):
+                skipped += 1
+                continue
+            dates.append(date)
+            fronts.append(front)
+            backs.append(back)
+
+    if skipped:
+        logger.warning(f"{filepath} 中有 {skipped} 条记录格式错误或号码越界，已跳过")
+
+    dates = np.array(dates, dtype='datetime64[D]')
+    order = np.argsort(dates, kind='stable')
+    front_zone = np.array(fronts, dtype=np.int16).reshape(-1, FRONT_PICKS)[order]
+    back_zone = np.array(backs, dtype=np.int16).reshape(-1, BACK_PICKS)[order]
+    return dates[order], front_zone, back_zone
+
+
+def _is_valid_draw(front, back):
+    """检查号码范围与是否重复"""
+    return (len(set(front)) == FRONT_PICKS and len(set(back)) == BACK_PICKS
+            and 1 <= front[0] and front[-1] <= FRONT_NUMBERS
+            and 1 <= back[0] and back[-1] <= BACK_NUMBERS)
+
+
+def draws_to_multilabel(front_zone, back_zone):
+    """
+    将开奖号码编码为多标签矩阵，前35列对应前区号码，后12列对应后区号码
+    :param front_zone: 前区号码，形状为 (期数, 5)，取值1-35
+    :param back_zone: 后区号码，形状为 (期数, 2)，取值1-12
+    :return: 形状为 (期数, 47) 的0/1矩阵
+    """
+    front_zone = np.asarray(front_zone, dtype=np.intp)
+    back_zone = np.asarray(back_zone, dtype=np.intp)
+    labels = np.zeros((front_zone.shape[0], NUM_LABELS), dtype=np.uint8)
+    rows = np.arange(front_zone.shape[0])[:, None]
+    labels[rows, front_zone - 1] = 1
+    labels[rows, FRONT_NUMBERS + back_zone - 1] = 1
+    return labels
+
+
+def split_multilabel(scores):
+    """
+    将47维多标签输出拆分为前区和后区两部分
+    :param scores: 最后一维为47的概率或得分矩阵
+    :return: (前区得分, 后区得分)
+    """
+    scores = np.asarray(scores)
+    return scores[..., :FRONT_NUMBERS], scores[..., FRONT_NUMBERS:]
+
+
+def build_feature_windows(step_features, labels, window):
+    """
+    按滑动窗口构建模型样本：用前 window 期的特征预测下一期的47维标签
+    :param step_features: 每期的特征，形状为 (期数, 特征数)
+    :param labels: 每期的多标签，形状为 (期数, 47)
+    :param window: 窗口长度
+    :return: (序列输入 (样本数, window, 特征数), 标签 (样本数, 47))
+    """
+    step_features = np.asarray(step_features, dtype=np.float32)
+    n_samples = len(step_features) - window
+    if n_samples <= 0:
+        return (np.zeros((0, window, step_features.shape[1]), dtype=np.float32),
+                np.zeros((0, np.shape(labels)[1]), dtype=np.uint8))
+    # 滑动窗口视图，不复制数据
+    windows = np.lib.stride_tricks.sliding_window_view(step_features, window, axis=0)[:n_samples]
+    return np.ascontiguousarray(windows.transpose(0, 2, 1)), np.asarray(labels)[window:]
+
+
+def window_tree_features(sequences):
+    """
+    将滑动窗口序列压缩为树模型使用的定长特征：窗口内各列的均值（号码出现频率）+ 最近一期的特征
+    :param sequences: 形状为 (样本数, 窗口长度, 特征数) 的序列，前47列为多标签
+    :return: 形状为 (样本数, 2 * 特征数) 的特征矩阵
+    """
+    sequences = np.asarray(sequences)
+    return np.hstack([sequences.mean(axis=1), sequences[:, -1]])
+
+
+def multilabel_log_loss(probabilities, labels):
+    """
+    多标签预测在全部号码上的平均二元交叉熵
+    :param probabilities: 预测概率，形状为 (样本数, 47)
+    :param labels: 0/1标签，形状相同
+    :return: 平均交叉熵
+    """
+    probabilities = np.clip(np.asarray(probabilities, dtype=np.float64), 1e-7, 1 - 1e-7)
+    labels = np.asarray(labels, dtype=np.float64)
+    return float(-np.mean(labels * np.log(probabilities) + (1 - labels) * np.log(1 - probabilities)))
@@ -0,0 +1,241 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+
+from utils.draws import BACK_PICKS, FRONT_PICKS, draws_to_multilabel, load_draw_history
+from utils.features import FEATURE_COLUMNS, FEATURE_SCALES, draw_features, feature_column
+
+logger = logging.getLogger(__name__)
+
+# 基础列：开奖日期、号码与47维多标签；其余列为 FEATURE_COLUMNS 中的各形态特征
+BASE_COLUMNS = ('dates', 'front_zone', 'back_zone', 'labels')
+STORE_COLUMNS = BASE_COLUMNS + FEATURE_COLUMNS
+
+MANIFEST_FILE = 'manifest.json'
+
+def feature_version():
+    """特征版本：特征列、缩放系数与特征计算代码的联合哈希，任一变化都使已有的存储失效"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(STORE_COLUMNS).encode('utf-8'))
+    digest.update(FEATURE_SCALES.tobytes())
+    digest.update(inspect.getsource(draw_features).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def build_columns(front_zone, back_zone, dates=None):
+    """
+    计算若干期的全部存储列
+    :param front_zone: 前区号码，形状为 (期数, 5)
+    :param back_zone: 后区号码，形状为 (期数, 2)
+    :param dates: 各期开奖日期
+    :return: {列名: 数组}，列名见 STORE_COLUMNS
+    """
+    front_zone = np.asarray(front_zone, dtype=np.int16).reshape(-1, FRONT_PICKS)
+    back_zone = np.asarray(back_zone, dtype=np.int16).reshape(-1, BACK_PICKS)
+    if dates is None:
+        dates = np.full(len(front_zone), np.datetime64('NaT'), dtype='datetime64[D]')
+    features = draw_features(front_zone, back_zone)
+    columns = {
+        'dates': np.asarray(dates, dtype='datetime64[D]'),
+        'front_zone': front_zone,
+        'back_zone': back_zone,
+        'labels': draws_to_multilabel(front_zone, back_zone)
+    }
+    columns.update({name: np.ascontiguousarray(feature_column(features, name)) for name in FEATURE_COLUMNS})
+    return columns
+
+class FeatureStore:
+    """
+    按期存储的列式特征库：每次追加写出一个新分段，分段内每列一个文件，已写出的分段不再改动。
+    未压缩的分段为npy文件，读取时以内存映射方式只打开所需的列；
+    compress=True 时分段写为压缩的npz，按列解压读取
+    """
+
+    def __init__(self, root, compress=False):
+        """
+        :param root: 存储目录
+        :param compress: 新分段是否写为压缩的npz
+        """
+        self.root = root
+        self.compress = compress
+        self.version = feature_version()
+        self.manifest = self._load_manifest()
+
+    @property
+    def n_periods(self):
+        return self.manifest['n_periods']
+
+    def sync(self, dates, front_zone, back_zone):
+        """
+        与完整的开奖历史同步：只为新增的期计算并追加特征；已收录的期与历史不一致时整体重建
+        :param dates: 全部开奖日期，按时间先后排列
+        :param front_zone: 全部前区号码，形状为 (期数, 5)
+        :param back_zone: 全部后区号码，形状为 (期数, 2)
+        :return: 新追加的期数
+        """
+        stored = self.n_periods
+        if stored > len(front_zone) or (stored and not self._matches(dates, front_zone, back_zone)):
+            logger.warning(f"特征库 {self.root} 与开奖历史不一致，重建")
+            self.clear()
+            stored = 0
+        return self.append(front_zone[stored:], back_zone[stored:], dates[stored:])
+
+    def append(self, front_zone, back_zone, dates=None):
+        """
+        追加若干期并计算其特征
+        :param front_zone: 前区号码，形状为 (期数, 5)，按时间先后排列
+        :param back_zone: 后区号码，形状为 (期数, 2)
+        :param dates: 各期开奖日期
+        :return: 追加的期数
+        """
+        if len(front_zone) == 0:
+            return 0
+
+        columns = build_columns(front_zone, back_zone, dates)
+        start, stop = self.n_periods, self.n_periods + len(front_zone)
+        name = f'segment_{start:09d}_{stop:09d}'
+        segment_dir = os.path.join(self.root, self.version)
+        os.makedirs(segment_dir, exist_ok=True)
+        if self.compress:
+            path = os.path.join(segment_dir, f'{name}.npz')
+            with open(path + '.tmp', 'wb') as f:
+                np.savez_compressed(f, **columns)
+            os.replace(path + '.tmp', path)
+        else:
+            path = os.path.join(segment_dir, name)
+            os.makedirs(path, exist_ok=True)
+            for column, values in columns.items():
+                np.save(os.path.join(path, f'{column}.npy'), values)
+
+        self.manifest['segments'].append({'path': os.path.relpath(path, self.root), 'start': start, 'stop': stop})
+        self.manifest['n_periods'] = stop
+        self._save_manifest()
+        logger.info(f"特征库追加 {stop - start} 期，共 {stop} 期")
+        return stop - start
+
+    def read(self, columns, start=0, stop=None):
+        """
+        按列读取 [start, stop) 期
+        :param columns: 列名列表，见 STORE_COLUMNS
+        :param start: 起始期序号
+        :param stop: 结束期序号，None表示到最新一期
+        :return: {列名: 数组}；范围落在单个未压缩分段内时为只读的内存映射数组
+        """
+        unknown = set(columns) - set(STORE_COLUMNS)
+        if unknown:
+            raise KeyError(f"特征库中不存在列: {sorted(unknown)}")
+        stop = self.n_periods if stop is None else min(stop, self.n_periods)
+        parts = {column: [] for column in columns}
+        for segment in self.manifest['segments']:
+            if segment['stop'] <= start or segment['start'] >= stop:
+                continue
+            lo, hi = max(start, segment['start']) - segment['start'], min(stop, segment['stop']) - segment['start']
+            for column, values in self._open_segment(segment, columns).items():
+                parts[column].append(values[lo:hi])
+
+        result = {}
+        for column in columns:
+            if len(parts[column]) == 1:
+                result[column] = parts[column][0]
+            elif parts[column]:
+                result[column] = np.concatenate(parts[column])
+            else:
+                result[column] = self._empty_column(column)
+        return result
+
+    def feature_matrix(self, columns=FEATURE_COLUMNS, start=0, stop=None, normalize=False):
+        """
+        读取若干特征列并拼成矩阵
+        :return: 形状为 (期数, 列数) 的float32矩阵，normalize=True 时按 FEATURE_SCALES 缩放
+        """
+        values = self.read(columns, start, stop)
+        matrix = np.stack([values[column] for column in columns], axis=1).astype(np.float32)
+        if normalize:
+            matrix /= FEATURE_SCALES[[FEATURE_COLUMNS.index(column) for column in columns]]
+        return matrix
+
+    def compact(self):
+        """将全部分段合并为一个，减少追加多次后的文件数"""
+        if len(self.manifest['segments']) <= 1:
+            return
+        columns = self.read(STORE_COLUMNS)
+        old_segments = self.manifest['segments']
+        self.manifest = self._empty_manifest()
+        self.append(columns['front_zone'], columns['back_zone'], columns['dates'])
+        for segment in old_segments:
+            self._remove(os.path.join(self.root, segment['path']))
+
+    def clear(self):
+        """删除全部数据"""
+        if os.path.isdir(self.root):
+            for entry in os.listdir(self.root):
+                self._remove(os.path.join(self.root, entry))
+        self.manifest = self._empty_manifest()
+
+    def _open_segment(self, segment, columns):
+        path = os.path.join(self.root, segment['path'])
+        if path.endswith('.npz'):
+            with np.load(path) as archive:
+                return {column: archive[column] for column in columns}
+        return {column: np.load(os.path.join(path, f'{column}.npy'), mmap_mode='r') for column in columns}
+
+    def _matches(self, dates, front_zone, back_zone):
+        """已收录的最后一期与数据文件中对应的一期是否一致"""
+        last = self.n_periods - 1
+        stored = self.read(['dates', 'front_zone', 'back_zone'], last, last + 1)
+        return (np.array_equal(stored['front_zone'][0], front_zone[last])
+                and np.array_equal(stored['back_zone'][0], back_zone[last])
+                and (stored['dates'][0] == dates[last] or np.isnat(stored['dates'][0])))
+
+    def _empty_column(self, column):
+        if column == 'dates':
+            return np.array([], dtype='datetime64[D]')
+        if column in ('front_zone', 'back_zone'):
+            return np.zeros((0, FRONT_PICKS if column == 'front_zone' else BACK_PICKS), dtype=np.int16)
+        if column == 'labels':
+            return draws_to_multilabel(np.zeros((0, FRONT_PICKS)), np.zeros((0, BACK_PICKS)))
+        return np.zeros(0, dtype=np.float32)
+
+    def _empty_manifest(self):
+        return {'version': self.version, 'n_periods': 0, 'segments': []}
+
+    def _load_manifest(self):
+        path = os.path.join(self.root, MANIFEST_FILE)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == self.version:
+                return manifest
+            logger.info(f"特征库 {self.root} 的版本已变化，旧数据将被重建")
+            self.clear()
+        return self._empty_manifest()
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, MANIFEST_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def _remove(self, path):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+def open_feature_store(root, history_file, compress=False):
+    """
+    打开特征库并与原始开奖数据同步
+    :return: FeatureStore；目录不可写或数据文件不可读时返回None
+    """
+    try:
+        store = FeatureStore(root, compress)
+        store.sync(*load_draw_history(history_file))
+        return store
+    except (OSError, ValueError) as e:
+        logger.error(f"打开特征库失败: {str(e)}")
+        return None
@@ -0,0 +1,79 @@
+import numpy as np
+
+from utils.draws import BACK_NUMBERS, BACK_PICKS, FRONT_NUMBERS, FRONT_PICKS
+
+# 前区大于该值为大号，后区大于 BACK_LARGE_THRESHOLD 为大号
+FRONT_LARGE_THRESHOLD = 18
+BACK_LARGE_THRESHOLD = 6
+
+# 特征矩阵的列，顺序即列号
+FEATURE_COLUMNS = (
+    'odd_count',          # 前区奇数个数
+    'even_count',         # 前区偶数个数
+    'large_count',        # 前区大号个数
+    'small_count',        # 前区小号个数
+    'front_sum',          # 前区和值
+    'back_sum',           # 后区和值
+    'sum_value',          # 前后区总和值
+    'span',               # 前区跨度
+    'consecutive_pairs',  # 前区相邻号码差为1的对数
+    'evenness',           # 前区间距的分布均匀度 1/(1+方差)
+    'back_odd_count',     # 后区奇数个数
+    'back_large_count',   # 后区大号个数
+    'back_span'           # 后区跨度
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_COLUMNS)}
+
+# 各列的取值上限，用于缩放到 [0, 1] 后与多标签一起作为模型输入
+FEATURE_SCALES = np.array([
+    FRONT_PICKS, FRONT_PICKS, FRONT_PICKS, FRONT_PICKS,
+    sum(range(FRONT_NUMBERS - FRONT_PICKS + 1, FRONT_NUMBERS + 1)),
+    BACK_NUMBERS + BACK_NUMBERS - 1,
+    sum(range(FRONT_NUMBERS - FRONT_PICKS + 1, FRONT_NUMBERS + 1)) + BACK_NUMBERS + BACK_NUMBERS - 1,
+    FRONT_NUMBERS - 1,
+    FRONT_PICKS - 1,
+    1,
+    BACK_PICKS, BACK_PICKS,
+    BACK_NUMBERS - 1
+], dtype=np.float32)
+
+def draw_features(front_zone, back_zone, normalize=False):
+    """
+    一次向量化计算每期（或每注）的号码形态特征
+    :param front_zone: 前区号码，形状为 (期数, 5) 或单注 (5,)
+    :param back_zone: 后区号码，形状为 (期数, 2) 或单注 (2,)
+    :param normalize: 是否按 FEATURE_SCALES 缩放到 [0, 1]
+    :return: 形状为 (期数, len(FEATURE_COLUMNS)) 的float32特征矩阵，单注输入时为 (len(FEATURE_COLUMNS),)
+    """
+    single = np.ndim(front_zone) == 1
+    front = np.sort(np.atleast_2d(np.asarray(front_zone, dtype=np.int64)), axis=1)
+    back = np.sort(np.atleast_2d(np.asarray(back_zone, dtype=np.int64)), axis=1)
+
+    odd_count = (front & 1).sum(axis=1)
+    large_count = (front > FRONT_LARGE_THRESHOLD).sum(axis=1)
+    front_sum = front.sum(axis=1)
+    back_sum = back.sum(axis=1)
+    gaps = np.diff(front, axis=1)
+
+    features = np.empty((len(front), len(FEATURE_COLUMNS)), dtype=np.float32)
+    features[:, FEATURE_INDEX['odd_count']] = odd_count
+    features[:, FEATURE_INDEX['even_count']] = front.shape[1] - odd_count
+    features[:, FEATURE_INDEX['large_count']] = large_count
+    features[:, FEATURE_INDEX['small_count']] = front.shape[1] - large_count
+    features[:, FEATURE_INDEX['front_sum']] = front_sum
+    features[:, FEATURE_INDEX['back_sum']] = back_sum
+    features[:, FEATURE_INDEX['sum_value']] = front_sum + back_sum
+    features[:, FEATURE_INDEX['span']] = front[:, -1] - front[:, 0]
+    features[:, FEATURE_INDEX['consecutive_pairs']] = (gaps == 1).sum(axis=1)
+    features[:, FEATURE_INDEX['evenness']] = 1 / (1 + gaps.var(axis=1))
+    features[:, FEATURE_INDEX['back_odd_count']] = (back & 1).sum(axis=1)
+    features[:, FEATURE_INDEX['back_large_count']] = (back > BACK_LARGE_THRESHOLD).sum(axis=1)
+    features[:, FEATURE_INDEX['back_span']] = back[:, -1] - back[:, 0]
+
+    if normalize:
+        features /= FEATURE_SCALES
+    return features[0] if single else features
+
+def feature_column(features, name):
+    """按列名取出特征矩阵中的一列"""
+    return np.asarray(features)[..., FEATURE_INDEX[name]]
@@ -0,0 +1,232 @@
+import logging
+import os
+import tempfile
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+
+from utils.draws import BACK_PICKS, FRONT_NUMBERS, FRONT_PICKS, NUM_LABELS, draws_to_multilabel
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:
+    shared_memory = None
+
+logger = logging.getLogger(__name__)
+
+# 同时维护的半衰期（期数）：短期、中期、长期热度
+HALF_LIVES = (10, 30, 100)
+
+# 共享内存块头部：[写序号（写入过程中为奇数）, 已收录期数, 已收录开奖的CRC32指纹]
+HEADER_SIZE = 3
+
+# 读取快照时等待写入完成的最大重试次数
+SNAPSHOT_RETRIES = 100000
+
+# 批量追加时每块处理的期数
+EXTEND_BATCH = 65536
+
+class HotColdScorer:
+    """
+    指数衰减的号码热度：每个半衰期 h 对应衰减系数 d = 0.5^(1/h)，每追加一期所有得分乘以 d、开出的号码加1，
+    单期更新只需 O(半衰期数 × 47)，无需回看窗口。
+    指定 shm_name 时状态存放在命名共享内存中，同一主机上的多个进程（数据分析与预测接口）共用一份得分：
+    写入方持有文件锁并以写序号实现顺序锁，读取方在写序号为偶数且读前后不变时得到一致的快照
+    """
+
+    def __init__(self, half_lives=HALF_LIVES, shm_name=None):
+        """
+        :param half_lives: 半衰期列表（期数）
+        :param shm_name: 共享内存块名称，None表示使用进程内数组
+        """
+        self.half_lives = tuple(half_lives)
+        self.decay = 0.5 ** (1 / np.asarray(self.half_lives, dtype=np.float64))
+        self.shm_name = shm_name
+        self._shm = None
+        size = HEADER_SIZE + len(self.half_lives) * NUM_LABELS
+        if shm_name is None:
+            state = np.zeros(size)
+        else:
+            self._shm = _open_shared_memory(shm_name, size * 8)
+            state = np.ndarray(size, dtype=np.float64, buffer=self._shm.buf)
+        self._header = state[:HEADER_SIZE]
+        self._scores = state[HEADER_SIZE:].reshape(len(self.half_lives), NUM_LABELS)
+
+    @property
+    def n_periods(self):
+        return int(self._header[1])
+
+    def update(self, front, back):
+        """追加一期开奖"""
+        index = np.concatenate([np.asarray(front) - 1, np.asarray(back) - 1 + FRONT_NUMBERS])
+        with self._writing():
+            self._scores *= self.decay[:, None]
+            self._scores[:, index] += 1
+            self._header[1] += 1
+            self._header[2] = _history_fingerprint(front, back, int(self._header[2]))
+
+    def extend(self, front_zone, back_zone):
+        """
+        批量追加若干期
+        :param front_zone: 前区号码，形状为 (期数, 5)，按时间先后排列
+        :param back_zone: 后区号码，形状为 (期数, 2)
+        """
+        with self._writing():
+            self._accumulate(front_zone, back_zone)
+
+    def sync(self, front_zone, back_zone):
+        """
+        与完整的开奖历史同步，只追加尚未收录的期；收录期数与读取期数在同一把写锁内确定，
+        多个进程同时同步时不会重复计入。历史比已收录的期数少、或已收录部分的指纹与历史对应的前缀不符
+        （开奖数据被改写）时从头重建
+        :param front_zone: 全部前区号码，形状为 (期数, 5)
+        :param back_zone: 全部后区号码，形状为 (期数, 2)
+        :return: 新追加的期数
+        """
+        with self._writing():
+            stored = self.n_periods
+            if stored > len(front_zone) or \
+                    _history_fingerprint(front_zone[:stored], back_zone[:stored]) != int(self._header[2]):
+                self._scores[:] = 0
+                self._header[1] = self._header[2] = stored = 0
+            self._accumulate(front_zone[stored:], back_zone[stored:])
+            return len(front_zone) - stored
+
+    def _accumulate(self, front_zone, back_zone):
+        """m 期的贡献为 Σ d^(m-1-j) · 第j期的多标签，按块化为一次矩阵乘法"""
+        front_zone = np.asarray(front_zone).reshape(-1, FRONT_PICKS)
+        back_zone = np.asarray(back_zone).reshape(-1, BACK_PICKS)
+        for start in range(0, len(front_zone), EXTEND_BATCH):
+            labels = draws_to_multilabel(front_zone[start:start + EXTEND_BATCH],
+                                         back_zone[start:start + EXTEND_BATCH]).astype(np.float64)
+            ages = np.arange(len(labels) - 1, -1, -1)
+            self._scores *= (self.decay ** len(labels))[:, None]
+            self._scores += (self.decay[:, None] ** ages) @ labels
+            self._header[1] += len(labels)
+        self._header[2] = _history_fingerprint(front_zone, back_zone, int(self._header[2]))
+
+    def snapshot(self):
+        """
+        读取一致的状态快照
+        :return: (已收录期数, 得分数组 (半衰期数, 47) 的副本)
+        """
+        for _ in range(SNAPSHOT_RETRIES):
+            sequence = self._header[0]
+            if sequence % 2:
+                continue
+            n_periods, scores = int(self._header[1]), self._scores.copy()
+            if self._header[0] == sequence:
+                return n_periods, scores
+        # 写入方异常退出时写序号可能停在奇数，此时返回当前内容
+        logger.warning(f"共享内存块 {self.shm_name} 的写序号未复位，返回未加锁的快照")
+        return int(self._header[1]), self._scores.copy()
+
+    def rates(self):
+        """
+        各号码的指数加权出现频率（衰减得分除以总权重），可直接与理论频率 5/35、2/12 比较
+        :return: 形状为 (半衰期数, 47) 的数组
+        """
+        n_periods, scores = self.snapshot()
+        total_weight = (1 - self.decay ** n_periods) / (1 - self.decay)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(total_weight[:, None] > 0, scores / total_weight[:, None], 0.0)
+
+    def rankings(self, half_life=None, hot_count=10, cold_count=6, back_hot_count=5, back_cold_count=4):
+        """
+        热号与冷号排名
+        :param half_life: 使用的半衰期，默认取中间一个
+        :return: {'hot_front', 'cold_front', 'hot_back', 'cold_back'}，热号按得分降序、冷号按得分升序，同分时号码小者在前
+        """
+        if half_life is None:
+            half_life = self.half_lives[len(self.half_lives) // 2]
+        rates = self.rates()[self.half_lives.index(half_life)]
+        front, back = rates[:FRONT_NUMBERS], rates[FRONT_NUMBERS:]
+        hot_front = np.lexsort((np.arange(front.size), -front))
+        hot_back = np.lexsort((np.arange(back.size), -back))
+        cold_front = np.lexsort((np.arange(front.size), front))
+        cold_back = np.lexsort((np.arange(back.size), back))
+        return {
+            'hot_front': (hot_front[:hot_count] + 1).tolist(),
+            'cold_front': (cold_front[:cold_count] + 1).tolist(),
+            'hot_back': (hot_back[:back_hot_count] + 1).tolist(),
+            'cold_back': (cold_back[:back_cold_count] + 1).tolist()
+        }
+
+    def close(self):
+        """断开与共享内存的连接，不删除内存块"""
+        if self._shm is not None:
+            self._header = self._scores = None
+            self._shm.close()
+            self._shm = None
+
+    def unlink(self):
+        """删除共享内存块"""
+        if self.shm_name is not None and shared_memory is not None:
+            self.close()
+            try:
+                block = shared_memory.SharedMemory(name=self.shm_name)
+                block.close()
+                block.unlink()
+            except FileNotFoundError:
+                pass
+
+    @contextmanager
+    def _writing(self):
+        """写入期间持有文件锁，写序号先后各加1"""
+        with _writer_lock(self.shm_name):
+            self._header[0] += 1
+            try:
+                yield
+            finally:
+                self._header[0] += 1
+
+def _history_fingerprint(front_zone, back_zone, crc=0):
+    """
+    开奖号码的CRC32指纹，可在已有指纹上接着计算：前缀的指纹接着计算新增的期，等于全部期数的指纹
+    :param crc: 此前各期的指纹
+    :return: 0 到 2^32-1 的整数，可精确存入 float64 头部
+    """
+    draws = np.concatenate([np.asarray(front_zone).reshape(-1, FRONT_PICKS),
+                            np.asarray(back_zone).reshape(-1, BACK_PICKS)], axis=1)
+    return zlib.crc32(np.ascontiguousarray(draws, dtype='<i2').tobytes(), crc)
+
+def _open_shared_memory(name, size):
+    """连接已有的共享内存块，不存在时创建（初始为全0）"""
+    if shared_memory is None:
+        raise OSError("当前环境不支持共享内存")
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        try:
+            block = shared_memory.SharedMemory(name=name, create=True, size=size)
+            np.ndarray(size // 8, dtype=np.float64, buffer=block.buf)[:] = 0
+        except FileExistsError:
+            block = shared_memory.SharedMemory(name=name)
+    # 内存块的生命周期不随任何一个进程结束，取消资源跟踪器在进程退出时的自动删除
+    try:
+        resource_tracker.unregister(block._name, 'shared_memory')
+    except (AttributeError, KeyError):
+        pass
+    if block.size < size:
+        block.close()
+        raise OSError(f"共享内存块 {name} 的大小与半衰期配置不符")
+    return block
+
+@contextmanager
+def _writer_lock(shm_name):
+    """共享内存的写入方互斥；进程内数组或不支持文件锁的平台不加锁"""
+    if shm_name is None or fcntl is None:
+        yield
+        return
+    with open(os.path.join(tempfile.gettempdir(), f'{shm_name}.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,186 @@
+import itertools
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.draws import BACK_NUMBERS, BACK_PICKS, FRONT_NUMBERS, FRONT_PICKS
+from utils.tickets import popcount
+
+logger = logging.getLogger(__name__)
+
+# 候选数 × 位图字数超过该值时才分发到进程池计数
+PARALLEL_THRESHOLD = 20000000
+
+# 单次计数的候选数，控制中间位图的内存占用
+COUNT_BATCH = 4096
+
+# 默认最小支持度。号码随机开出时前区二元组的期望支持度约0.0168、前后区二元组约0.0238，
+# 阈值低于这些值时几乎所有二元组都会被判为频繁，默认值取在其上方
+MIN_SUPPORT = 0.03
+
+# 显著性检验的总体水平，按同形态项集的个数做Bonferroni校正
+SIGNIFICANCE_LEVEL = 0.05
+
+class FrequentItemsetMiner:
+    """
+    开奖历史的频繁项集挖掘。项为前区号码（0-34）与后区号码（35-46），
+    支持度由 DrawIndex 的纵向位图按位与后计数得到，候选按 Apriori 规则由上一层频繁项集连接生成，
+    含有非频繁子集的候选直接剪枝。已计数候选（含刚好不频繁的负边界）的支持度被保留，
+    追加开奖后只需在新增期上累加，新进入频繁集合的项集才需在全部历史上重新计数
+    """
+    
+    def __init__(self, min_support=MIN_SUPPORT, max_size=3, max_workers=None):
+        """
+        :param min_support: 最小支持度（占总期数的比例）
+        :param max_size: 项集最大长度
+        :param max_workers: 计数进程数
+        """
+        self.min_support = min_support
+        self.max_size = max_size
+        self.max_workers = max_workers
+        self.counted_periods = 0
+        self.supports = {}
+        self.frequent = {}
+    
+    def fit(self, index):
+        """在索引的全部历史上挖掘"""
+        self.counted_periods = 0
+        self.supports = {}
+        return self.update(index)
+    
+    def update(self, index):
+        """索引追加新开奖后增量更新：已跟踪项集只在新增期上计数"""
+        bitmaps = _item_bitmaps(index)
+        if self.supports and index.n_periods > self.counted_periods:
+            tracked = list(self.supports)
+            delta = _count_supports(bitmaps, tracked, self.counted_periods, index.n_periods, self.max_workers)
+            for itemset, count in zip(tracked, delta):
+                self.supports[itemset] += int(count)
+        self.counted_periods = index.n_periods
+        
+        threshold = max(1, math.ceil(self.min_support * index.n_periods))
+        candidates = [(item,) for item in range(len(bitmaps))]
+        self.frequent = {}
+        for size in range(1, self.max_size + 1):
+            self._count_new(bitmaps, candidates, index.n_periods)
+            level = sorted(c for c in candidates if self.supports[c] >= threshold)
+            if not level:
+                break
+            self.frequent.update((c, self.supports[c]) for c in level)
+            candidates = _apriori_candidates(level, set(level))
+        return self
+    
+    def itemsets(self, size=None, limit=None, n_periods=None):
+        """
+        频繁项集列表，按支持度从高到低排列
+        :param size: 只返回指定长度的项集
+        :param limit: 返回数量上限
+        :param n_periods: 总期数，用于计算支持度比例、提升度与显著性，默认为已计数期数
+        :return: [{'front': [...], 'back': [...], 'support_count': 次数, 'support': 比例, 'lift': 提升度,
+                   'z_score': 相对随机期望的标准分, 'p_value': 单侧p值, 'significant': 校正后是否显著}, ...]
+        """
+        n_periods = n_periods or self.counted_periods
+        selected = [(itemset, count) for itemset, count in self.frequent.items()
+                    if size is None or len(itemset) == size]
+        selected.sort(key=lambda item: (-item[1], item[0]))
+        results = []
+        for itemset, count in selected[:limit]:
+            front = [i + 1 for i in itemset if i < FRONT_NUMBERS]
+            back = [i - FRONT_NUMBERS + 1 for i in itemset if i >= FRONT_NUMBERS]
+            support = count / n_periods if n_periods else 0.0
+            expected = _expected_support(len(front), len(back))
+            z_score, p_value = _support_significance(count, n_periods, expected)
+            results.append({
+                'front': front,
+                'back': back,
+                'support_count': int(count),
+                'support': round(support, 6),
+                'lift': round(support / expected, 4),
+                'z_score': round(z_score, 4),
+                'p_value': p_value,
+                'significant': p_value < SIGNIFICANCE_LEVEL / _itemset_shapes(len(front), len(back))
+            })
+        return results
+    
+    def _count_new(self, bitmaps, candidates, n_periods):
+        """在全部历史上为尚未跟踪的候选计数"""
+        new = [c for c in candidates if c not in self.supports]
+        if new:
+            counts = _count_supports(bitmaps, new, 0, n_periods, self.max_workers)
+            self.supports.update(zip(new, (int(c) for c in counts)))
+
+def _item_bitmaps(index):
+    """按项编号排列的位图：前区35行在前，后区12行在后"""
+    return np.concatenate([index.front_bitmaps, index.back_bitmaps])
+
+def _apriori_candidates(level, frequent):
+    """连接前缀相同的频繁项集生成下一层候选，剪去含非频繁子集或超出单注号码数的候选"""
+    candidates = []
+    for i, left in enumerate(level):
+        for right in level[i + 1:]:
+            if left[:-1] != right[:-1]:
+                break
+            candidate = left + (right[-1],)
+            back_count = sum(item >= FRONT_NUMBERS for item in candidate)
+            if back_count > BACK_PICKS or len(candidate) - back_count > FRONT_PICKS:
+                continue
+            if all(subset in frequent for subset in itertools.combinations(candidate, len(candidate) - 1)):
+                candidates.append(candidate)
+    return candidates
+
+def _count_supports(bitmaps, candidates, start_period, end_period, max_workers=None):
+    """统计各候选在 [start_period, end_period) 期内同时出现的次数"""
+    first_word, last_word = start_period // 64, (end_period + 63) // 64
+    window = bitmaps[:, first_word:last_word].copy()
+    if window.size and start_period % 64:
+        # 清除起始字中早于 start_period 的位
+        window[:, 0] &= ~np.uint64((1 << (start_period % 64)) - 1)
+    
+    # 按项集长度分组成批，每批内逐列按位与
+    order = sorted(range(len(candidates)), key=lambda i: len(candidates[i]))
+    batches = []
+    for _, group in itertools.groupby(order, key=lambda i: len(candidates[i])):
+        group = list(group)
+        batches.extend(group[i:i + COUNT_BATCH] for i in range(0, len(group), COUNT_BATCH))
+    batch_items = [[candidates[i] for i in batch] for batch in batches]
+    
+    if max_workers == 1 or len(candidates) * window.shape[1] < PARALLEL_THRESHOLD:
+        counts = [_count_batch(window, items) for items in batch_items]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            counts = list(executor.map(_count_batch, [window] * len(batch_items), batch_items))
+    
+    supports = np.zeros(len(candidates), dtype=np.int64)
+    for batch, batch_counts in zip(batches, counts):
+        supports[batch] = batch_counts
+    return supports
+
+def _count_batch(window, candidates):
+    """一批等长候选的支持度：逐列按位与后统计置位数"""
+    items = np.array(candidates, dtype=np.int64)
+    intersection = window[items[:, 0]]
+    for column in range(1, items.shape[1]):
+        intersection = intersection & window[items[:, column]]
+    return popcount(intersection).sum(axis=1)
+
+def _expected_support(front_count, back_count):
+    """各号码独立且等概率时项集的期望支持度"""
+    front = math.comb(FRONT_NUMBERS - front_count, FRONT_PICKS - front_count) / math.comb(FRONT_NUMBERS, FRONT_PICKS)
+    back = math.comb(BACK_NUMBERS - back_count, BACK_PICKS - back_count) / math.comb(BACK_NUMBERS, BACK_PICKS)
+    return front * back
+
+def _itemset_shapes(front_count, back_count):
+    """含指定个数前区、后区号码的项集总数，即同时检验的假设个数"""
+    return math.comb(FRONT_NUMBERS, front_count) * math.comb(BACK_NUMBERS, back_count)
+
+def _support_significance(count, n_periods, expected):
+    """
+    出现次数相对随机期望的单侧检验，二项分布按正态近似
+    :return: (标准分, 出现次数不低于观测值的概率)
+    """
+    if not n_periods:
+        return 0.0, 1.0
+    z_score = (count - n_periods * expected) / math.sqrt(n_periods * expected * (1 - expected))
+    return z_score, 0.5 * math.erfc(z_score / math.sqrt(2))
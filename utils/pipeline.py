@@ -0,0 +1,208 @@
+import hashlib
+import importlib.util
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+class Stage:
+    """流水线中的一个阶段：读取输入文件、写出输出文件"""
+
+    def __init__(self, name, func, inputs=(), outputs=(), params=None, deps=()):
+        """
+        :param name: 阶段名称
+        :param func: 顶层函数，调用方式为 func(inputs, outputs, **params)，需可被子进程序列化
+        :param inputs: 输入文件路径列表
+        :param outputs: 输出文件路径列表
+        :param params: 额外参数，参数变化同样会触发重新执行
+        :param deps: 阶段函数用到的模块名列表（如 'models.lstm_model'，含其间接导入的项目内模块），
+                     模块源文件变化同样会触发重新执行
+        """
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.deps = list(deps)
+
+class Pipeline:
+    """
+    基于内容哈希的增量DAG执行器
+    阶段间的依赖由输入输出文件自动推断；只有输入内容、参数或代码发生变化的阶段才重新执行，
+    互不依赖的分支在进程池中并行运行
+    """
+
+    def __init__(self, stages, manifest_path='.pipeline/manifest.json', max_workers=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.manifest_path = manifest_path
+        self.max_workers = max_workers
+        self.dependencies = self._infer_dependencies()
+
+    def run(self, force=()):
+        """
+        执行流水线
+        :param force: 强制重新执行的阶段名称
+        :return: 各阶段的执行结果 {阶段名: 'executed' | 'skipped'}
+        """
+        manifest = self._load_manifest()
+        results = {}
+        durations = {}
+        pending = set(self.stages)
+        running = {}
+
+        # 阶段会训练TensorFlow模型，主进程已加载TensorFlow时fork出的子进程可能死锁，改用spawn启动
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as executor:
+            while pending or running:
+                # 依赖全部完成的阶段即可调度
+                ready = [name for name in pending if self.dependencies[name] <= set(results)]
+                for name in sorted(ready):
+                    pending.remove(name)
+                    stage = self.stages[name]
+                    fingerprint = self._fingerprint(stage)
+                    if name not in force and self._is_up_to_date(stage, fingerprint, manifest):
+                        results[name] = 'skipped'
+                        logger.info(f"阶段 {name} 输入未变化，跳过")
+                        continue
+                    logger.info(f"阶段 {name} 开始执行")
+                    future = executor.submit(_run_stage, stage.func, stage.inputs, stage.outputs, stage.params)
+                    running[future] = (name, fingerprint)
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, fingerprint = running.pop(future)
+                    durations[name] = future.result()
+                    stage = self.stages[name]
+                    manifest[name] = {
+                        'fingerprint': fingerprint,
+                        'outputs': {path: file_hash(path) for path in stage.outputs}
+                    }
+                    self._save_manifest(manifest)
+                    results[name] = 'executed'
+                    logger.info(f"阶段 {name} 完成，耗时 {durations[name]:.2f} 秒")
+
+        total = sum(durations.values())
+        logger.info(f"流水线完成：执行 {len(durations)} 个阶段，跳过 {len(results) - len(durations)} 个，"
+                    f"阶段累计耗时 {total:.2f} 秒")
+        return results
+
+    def _infer_dependencies(self):
+        """某阶段的输入若是另一阶段的输出，则依赖该阶段"""
+        producers = {}
+        for stage in self.stages.values():
+            for path in stage.outputs:
+                if path in producers:
+                    raise ValueError(f"输出文件 {path} 被多个阶段写出")
+                producers[path] = stage.name
+
+        dependencies = {name: {producers[path] for path in stage.inputs if path in producers}
+                        for name, stage in self.stages.items()}
+        self._check_acyclic(dependencies)
+        return dependencies
+
+    def _check_acyclic(self, dependencies):
+        visiting, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"流水线存在循环依赖: {name}")
+            visiting.add(name)
+            for dependency in dependencies[name]:
+                visit(dependency)
+            visiting.remove(name)
+            visited.add(name)
+
+        for name in dependencies:
+            visit(name)
+
+    def _fingerprint(self, stage):
+        """阶段指纹：输入文件内容、参数、函数源码与所依赖模块源文件的联合哈希"""
+        digest = hashlib.sha256()
+        for path in stage.inputs:
+            digest.update(path.encode('utf-8'))
+            digest.update(file_hash(path).encode('utf-8'))
+        digest.update(json.dumps(stage.params, sort_keys=True, default=str).encode('utf-8'))
+        try:
+            digest.update(inspect.getsource(stage.func).encode('utf-8'))
+        except (OSError, TypeError):
+            digest.update(stage.func.__qualname__.encode('utf-8'))
+        for module in sorted(stage.deps):
+            digest.update(module.encode('utf-8'))
+            digest.update(file_hash(module_source(module)).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _is_up_to_date(self, stage, fingerprint, manifest):
+        """指纹一致且输出文件未被改动或删除时视为最新"""
+        record = manifest.get(stage.name)
+        if record is None or record['fingerprint'] != fingerprint:
+            return False
+        return all(os.path.exists(path) and record['outputs'].get(path) == file_hash(path)
+                   for path in stage.outputs)
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest):
+        os.makedirs(os.path.dirname(self.manifest_path) or '.', exist_ok=True)
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    计算文件内容的SHA-256；目录按相对路径排序后逐文件哈希；不存在时返回空字符串
+    :param path: 文件或目录路径
+    :return: 十六进制哈希值
+    """
+    if not os.path.exists(path):
+        return ''
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for filename in sorted(files):
+                file_path = os.path.join(root, filename)
+                digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+                digest.update(file_hash(file_path, chunk_size).encode('utf-8'))
+        return digest.hexdigest()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def module_source(module):
+    """
+    查找模块的源文件而不执行模块本身（避免在主进程中导入TensorFlow等重量级依赖）
+    :param module: 模块名，如 'models.lstm_model'
+    :return: 源文件路径，找不到时返回空字符串
+    """
+    try:
+        spec = importlib.util.find_spec(module)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None or not spec.has_location:
+        logger.warning(f"找不到模块 {module} 的源文件，阶段指纹不包含其内容")
+        return ''
+    return spec.origin
+
+def _run_stage(func, inputs, outputs, params):
+    """在子进程中执行阶段函数，返回耗时（秒）"""
+    for path in outputs:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    start_time = time.time()
+    func(inputs, outputs, **params)
+    return time.time() - start_time
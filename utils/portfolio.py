@@ -0,0 +1,198 @@
+import heapq
+import itertools
+import logging
+import math
+
+import numpy as np
+
+from utils.draws import BACK_PICKS, FRONT_PICKS
+from utils.tickets import mask_numbers, ticket_masks
+
+logger = logging.getLogger(__name__)
+
+# 每注投注金额（元）
+TICKET_PRICE = 2
+
+PORTFOLIO_MODES = ('guaranteed', 'expected')
+
+# 默认的多起点次数
+DEFAULT_STARTS = 4
+
+def solve_portfolio(front_pool, back_pool, budget, front_matches=3, back_matches=0, mode='guaranteed',
+                    front_probabilities=None, back_probabilities=None, n_starts=DEFAULT_STARTS, max_passes=3,
+                    seed=None, executor=None):
+    """
+    旋转矩阵（wheeling）组合优化：在候选号码池内选出 budget 注，使覆盖的中奖目标尽可能多。
+    目标为前区号码池中任意 front_matches 个号码与后区号码池中任意 back_matches 个号码的组合，
+    一注包含某个目标即视为覆盖；开奖号码落入号码池的部分包含被覆盖的目标时，至少有一注命中对应奖级
+    :param front_pool: 前区候选号码（通常取集成排名靠前的15-20个）
+    :param back_pool: 后区候选号码，至少2个
+    :param budget: 注数上限 K
+    :param front_matches: 目标中的前区号码数
+    :param back_matches: 目标中的后区号码数
+    :param mode: guaranteed 为最大化覆盖的目标数（全部覆盖即保证中奖）；
+                 expected 为按号码概率加权，最大化覆盖目标的概率之和
+    :param front_probabilities: expected 模式下前区号码池中各号码的概率
+    :param back_probabilities: expected 模式下后区号码池中各号码的概率
+    :param n_starts: 多起点次数，各起点以不同随机种子求解，取覆盖最好的结果
+    :param max_passes: 局部搜索的最大轮数
+    :param seed: 随机种子
+    :param executor: 由调用方维护并复用的进程池，各起点在其中并行求解；None时在当前进程中依次求解，
+                     避免每次调用都启动进程池
+    :return: 组合方案字典
+    """
+    if mode not in PORTFOLIO_MODES:
+        raise ValueError(f"不支持的组合模式: {mode}，可选 {PORTFOLIO_MODES}")
+    if len(back_pool) < BACK_PICKS or len(front_pool) < FRONT_PICKS:
+        raise ValueError("号码池不足一注")
+    if mode == 'expected' and (front_probabilities is None or back_probabilities is None):
+        raise ValueError("expected 模式需要提供号码概率")
+
+    n_starts = max(1, n_starts)
+    start_seeds = np.random.SeedSequence(seed).spawn(n_starts)
+    problem = (list(front_pool), list(back_pool), budget, front_matches, back_matches, mode,
+               front_probabilities, back_probabilities, max_passes)
+    if executor is None or n_starts == 1:
+        results = [_solve_single(*problem, start_seed) for start_seed in start_seeds]
+    else:
+        results = list(executor.map(_solve_single, *zip(*[problem + (s,) for s in start_seeds])))
+
+    covered, total, masks = max(results, key=lambda r: r[0])
+    tickets = [mask_numbers(mask) for mask in masks]
+    return {
+        'tickets': [{'front_zone': front, 'back_zone': back} for front, back in tickets],
+        'ticket_count': len(tickets),
+        'cost': len(tickets) * TICKET_PRICE,
+        'mode': mode,
+        'target': {'front_matches': front_matches, 'back_matches': back_matches},
+        'coverage': round(covered / total, 6) if total else 0.0,
+        'fully_covered': bool(np.isclose(covered, total)),
+        'starts': n_starts
+    }
+
+def _solve_single(front_pool, back_pool, budget, front_matches, back_matches, mode,
+                  front_probabilities, back_probabilities, max_passes, seed_sequence):
+    """单个起点：惰性贪心构造初始组合，再做单注替换的局部搜索，返回 (覆盖权重, 总权重, 掩码列表)"""
+    rng = np.random.default_rng(seed_sequence)
+    candidates, targets = _candidate_targets(len(front_pool), len(back_pool), front_matches, back_matches)
+    weights = _target_weights(len(front_pool), len(back_pool), front_matches, back_matches, mode,
+                              front_probabilities, back_probabilities)
+    # 极小扰动打破同分，使不同起点走出不同的贪心路径
+    weights = weights * (1 + rng.random(len(weights)) * 1e-6)
+
+    selected = _lazy_greedy(targets, weights, budget)
+    coverage_count = np.bincount(targets[selected].ravel(), minlength=len(weights))
+    selected = _local_search(selected, targets, weights, coverage_count, max_passes, rng)
+
+    coverage_count = np.bincount(targets[selected].ravel(), minlength=len(weights))
+    covered = float(weights[coverage_count > 0].sum())
+    front_index, back_index = candidates
+    front_numbers = np.asarray(front_pool)[front_index[selected]]
+    back_numbers = np.asarray(back_pool)[back_index[selected]]
+    return covered, float(weights.sum()), [int(m) for m in ticket_masks(front_numbers, back_numbers)]
+
+def _lazy_greedy(targets, weights, budget):
+    """
+    惰性贪心集合覆盖：覆盖收益只会随已选集合增大而减少，
+    因此堆顶候选重新计算后的收益仍不低于次优候选的旧收益时即可直接选中，无需重算全部候选
+    """
+    uncovered = weights.copy()
+    gains = uncovered[targets].sum(axis=1)
+    heap = [(-gain, index) for index, gain in enumerate(gains)]
+    heapq.heapify(heap)
+    selected = []
+    while heap and len(selected) < budget:
+        _, index = heapq.heappop(heap)
+        gain = uncovered[targets[index]].sum()
+        if gain <= 0:
+            continue
+        if heap and gain < -heap[0][0]:
+            heapq.heappush(heap, (-gain, index))
+            continue
+        selected.append(index)
+        uncovered[targets[index]] = 0.0
+    return selected
+
+def _local_search(selected, targets, weights, coverage_count, max_passes, rng):
+    """
+    逐注尝试替换：移出一注后，若存在另一候选能补回更多覆盖权重则替换。
+    维护每个候选的当前收益，移入移出时只通过倒排索引更新包含变动目标的候选
+    """
+    selected = list(selected)
+    order = np.argsort(targets.ravel(), kind='stable')
+    owners = order // targets.shape[1]
+    bounds = np.searchsorted(targets.ravel()[order], np.arange(len(weights) + 1))
+    gains = np.where(coverage_count == 0, weights, 0.0)[targets].sum(axis=1)
+
+    def update(changed, sign):
+        if len(changed):
+            spans = [owners[bounds[t]:bounds[t + 1]] for t in changed]
+            np.add.at(gains, np.concatenate(spans), sign * np.repeat(weights[changed], [len(x) for x in spans]))
+
+    for _ in range(max_passes):
+        improved = False
+        for position in rng.permutation(len(selected)):
+            current = selected[position]
+            coverage_count[targets[current]] -= 1
+            update(targets[current][coverage_count[targets[current]] == 0], 1.0)
+
+            best = int(np.argmax(gains))
+            if gains[best] > gains[current] * (1 + 1e-9):
+                selected[position] = best
+                improved = True
+            chosen = targets[selected[position]]
+            update(chosen[coverage_count[chosen] == 0], -1.0)
+            coverage_count[chosen] += 1
+        if not improved:
+            break
+    return selected
+
+def _candidate_targets(front_size, back_size, front_matches, back_matches):
+    """
+    枚举号码池内的全部候选注及每注覆盖的目标编号
+    :return: ((前区位置 (候选数, 5), 后区位置 (候选数, 2)), 目标编号 (候选数, 每注覆盖的目标数))
+    """
+    front_combos = np.array(list(itertools.combinations(range(front_size), FRONT_PICKS)), dtype=np.int64)
+    if back_matches == 0:
+        # 目标不含后区时后区号码不影响覆盖，只保留一种后区组合
+        back_combos = np.arange(BACK_PICKS, dtype=np.int64)[None, :]
+    else:
+        back_combos = np.array(list(itertools.combinations(range(back_size), BACK_PICKS)), dtype=np.int64)
+
+    front_ranks = _subset_ranks(front_combos, front_matches)
+    back_ranks = _subset_ranks(back_combos, back_matches)
+    back_targets = math.comb(back_size, back_matches)
+    targets = front_ranks[:, None, :, None] * back_targets + back_ranks[None, :, None, :]
+    targets = targets.reshape(len(front_combos) * len(back_combos), -1)
+
+    front_index = np.repeat(front_combos, len(back_combos), axis=0)
+    back_index = np.tile(back_combos, (len(front_combos), 1))
+    return (front_index, back_index), targets
+
+def _subset_ranks(combos, size):
+    """每个组合中所有 size 元子集的组合数系统（colex）编号，形状为 (组合数, C(k, size))"""
+    picks = list(itertools.combinations(range(combos.shape[1]), size))
+    max_value = int(combos.max()) + 1 if combos.size else 1
+    binomial = np.array([[math.comb(v, r) for r in range(size + 1)] for v in range(max_value)], dtype=np.int64)
+    ranks = np.zeros((len(combos), len(picks)), dtype=np.int64)
+    for column, pick in enumerate(picks):
+        for order, position in enumerate(pick):
+            ranks[:, column] += binomial[combos[:, position], order + 1]
+    return ranks
+
+def _target_weights(front_size, back_size, front_matches, back_matches, mode,
+                    front_probabilities, back_probabilities):
+    """各目标的权重：guaranteed 模式全为1，expected 模式为目标内各号码概率之积"""
+    total = math.comb(front_size, front_matches) * math.comb(back_size, back_matches)
+    if mode == 'guaranteed':
+        return np.ones(total)
+
+    front_subsets = np.array(list(itertools.combinations(range(front_size), front_matches)), dtype=np.int64)
+    back_subsets = np.array(list(itertools.combinations(range(back_size), back_matches)), dtype=np.int64)
+    front_weights = np.zeros(len(front_subsets))
+    back_weights = np.zeros(len(back_subsets))
+    front_weights[_subset_ranks(front_subsets, front_matches)[:, 0]] = \
+        np.prod(np.asarray(front_probabilities)[front_subsets], axis=1)
+    back_weights[_subset_ranks(back_subsets, back_matches)[:, 0]] = \
+        np.prod(np.asarray(back_probabilities)[back_subsets], axis=1)
+    return np.outer(front_weights, back_weights).ravel()
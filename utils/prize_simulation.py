@@ -0,0 +1,270 @@
+import itertools
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.draws import BACK_NUMBERS, BACK_PICKS, FRONT_NUMBERS, FRONT_PICKS
+from utils.tickets import BACK_SHIFT, FRONT_MASK, popcount, ticket_masks
+
+logger = logging.getLogger(__name__)
+
+# 大乐透九个奖级：(奖级名称, 中奖条件 [(前区命中数, 后区命中数), ...], 固定奖金（元），浮动奖级为None)
+PRIZE_TIERS = [
+    ('一等奖', [(5, 2)], None),
+    ('二等奖', [(5, 1)], None),
+    ('三等奖', [(5, 0)], 10000),
+    ('四等奖', [(4, 2)], 3000),
+    ('五等奖', [(4, 1)], 300),
+    ('六等奖', [(3, 2)], 200),
+    ('七等奖', [(4, 0)], 100),
+    ('八等奖', [(3, 1), (2, 2)], 15),
+    ('九等奖', [(3, 0), (1, 2), (2, 1), (0, 2)], 5)
+]
+
+# 浮动奖级的默认单注奖金（元）
+DEFAULT_JACKPOT = 10000000
+DEFAULT_SECOND_PRIZE = 200000
+
+# 每个任务内单次处理的 (注数 × 开奖数) 元素上限，控制内存占用
+CHUNK_ELEMENTS = 4000000
+
+# (注数 × 开奖数) 超过该值时才启用进程池：单进程每秒可处理约三千万个元素，
+# 规模较小时进程启动与导入的开销（约2秒）反而比计算本身更大
+PARALLEL_THRESHOLD = 50000000
+
+# 奖池规则：销售额的51%为奖金，固定奖级先行支付后剩余部分为高等奖奖金，
+# 其中75%与奖池累积资金构成一等奖奖金、18%为二等奖奖金，其余及未派出的奖金滚入奖池。
+# 一等奖单注封顶：奖池低于8亿元时为500万元，达到8亿元时为1000万元。
+# 以封顶奖金计，每注销售对应的一等奖期望派奖高于其分得的奖金，奖池只能靠低奖池时的较低封顶回补
+PRIZE_FUND_RATE = 0.51
+FIRST_PRIZE_SHARE = 0.75
+SECOND_PRIZE_SHARE = 0.18
+FIRST_PRIZE_CAP = 10000000
+FIRST_PRIZE_CAP_LOW = 5000000
+FIRST_PRIZE_CAP_THRESHOLD = 800000000
+SECOND_PRIZE_CAP = 5000000
+
+def tier_table():
+    """(前区命中数, 后区命中数) -> 奖级编号（1-9，0表示未中奖）的查找表，形状为 (6, 3)"""
+    table = np.zeros((FRONT_PICKS + 1, BACK_PICKS + 1), dtype=np.int8)
+    for tier, (_, conditions, _) in enumerate(PRIZE_TIERS, start=1):
+        for front_hits, back_hits in conditions:
+            table[front_hits, back_hits] = tier
+    return table
+
+def tier_payouts(jackpot=DEFAULT_JACKPOT, second_prize=DEFAULT_SECOND_PRIZE):
+    """各奖级单注奖金，下标0为未中奖"""
+    floating = {0: jackpot, 1: second_prize}
+    return np.array([0.0] + [floating.get(i, amount) for i, (_, _, amount) in enumerate(PRIZE_TIERS)])
+
+def tier_probabilities():
+    """随机单注命中各奖级的精确概率（超几何分布），下标0为未中奖"""
+    front_total = math.comb(FRONT_NUMBERS, FRONT_PICKS)
+    back_total = math.comb(BACK_NUMBERS, BACK_PICKS)
+    table = tier_table()
+    probabilities = np.zeros(len(PRIZE_TIERS) + 1)
+    for front_hits in range(FRONT_PICKS + 1):
+        front_p = math.comb(FRONT_PICKS, front_hits) * \
+            math.comb(FRONT_NUMBERS - FRONT_PICKS, FRONT_PICKS - front_hits) / front_total
+        for back_hits in range(BACK_PICKS + 1):
+            back_p = math.comb(BACK_PICKS, back_hits) * \
+                math.comb(BACK_NUMBERS - BACK_PICKS, BACK_PICKS - back_hits) / back_total
+            probabilities[table[front_hits, back_hits]] += front_p * back_p
+    return probabilities
+
+def simulate_prizes(front_zones, back_zones, n_draws=1000000, jackpot=DEFAULT_JACKPOT,
+                    second_prize=DEFAULT_SECOND_PRIZE, seed=None, max_workers=None, n_tasks=None):
+    """
+    蒙特卡洛模拟：随机生成大量开奖结果，批量计算一组投注在每次开奖中的奖级与奖金
+    :param front_zones: 各注前区号码，形状为 (注数, 5)
+    :param back_zones: 各注后区号码，形状为 (注数, 2)
+    :param n_draws: 模拟开奖次数
+    :param jackpot: 一等奖单注奖金
+    :param second_prize: 二等奖单注奖金
+    :param seed: 随机种子
+    :param max_workers: 进程数，None时按 注数×开奖数 自动决定是否并行，1表示在当前进程内计算
+    :param n_tasks: 任务数，并行时默认为进程数的4倍
+    :return: 模拟结果字典（各奖级中奖次数与频率、每期期望回报及方差、投入产出比）
+    """
+    masks = np.atleast_1d(ticket_masks(front_zones, back_zones))
+    payouts = tier_payouts(jackpot, second_prize)
+    in_process = max_workers == 1 or (max_workers is None and len(masks) * n_draws < PARALLEL_THRESHOLD)
+    n_tasks = n_tasks or (1 if in_process else 4 * (max_workers or 4))
+    n_tasks = max(1, min(n_tasks, n_draws))
+    task_draws = np.full(n_tasks, n_draws // n_tasks)
+    task_draws[:n_draws % n_tasks] += 1
+    seeds = np.random.SeedSequence(seed).spawn(n_tasks)
+    tasks = [(masks, payouts, int(size), child) for size, child in zip(task_draws, seeds)]
+
+    if in_process:
+        results = [_simulate_task(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_simulate_task, *zip(*tasks)))
+
+    tier_counts = np.sum([r[0] for r in results], axis=0)
+    total = sum(r[1] for r in results)
+    total_squares = sum(r[2] for r in results)
+    mean_return = total / n_draws
+    variance = max(total_squares / n_draws - mean_return ** 2, 0.0)
+    cost = len(masks) * 2
+
+    return {
+        'n_draws': int(n_draws),
+        'ticket_count': int(len(masks)),
+        'tiers': [
+            {'level': name, 'hits': int(tier_counts[tier]),
+             'frequency': float(tier_counts[tier] / (n_draws * len(masks))),
+             'prize': float(payouts[tier])}
+            for tier, (name, _, _) in enumerate(PRIZE_TIERS, start=1)
+        ],
+        'expected_return': float(mean_return),
+        'return_variance': float(variance),
+        'return_std_error': float(math.sqrt(variance / n_draws)),
+        'cost_per_draw': cost,
+        'expected_roi': float((mean_return - cost) / cost)
+    }
+
+def _draw_tables():
+    """所有前区组合与后区组合的掩码表，随机开奖只需抽取组合下标"""
+    front = np.array(list(itertools.combinations(range(1, FRONT_NUMBERS + 1), FRONT_PICKS)))
+    back = np.array(list(itertools.combinations(range(1, BACK_NUMBERS + 1), BACK_PICKS)))
+    one = np.uint64(1)
+    front_masks = np.bitwise_or.reduce(one << (front.astype(np.uint64) - one), axis=1)
+    back_masks = np.bitwise_or.reduce(one << (back.astype(np.uint64) - one + np.uint64(BACK_SHIFT)), axis=1)
+    return front_masks, back_masks
+
+def _simulate_task(masks, payouts, n_draws, seed_sequence):
+    """在子进程中分块模拟 n_draws 次开奖，返回 (各奖级中奖次数, 奖金总和, 奖金平方和)"""
+    rng = np.random.default_rng(seed_sequence)
+    front_masks, back_masks = _draw_tables()
+    table = tier_table()
+    chunk = max(1, CHUNK_ELEMENTS // len(masks))
+    tier_counts = np.zeros(len(payouts), dtype=np.int64)
+    total = total_squares = 0.0
+
+    for start in range(0, n_draws, chunk):
+        size = min(chunk, n_draws - start)
+        draws = front_masks[rng.integers(len(front_masks), size=size)] | \
+            back_masks[rng.integers(len(back_masks), size=size)]
+        hits = masks[:, None] & draws[None, :]
+        front_hits = popcount(hits & FRONT_MASK)
+        back_hits = popcount(hits >> np.uint64(BACK_SHIFT))
+        tiers = table[front_hits, back_hits]
+        tier_counts += np.bincount(tiers.ravel(), minlength=len(payouts))
+        draw_returns = payouts[tiers].sum(axis=0)
+        total += float(draw_returns.sum())
+        total_squares += float(np.square(draw_returns).sum())
+
+    return tier_counts, total, total_squares
+
+def simulate_jackpot_pool(n_periods, n_scenarios, initial_pool, base_sales, sales_volatility=0.15,
+                          jackpot_elasticity=0.05, ticket_multiple=1.0, front_popularity=None,
+                          back_popularity=None, seed=None, record_paths=False):
+    """
+    逐期模拟奖池演变：销量、选号分布、各奖级中奖注数、浮动奖金分配与奖池滚存。
+    各期之间存在依赖，按期循环；同一期内的全部情景一次性向量化计算。
+    奖池与销量没有通用的默认值，需由调用方按所模拟的时期给出：每期一等奖的期望中奖注数为
+    base_sales / 2 / 21425712，一等奖开出的概率与奖池走势主要由 base_sales 与 ticket_multiple 决定
+    :param n_periods: 模拟期数
+    :param n_scenarios: 情景数
+    :param initial_pool: 初始奖池（元）
+    :param base_sales: 基准单期基本投注销售额（元，每注2元）
+    :param sales_volatility: 销售额的对数正态波动
+    :param jackpot_elasticity: 奖池每增加一个基准销售额带来的销量增幅
+    :param ticket_multiple: 每种选号平均被重复购买的注数（倍投、多人同选），
+                            中奖注数的均值不变，但中奖成簇出现，一等奖无人命中的概率随之升高
+    :param front_popularity: 彩民对前区各号码的偏好权重，热门号码开出时一等奖易被多人分享
+    :param back_popularity: 彩民对后区各号码的偏好权重
+    :param seed: 随机种子
+    :param record_paths: 是否返回逐期明细，形状为 (期数, 情景数)
+    :return: 模拟结果字典
+    """
+    rng = np.random.default_rng(seed)
+    probabilities = tier_probabilities()
+    fixed_payouts = tier_payouts()[3:]
+    front_factor_table, back_factor_table = _popularity_factors(front_popularity, back_popularity)
+
+    pool = np.full(n_scenarios, float(initial_pool))
+    streak = np.zeros(n_scenarios, dtype=np.int64)
+    max_streak = np.zeros(n_scenarios, dtype=np.int64)
+    jackpot_hits = np.zeros(n_scenarios, dtype=np.int64)
+    first_winners_total = np.zeros(n_scenarios, dtype=np.int64)
+    first_paid_total = np.zeros(n_scenarios)
+    pool_quantiles = np.empty((n_periods, 3))
+    paths = {name: np.empty((n_periods, n_scenarios)) for name in
+             ('pool', 'sales', 'first_winners', 'first_prize', 'second_winners', 'second_prize', 'streak')} \
+        if record_paths else None
+
+    for period in range(n_periods):
+        sales = base_sales * rng.lognormal(0.0, sales_volatility, n_scenarios) * \
+            (1 + jackpot_elasticity * pool / base_sales)
+        tickets = sales / 2
+
+        # 开奖号码越热门，同中该号码的彩民越多
+        front_factor = front_factor_table[rng.integers(len(front_factor_table), size=n_scenarios)]
+        back_factor = back_factor_table[rng.integers(len(back_factor_table), size=n_scenarios)]
+        expected = tickets[:, None] * probabilities[None, 1:]
+        expected[:, 0] *= front_factor * back_factor
+        expected[:, 1:3] *= front_factor[:, None]
+        selections = rng.poisson(expected / ticket_multiple)
+        winners = selections + rng.poisson(selections * (ticket_multiple - 1))
+
+        # 固定奖级先行支付，不足部分由奖池垫付
+        high_fund = sales * PRIZE_FUND_RATE - winners[:, 2:] @ fixed_payouts
+        pool += np.minimum(high_fund, 0.0)
+        high_fund = np.maximum(high_fund, 0.0)
+
+        first_cap = np.where(pool < FIRST_PRIZE_CAP_THRESHOLD, FIRST_PRIZE_CAP_LOW, FIRST_PRIZE_CAP)
+        first_pot = high_fund * FIRST_PRIZE_SHARE + pool
+        first_prize = np.minimum(first_pot / np.maximum(winners[:, 0], 1), first_cap)
+        first_paid = winners[:, 0] * first_prize
+        second_pot = high_fund * SECOND_PRIZE_SHARE
+        second_prize = np.minimum(second_pot / np.maximum(winners[:, 1], 1), SECOND_PRIZE_CAP)
+        second_paid = winners[:, 1] * second_prize
+        pool = first_pot - first_paid + second_pot - second_paid + \
+            high_fund * (1 - FIRST_PRIZE_SHARE - SECOND_PRIZE_SHARE)
+
+        hit = winners[:, 0] > 0
+        streak = np.where(hit, 0, streak + 1)
+        max_streak = np.maximum(max_streak, streak)
+        jackpot_hits += hit
+        first_winners_total += winners[:, 0]
+        first_paid_total += first_paid
+        pool_quantiles[period] = np.percentile(pool, [5, 50, 95])
+
+        if record_paths:
+            paths['pool'][period] = pool
+            paths['sales'][period] = sales
+            paths['first_winners'][period] = winners[:, 0]
+            paths['first_prize'][period] = np.where(hit, first_prize, 0.0)
+            paths['second_winners'][period] = winners[:, 1]
+            paths['second_prize'][period] = np.where(winners[:, 1] > 0, second_prize, 0.0)
+            paths['streak'][period] = streak
+
+    return {
+        'final_pool': pool,
+        'max_rollover_streak': max_streak,
+        'jackpot_hit_rate': jackpot_hits / n_periods,
+        'mean_first_prize': first_paid_total / np.maximum(first_winners_total, 1),
+        'pool_quantiles': pool_quantiles,
+        'paths': paths
+    }
+
+def _popularity_factors(front_popularity, back_popularity):
+    """
+    每种前区、后区组合相对平均选号热度的倍数，
+    以组合内号码偏好权重之积衡量，并归一化为均值1
+    """
+    factors = []
+    for popularity, size, picks in ((front_popularity, FRONT_NUMBERS, FRONT_PICKS),
+                                    (back_popularity, BACK_NUMBERS, BACK_PICKS)):
+        if popularity is None:
+            factors.append(np.ones(1))
+            continue
+        combos = np.array(list(itertools.combinations(range(size), picks)))
+        product = np.prod(np.asarray(popularity, dtype=np.float64)[combos], axis=1)
+        factors.append(product / product.mean())
+    return factors
@@ -0,0 +1,168 @@
+import logging
+
+import numpy as np
+
+from utils.draws import BACK_NUMBERS, BACK_PICKS, FRONT_NUMBERS, FRONT_PICKS, NUM_LABELS
+
+logger = logging.getLogger(__name__)
+
+# 季节 -> 月份下标（0为1月）
+SEASONS = {
+    'spring': (2, 3, 4),
+    'summer': (5, 6, 7),
+    'autumn': (8, 9, 10),
+    'winter': (11, 0, 1)
+}
+
+MONTHS = 12
+WEEKDAYS = 7
+
+class SeasonalCube:
+    """
+    号码 × 月份 × 星期 × 年份 的开奖次数立方体，另存每个 (月份, 星期, 年份) 格子中的开奖期数。
+    追加开奖时一次 bincount 写入对应格子；季节、月份、星期等维度的统计都是对立方体的切片求和，
+    请求时不需要对开奖历史分组聚合
+    """
+
+    def __init__(self):
+        self.n_periods = 0
+        self.base_year = None
+        self.counts = np.zeros((NUM_LABELS, MONTHS, WEEKDAYS, 0), dtype=np.int64)
+        self.draws = np.zeros((MONTHS, WEEKDAYS, 0), dtype=np.int64)
+
+    @property
+    def n_years(self):
+        return self.draws.shape[2]
+
+    def extend(self, front_zone, back_zone, dates):
+        """
+        追加若干期，日期缺失的期只计入总期数
+        :param front_zone: 前区号码，形状为 (期数, 5)
+        :param back_zone: 后区号码，形状为 (期数, 2)
+        :param dates: 各期开奖日期
+        """
+        front_zone = np.asarray(front_zone, dtype=np.int64).reshape(-1, FRONT_PICKS)
+        back_zone = np.asarray(back_zone, dtype=np.int64).reshape(-1, BACK_PICKS)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        self.n_periods += len(front_zone)
+        valid = ~np.isnat(dates)
+        if not valid.any():
+            return
+        front_zone, back_zone, dates = front_zone[valid], back_zone[valid], dates[valid]
+
+        years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+        months = dates.astype('datetime64[M]').astype(np.int64) % MONTHS
+        # 1970-01-01 为星期四，换算为星期一为0
+        weekdays = (dates.astype(np.int64) + 3) % WEEKDAYS
+        self._grow(int(years.min()), int(years.max()))
+        year_index = years - self.base_year
+
+        cells = (months * WEEKDAYS + weekdays) * self.n_years + year_index
+        self.draws += np.bincount(cells, minlength=self.draws.size).reshape(self.draws.shape)
+        numbers = np.concatenate([front_zone - 1, back_zone - 1 + FRONT_NUMBERS], axis=1)
+        flat = numbers * self.draws.size + cells[:, None]
+        self.counts += np.bincount(flat.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+
+    def slice_rates(self, months=None, weekdays=None, years=None):
+        """
+        切片内各号码的开出率相对理论概率的比值（1表示与均匀随机一致）
+        :param months: 月份下标列表，None表示全部
+        :param weekdays: 星期下标列表（0为星期一），None表示全部
+        :param years: 年份列表，None表示全部
+        :return: (长度47的比值数组, 切片内的开奖期数)
+        """
+        months = np.arange(MONTHS) if months is None else np.asarray(months)
+        weekdays = np.arange(WEEKDAYS) if weekdays is None else np.asarray(weekdays)
+        if years is None:
+            years = np.arange(self.n_years)
+        else:
+            years = np.asarray(years) - (self.base_year or 0)
+            years = years[(years >= 0) & (years < self.n_years)]
+        index = np.ix_(months, weekdays, years)
+        counts = self.counts[(slice(None),) + index].sum(axis=(1, 2, 3))
+        n_draws = int(self.draws[index].sum())
+        if n_draws == 0:
+            return np.zeros(NUM_LABELS), 0
+        expected = np.concatenate([np.full(FRONT_NUMBERS, FRONT_PICKS / FRONT_NUMBERS),
+                                   np.full(BACK_NUMBERS, BACK_PICKS / BACK_NUMBERS)]) * n_draws
+        return counts / expected, n_draws
+
+    def seasonal_favorites(self, count=4, back_count=2):
+        """
+        各季节开出率最高的号码
+        :return: {季节: {'front': [...], 'back': [...], 'draws': 期数}}
+        """
+        favorites = {}
+        for season, months in SEASONS.items():
+            rates, n_draws = self.slice_rates(months=months)
+            favorites[season] = {
+                'front': _top_numbers(rates[:FRONT_NUMBERS], count),
+                'back': _top_numbers(rates[FRONT_NUMBERS:], back_count),
+                'draws': n_draws
+            }
+        return favorites
+
+    def weekday_favorites(self, count=4):
+        """有开奖的各星期中开出率最高的前区号码 {星期下标: [...]}"""
+        favorites = {}
+        for weekday in np.flatnonzero(self.draws.sum(axis=(0, 2))):
+            rates, _ = self.slice_rates(weekdays=[int(weekday)])
+            favorites[int(weekday)] = _top_numbers(rates[:FRONT_NUMBERS], count)
+        return favorites
+
+    def cycle_statistics(self, peak_count=6):
+        """
+        前区号码的月度周期：把立方体按 年份×月份 展开为各号码的月度开出率偏差序列，
+        在平均功率谱上取主周期，并按各号码在主频上的相位外推下个月的高点
+        :return: {'cycle_length', 'current_cycle_position', 'predicted_peak_numbers', 'cycle_confidence', 'months_observed'}
+        """
+        counts = self.counts[:FRONT_NUMBERS].sum(axis=2).transpose(0, 2, 1).reshape(FRONT_NUMBERS, -1)
+        draws = self.draws.sum(axis=1).T.reshape(-1)
+        observed = np.flatnonzero(draws)
+        if len(observed) < 2 * 3:
+            return None
+        # 从有开奖的第一个月到最后一个月，空月份按无偏差处理
+        first, last = observed[0], observed[-1]
+        counts, draws = counts[:, first:last + 1], draws[first:last + 1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            deviation = np.where(draws > 0, counts / draws - FRONT_PICKS / FRONT_NUMBERS, 0.0)
+        deviation -= deviation.mean(axis=1, keepdims=True)
+
+        spectrum = np.fft.rfft(deviation, axis=1)
+        power = (np.abs(spectrum) ** 2).mean(axis=0)
+        # 周期至少2个月，最长取序列长度的一半
+        frequencies = np.arange(len(power))
+        candidates = frequencies[(frequencies >= 2) & (frequencies <= deviation.shape[1] // 2)]
+        if len(candidates) == 0:
+            return None
+        dominant = int(candidates[np.argmax(power[candidates])])
+        cycle_length = deviation.shape[1] / dominant
+
+        # 各号码在主频上的正弦分量，外推到下一个月
+        next_month = deviation.shape[1]
+        phase = 2 * np.pi * dominant * next_month / deviation.shape[1]
+        component = spectrum[:, dominant]
+        forecast = component.real * np.cos(phase) - component.imag * np.sin(phase)
+        return {
+            'cycle_length': round(float(cycle_length), 2),
+            'current_cycle_position': int((last - first) % max(int(round(cycle_length)), 1)) + 1,
+            'predicted_peak_numbers': _top_numbers(forecast, peak_count),
+            'cycle_confidence': round(float(power[dominant] / power[1:].sum()), 4),
+            'months_observed': int(deviation.shape[1])
+        }
+
+    def _grow(self, min_year, max_year):
+        """按需在年份维度前后扩展"""
+        if self.base_year is None:
+            self.base_year = min_year
+        before = max(self.base_year - min_year, 0)
+        after = max(max_year - (self.base_year + self.n_years - 1), 0) if self.n_years else max_year - self.base_year + 1
+        if before or after:
+            self.counts = np.pad(self.counts, ((0, 0), (0, 0), (0, 0), (before, after)))
+            self.draws = np.pad(self.draws, ((0, 0), (0, 0), (before, after)))
+            self.base_year -= before
+
+def _top_numbers(scores, count):
+    """得分最高的号码（1起），同分时号码小者在前"""
+    order = np.lexsort((np.arange(len(scores)), -np.asarray(scores)))
+    return (order[:count] + 1).tolist()
@@ -0,0 +1,163 @@
+import logging
+
+import numpy as np
+
+from utils.draws import BACK_PICKS, FRONT_NUMBERS, FRONT_PICKS, NUM_LABELS, load_draw_history
+from utils.tickets import popcount, ticket_masks
+
+logger = logging.getLogger(__name__)
+
+# 签名中每个值是号码在置换下的秩（0-46），占6位
+RANK_BITS = 6
+
+# 计算签名时每批处理的期数，限制 (置换数, 期数, 7) 中间数组的大小
+SIGNATURE_BATCH = 16384
+
+# 新增期先放在未排序的尾部线性比较，超过该期数后并入有序桶
+MERGE_THRESHOLD = 4096
+
+class SimilarDrawIndex:
+    """
+    基于MinHash + LSH的相似开奖检索：每期开奖看作47个号码上的7元集合，相似度为Jaccard系数。
+    号码空间只有47个元素，MinHash直接用随机置换实现，签名值为集合中号码的最小秩；
+    签名切分为若干段（band），段内各值拼成桶键，所有段的桶键排序后存为一个数组，
+    查询时一次 searchsorted 取出与查询注至少一个段完全相同的候选期，再用掩码精确计算Jaccard排序。
+    一段 r 行、共 b 段时，Jaccard为 J 的两期成为候选的概率为 1-(1-J^r)^b
+    """
+
+    def __init__(self, num_bands=40, rows_per_band=5, seed=2024):
+        """
+        :param num_bands: 段数 b，越大召回越高、候选越多
+        :param rows_per_band: 每段行数 r，越大越只召回高相似的期
+        :param seed: 生成置换的随机种子，同一种子构建的索引结果可复现
+        """
+        self.num_bands = num_bands
+        self.rows_per_band = rows_per_band
+        rng = np.random.default_rng(seed)
+        num_perm = num_bands * rows_per_band
+        self.ranks = np.argsort(rng.random((num_perm, NUM_LABELS)), axis=1).astype(np.uint8)
+        self.band_offsets = np.arange(num_bands, dtype=np.uint64) << np.uint64(RANK_BITS * rows_per_band)
+
+        self.n_periods = 0
+        self.masks = np.zeros(0, dtype=np.uint64)
+        self.front_zone = np.zeros((0, FRONT_PICKS), dtype=np.int8)
+        self.back_zone = np.zeros((0, BACK_PICKS), dtype=np.int8)
+        self.dates = np.array([], dtype='datetime64[D]')
+        # 已排序部分：(段号, 桶键) 编码后的键及对应期序号
+        self.sorted_keys = np.zeros(0, dtype=np.uint64)
+        self.sorted_periods = np.zeros(0, dtype=np.int64)
+        self.merged_periods = 0
+        # 尾部：尚未并入有序部分的期的各段键，形状为 (期数, 段数)
+        self.tail_keys = np.zeros((0, num_bands), dtype=np.uint64)
+
+    @classmethod
+    def from_history(cls, filepath, **kwargs):
+        """从原始开奖数据文件构建索引"""
+        dates, front_zone, back_zone = load_draw_history(filepath)
+        index = cls(**kwargs)
+        if len(front_zone):
+            index.extend(front_zone, back_zone, dates)
+        return index
+
+    def extend(self, front_zone, back_zone, dates=None):
+        """
+        追加新开奖的若干期，只计算新增期的签名
+        :param front_zone: 前区号码，形状为 (期数, 5)，按时间先后排列
+        :param back_zone: 后区号码，形状为 (期数, 2)
+        :param dates: 各期开奖日期
+        """
+        front_zone = np.atleast_2d(np.asarray(front_zone, dtype=np.int64))
+        back_zone = np.atleast_2d(np.asarray(back_zone, dtype=np.int64))
+        if dates is None:
+            dates = np.full(len(front_zone), np.datetime64('NaT'), dtype='datetime64[D]')
+
+        self.masks = np.concatenate([self.masks, ticket_masks(front_zone, back_zone)])
+        self.front_zone = np.concatenate([self.front_zone, front_zone.astype(np.int8)])
+        self.back_zone = np.concatenate([self.back_zone, back_zone.astype(np.int8)])
+        self.dates = np.concatenate([self.dates, np.asarray(dates, dtype='datetime64[D]')])
+        self.tail_keys = np.concatenate([self.tail_keys, self._band_keys(front_zone, back_zone)])
+        self.n_periods += len(front_zone)
+
+        if len(self.tail_keys) >= MERGE_THRESHOLD:
+            self._merge_tail()
+
+    def query(self, front_numbers, back_numbers, k=5):
+        """
+        检索与给定号码最相似的历史开奖
+        :param front_numbers: 前区号码
+        :param back_numbers: 后区号码
+        :param k: 返回的期数
+        :return: [{'period', 'date', 'front_zone', 'back_zone', 'jaccard', 'shared_front', 'shared_back'}, ...]，
+                 按Jaccard降序，相同时最近的期在前
+        """
+        if self.n_periods == 0 or k <= 0:
+            return []
+        front_numbers = np.asarray(sorted(front_numbers), dtype=np.int64)
+        back_numbers = np.asarray(sorted(back_numbers), dtype=np.int64)
+        query_mask = np.bitwise_or.reduce(ticket_masks(front_numbers[None, :], back_numbers[None, :]))
+        keys = self._band_keys(front_numbers[None, :], back_numbers[None, :])[0]
+
+        candidates = self._candidates(keys)
+        if len(candidates) < k:
+            # 候选不足时退化为全量扫描，保证返回 k 期
+            candidates = np.arange(self.n_periods)
+
+        shared = popcount(self.masks[candidates] & query_mask)
+        union = popcount(self.masks[candidates] | query_mask)
+        jaccard = shared / union
+        order = np.lexsort((-candidates, -jaccard))[:k]
+
+        results = []
+        for i in order:
+            period = int(candidates[i])
+            front = self.front_zone[period].tolist()
+            back = self.back_zone[period].tolist()
+            results.append({
+                'period': period,
+                'date': None if np.isnat(self.dates[period]) else str(self.dates[period]),
+                'front_zone': front,
+                'back_zone': back,
+                'jaccard': round(float(jaccard[i]), 4),
+                'shared_front': sorted(set(front) & set(front_numbers.tolist())),
+                'shared_back': sorted(set(back) & set(back_numbers.tolist()))
+            })
+        return results
+
+    def _candidates(self, keys):
+        """与查询注至少有一段桶键相同的期序号（去重）"""
+        lo = np.searchsorted(self.sorted_keys, keys, side='left')
+        hi = np.searchsorted(self.sorted_keys, keys, side='right')
+        lengths = hi - lo
+        total = int(lengths.sum())
+        # 将各段的 [lo, hi) 区间展开为连续下标
+        starts = np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+        merged = self.sorted_periods[starts + np.arange(total)]
+        tail = np.flatnonzero((self.tail_keys == keys).any(axis=1)) + self.merged_periods
+        return np.unique(np.concatenate([merged, tail]))
+
+    def _band_keys(self, front_zone, back_zone):
+        """
+        计算各期在每段的桶键
+        :return: 形状为 (期数, 段数) 的uint64数组，高位为段号，低位为段内各签名值拼接
+        """
+        items = np.concatenate([front_zone - 1, back_zone - 1 + FRONT_NUMBERS], axis=1)
+        keys = np.empty((len(items), self.num_bands), dtype=np.uint64)
+        shifts = np.arange(self.rows_per_band, dtype=np.uint64) * np.uint64(RANK_BITS)
+        for start in range(0, len(items), SIGNATURE_BATCH):
+            batch = items[start:start + SIGNATURE_BATCH]
+            signatures = self.ranks[:, batch].min(axis=2).T.astype(np.uint64)
+            bands = signatures.reshape(len(batch), self.num_bands, self.rows_per_band)
+            keys[start:start + len(batch)] = (bands << shifts).sum(axis=2, dtype=np.uint64) | self.band_offsets
+        return keys
+
+    def _merge_tail(self):
+        """将尾部并入有序桶"""
+        periods = np.repeat(np.arange(self.merged_periods, self.n_periods), self.num_bands)
+        keys = np.concatenate([self.sorted_keys, self.tail_keys.ravel()])
+        periods = np.concatenate([self.sorted_periods, periods])
+        order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[order]
+        self.sorted_periods = periods[order]
+        self.merged_periods = self.n_periods
+        self.tail_keys = self.tail_keys[:0]
+        logger.debug(f"相似检索索引已合并至 {self.n_periods} 期")
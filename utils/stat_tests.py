@@ -0,0 +1,214 @@
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.draws import BACK_NUMBERS, BACK_PICKS, FRONT_NUMBERS, FRONT_PICKS
+from utils.tickets import popcount, ticket_masks
+
+logger = logging.getLogger(__name__)
+
+# 各号码区的 (号码个数, 每期开出个数)
+ZONES = {
+    'front': (FRONT_NUMBERS, FRONT_PICKS),
+    'back': (BACK_NUMBERS, BACK_PICKS)
+}
+
+# 前区和值的理论均值，累积高阶矩时先减去它以减小舍入误差
+FRONT_SUM_CENTER = FRONT_PICKS * (FRONT_NUMBERS + 1) / 2
+
+# (重排次数 × 期数) 低于该值时置换检验在当前进程内完成，进程池的启动开销不划算
+PERMUTATION_PARALLEL_THRESHOLD = 20000000
+
+def chi2_sf(statistic, df):
+    """卡方分布的上尾概率 P(X >= statistic)，即正则化上不完全伽马函数 Q(df/2, statistic/2)"""
+    a, x = df / 2, statistic / 2
+    if x <= 0:
+        return 1.0
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        # 级数展开求下不完全伽马函数 P(a, x)
+        term = total = 1 / a
+        for n in range(1, 500):
+            term *= x / (a + n)
+            total += term
+            if term < total * 1e-15:
+                break
+        return max(0.0, 1 - total * math.exp(log_prefix))
+    # Lentz 连分式求 Q(a, x)
+    tiny = 1e-300
+    b = x + 1 - a
+    c, d = 1 / tiny, 1 / b
+    h = d
+    for n in range(1, 500):
+        an = -n * (n - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+def normal_two_sided_p(z):
+    """标准正态分布的双侧p值，z可为数组"""
+    return np.vectorize(lambda value: math.erfc(abs(value) / math.sqrt(2)), otypes=[float])(z)
+
+class DrawStatistics:
+    """
+    开奖历史的增量统计量：各号码出现次数与前区和值的累积矩。
+    每追加一期只更新7个计数与5个矩，卡方与熵在35个计数上 O(35) 求得，无需回看历史
+    """
+
+    def __init__(self):
+        self.n_periods = 0
+        self.counts = {zone: np.zeros(size, dtype=np.int64) for zone, (size, _) in ZONES.items()}
+        # 前区和值减去 FRONT_SUM_CENTER 后的 0-4 次幂和
+        self.sum_moments = np.zeros(5)
+
+    def update(self, front, back):
+        """追加一期开奖"""
+        self.counts['front'][np.asarray(front) - 1] += 1
+        self.counts['back'][np.asarray(back) - 1] += 1
+        self.sum_moments += (sum(front) - FRONT_SUM_CENTER) ** np.arange(5)
+        self.n_periods += 1
+
+    def extend(self, front_zone, back_zone):
+        """批量追加若干期开奖"""
+        front_zone = np.asarray(front_zone, dtype=np.int64).reshape(-1, FRONT_PICKS)
+        back_zone = np.asarray(back_zone, dtype=np.int64).reshape(-1, BACK_PICKS)
+        self.counts['front'] += np.bincount(front_zone.ravel() - 1, minlength=FRONT_NUMBERS)
+        self.counts['back'] += np.bincount(back_zone.ravel() - 1, minlength=BACK_NUMBERS)
+        centered = front_zone.sum(axis=1) - FRONT_SUM_CENTER
+        self.sum_moments += (centered[:, None] ** np.arange(5)).sum(axis=0)
+        self.n_periods += len(front_zone)
+
+    def chi_square(self, zone='front'):
+        """
+        号码出现次数的均匀性卡方检验。每期不放回地开出 k 个号码，各号码计数负相关，
+        Pearson 统计量乘以 (N-1)/(N-k) 后在原假设下服从自由度 N-1 的卡方分布
+        :param zone: 'front' 或 'back'
+        :return: {'statistic', 'df', 'p_value'}
+        """
+        size, picks = ZONES[zone]
+        if self.n_periods == 0:
+            return {'statistic': 0.0, 'df': size - 1, 'p_value': 1.0}
+        expected = self.n_periods * picks / size
+        pearson = float(((self.counts[zone] - expected) ** 2).sum() / expected)
+        statistic = pearson * (size - 1) / (size - picks)
+        return {'statistic': statistic, 'df': size - 1, 'p_value': chi2_sf(statistic, size - 1)}
+
+    def entropy(self, zone='front'):
+        """
+        号码出现频率的香农熵
+        :return: {'entropy_bits', 'max_entropy_bits', 'normalized_entropy'}
+        """
+        size, _ = ZONES[zone]
+        counts = self.counts[zone]
+        total = counts.sum()
+        max_entropy = math.log2(size)
+        if total == 0:
+            return {'entropy_bits': 0.0, 'max_entropy_bits': max_entropy, 'normalized_entropy': 0.0}
+        p = counts[counts > 0] / total
+        entropy = float(-(p * np.log2(p)).sum())
+        return {'entropy_bits': entropy, 'max_entropy_bits': max_entropy,
+                'normalized_entropy': entropy / max_entropy}
+
+    def sum_normality(self):
+        """
+        前区和值的 Jarque-Bera 正态性检验（统计量在原假设下近似服从自由度2的卡方分布）
+        :return: {'mean', 'std', 'skewness', 'kurtosis', 'statistic', 'p_value'}
+        """
+        n = self.n_periods
+        if n < 2:
+            return None
+        raw = self.sum_moments[1:] / n
+        mean = raw[0]
+        m2 = raw[1] - mean ** 2
+        if m2 <= 0:
+            return None
+        m3 = raw[2] - 3 * mean * raw[1] + 2 * mean ** 3
+        m4 = raw[3] - 4 * mean * raw[2] + 6 * mean ** 2 * raw[1] - 3 * mean ** 4
+        skewness = m3 / m2 ** 1.5
+        kurtosis = m4 / m2 ** 2
+        statistic = n / 6 * (skewness ** 2 + (kurtosis - 3) ** 2 / 4)
+        return {'mean': float(mean + FRONT_SUM_CENTER), 'std': float(math.sqrt(m2)),
+                'skewness': float(skewness), 'kurtosis': float(kurtosis),
+                'statistic': float(statistic), 'p_value': math.exp(-statistic / 2)}
+
+def runs_test(indicators):
+    """
+    Wald-Wolfowitz 游程检验，对每一列0/1序列同时计算
+    :param indicators: 形状为 (期数, 列数) 的0/1矩阵，如47维多标签（每列为一个号码是否开出）
+    :return: (游程数, z值, 双侧p值)，均为长度为列数的数组；某列全0或全1时z为0、p为1
+    """
+    indicators = np.asarray(indicators).astype(bool)
+    n = len(indicators)
+    n1 = indicators.sum(axis=0).astype(np.float64)
+    n0 = n - n1
+    runs = 1 + (indicators[1:] != indicators[:-1]).sum(axis=0)
+    mean = 2 * n0 * n1 / max(n, 1) + 1
+    variance = 2 * n0 * n1 * (2 * n0 * n1 - n) / (max(n, 1) ** 2 * max(n - 1, 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(variance > 0, (runs - mean) / np.sqrt(variance), 0.0)
+    return runs, z, normal_two_sided_p(z)
+
+def repeat_rate(masks):
+    """相邻两期平均重复的号码个数（前后区合计）"""
+    masks = np.asarray(masks, dtype=np.uint64)
+    if len(masks) < 2:
+        return 0.0
+    return float(popcount(masks[1:] & masks[:-1]).mean())
+
+def permutation_test(front_zone, back_zone, n_resamples=1000, seed=None, max_workers=None, n_tasks=None):
+    """
+    开奖序列相邻期相关性的置换检验：统计量为相邻两期平均重复的号码个数，
+    原假设下开奖顺序可交换，随机重排期序得到统计量的零分布
+    :param front_zone: 前区号码，形状为 (期数, 5)，按时间先后排列
+    :param back_zone: 后区号码，形状为 (期数, 2)
+    :param n_resamples: 重排次数
+    :param seed: 随机种子
+    :param max_workers: 进程数，1表示在当前进程内计算
+    :param n_tasks: 任务数，默认为进程数的4倍
+    :return: {'statistic', 'null_mean', 'null_std', 'p_value', 'n_resamples'}
+    """
+    masks = np.atleast_1d(ticket_masks(front_zone, back_zone))
+    observed = repeat_rate(masks)
+    if len(masks) < 3 or n_resamples <= 0:
+        return {'statistic': observed, 'null_mean': None, 'null_std': None, 'p_value': None, 'n_resamples': 0}
+
+    in_process = max_workers == 1 or n_resamples * len(masks) < PERMUTATION_PARALLEL_THRESHOLD
+    n_tasks = n_tasks or (1 if in_process else 4 * (max_workers or 4))
+    n_tasks = max(1, min(n_tasks, n_resamples))
+    task_sizes = np.full(n_tasks, n_resamples // n_tasks)
+    task_sizes[:n_resamples % n_tasks] += 1
+    seeds = np.random.SeedSequence(seed).spawn(n_tasks)
+    tasks = [(masks, int(size), child) for size, child in zip(task_sizes, seeds)]
+
+    if in_process:
+        results = [_permutation_task(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_permutation_task, *zip(*tasks)))
+
+    null = np.concatenate(results)
+    null_mean = float(null.mean())
+    # 双侧：偏离零分布均值至少与观测值一样远的比例，加1避免p值为0
+    extreme = np.count_nonzero(np.abs(null - null_mean) >= abs(observed - null_mean) - 1e-12)
+    return {
+        'statistic': observed,
+        'null_mean': null_mean,
+        'null_std': float(null.std()),
+        'p_value': float((extreme + 1) / (n_resamples + 1)),
+        'n_resamples': int(n_resamples)
+    }
+
+def _permutation_task(masks, n_resamples, seed_sequence):
+    """在子进程中完成 n_resamples 次重排，返回各次的统计量"""
+    rng = np.random.default_rng(seed_sequence)
+    return np.array([repeat_rate(masks[rng.permutation(len(masks))]) for _ in range(n_resamples)])
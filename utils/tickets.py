@@ -0,0 +1,127 @@
+import logging
+
+import numpy as np
+
+from utils.draws import BACK_NUMBERS, BACK_PICKS, FRONT_NUMBERS, FRONT_PICKS
+
+logger = logging.getLogger(__name__)
+
+# 一注号码编码为47位掩码：第0-34位为前区1-35，第35-46位为后区1-12
+BACK_SHIFT = FRONT_NUMBERS
+FRONT_MASK = np.uint64((1 << FRONT_NUMBERS) - 1)
+
+# 备选注贪心选取时每次比较的候选块大小
+SELECTION_BLOCK = 256
+
+# 候选池选不满时最多重新抽取的轮数，每轮候选池加倍
+MAX_POOL_ROUNDS = 4
+
+def ticket_masks(front_zone, back_zone):
+    """
+    将号码转换为掩码
+    :param front_zone: 前区号码，形状为 (注数, 5) 或 (5,)
+    :param back_zone: 后区号码，形状为 (注数, 2) 或 (2,)
+    :return: uint64 掩码数组，形状为 (注数,) 或标量
+    """
+    front_zone = np.asarray(front_zone, dtype=np.uint64)
+    back_zone = np.asarray(back_zone, dtype=np.uint64)
+    one = np.uint64(1)
+    front_bits = np.bitwise_or.reduce(one << (front_zone - one), axis=-1)
+    back_bits = np.bitwise_or.reduce(one << (back_zone - one + np.uint64(BACK_SHIFT)), axis=-1)
+    return front_bits | back_bits
+
+def mask_numbers(mask):
+    """将单注掩码还原为 (前区号码列表, 后区号码列表)"""
+    mask = int(mask)
+    front = [n + 1 for n in range(FRONT_NUMBERS) if mask >> n & 1]
+    back = [n + 1 for n in range(BACK_NUMBERS) if mask >> (n + BACK_SHIFT) & 1]
+    return front, back
+
+def popcount(masks):
+    """逐元素统计uint64中置1的位数"""
+    masks = np.asarray(masks, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).astype(np.int64)
+    x = masks - ((masks >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((x * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+def sample_tickets(size, rng, front_weights=None, back_weights=None):
+    """
+    按号码权重批量生成不含重复号码的随机注（Gumbel-top-k 加权不放回抽样）
+    :param size: 注数
+    :param rng: numpy 随机数生成器
+    :param front_weights: 前区35个号码的权重，None表示等概率
+    :param back_weights: 后区12个号码的权重，None表示等概率
+    :return: (掩码数组, 每注的对数权重得分)
+    """
+    log_front = np.log(front_weights) if front_weights is not None else np.zeros(FRONT_NUMBERS)
+    log_back = np.log(back_weights) if back_weights is not None else np.zeros(BACK_NUMBERS)
+    front_index = np.argpartition(-(log_front + rng.gumbel(size=(size, FRONT_NUMBERS))),
+                                  FRONT_PICKS - 1, axis=1)[:, :FRONT_PICKS]
+    back_index = np.argpartition(-(log_back + rng.gumbel(size=(size, BACK_NUMBERS))),
+                                 BACK_PICKS - 1, axis=1)[:, :BACK_PICKS]
+    masks = ticket_masks(front_index + 1, back_index + 1)
+    scores = log_front[front_index].sum(axis=1) + log_back[back_index].sum(axis=1)
+    return masks, scores
+
+def diverse_alternatives(main_front, main_back, count, min_distance=4, front_weights=None, back_weights=None,
+                         seed=None, pool_size=None, max_rounds=MAX_POOL_ROUNDS):
+    """
+    生成与主预测及彼此之间距离都不小于 min_distance 的备选注。
+    距离为两注号码集合的对称差大小（掩码异或后的置位数），前区换一个号码距离为2。
+    先一次性抽取候选池并按权重得分排序，再按得分顺序分块贪心选取：
+    每块先用异或+置位计数与已选注整体比较，再在块内用两两距离矩阵顺序挑选，无需逐个拒绝重抽。
+    一个候选池选不满时另抽一个加倍的候选池继续选取，最多 max_rounds 轮
+    :param main_front: 主预测前区号码
+    :param main_back: 主预测后区号码
+    :param count: 备选注数
+    :param min_distance: 最小对称差距离
+    :param front_weights: 前区号码权重，用于让备选注偏向集成排名靠前的号码
+    :param back_weights: 后区号码权重
+    :param seed: 随机种子
+    :param pool_size: 第一轮候选池大小，默认为 max(5*count, 2000)
+    :param max_rounds: 最多抽取的候选池轮数
+    :return: [(前区号码, 后区号码, 与主预测的距离), ...]。最小距离过大时满足条件的注可能不存在，
+             此时数量少于 count 并记录警告，调用方应比较返回数量与 count
+    """
+    rng = np.random.default_rng(seed)
+    pool_size = pool_size or max(5 * count, 2000)
+    main_mask = ticket_masks(main_front, main_back)
+    selected = np.empty(0, dtype=np.uint64)
+    for _ in range(max_rounds):
+        masks, scores = sample_tickets(pool_size, rng, front_weights, back_weights)
+        masks, first = np.unique(masks, return_index=True)
+        masks = masks[np.argsort(-scores[first], kind='stable')]
+        masks = masks[popcount(masks ^ main_mask) >= min_distance]
+        selected = _select_diverse(masks, selected, count, min_distance)
+        if len(selected) >= count:
+            break
+        pool_size *= 2
+
+    if len(selected) < count:
+        logger.warning(f"{max_rounds} 轮候选池中满足最小距离 {min_distance} 的备选注只有 {len(selected)} 注，"
+                       f"少于请求的 {count} 注")
+    distances = popcount(selected ^ main_mask)
+    return [(*mask_numbers(mask), int(distance)) for mask, distance in zip(selected, distances)]
+
+def _select_diverse(masks, selected, count, min_distance):
+    """按顺序分块贪心，把与已选注及彼此距离都不小于 min_distance 的候选追加到 selected，至多 count 注"""
+    for start in range(0, len(masks), SELECTION_BLOCK):
+        if len(selected) >= count:
+            break
+        block = masks[start:start + SELECTION_BLOCK]
+        if len(selected):
+            block = block[(popcount(block[:, None] ^ selected[None, :]) >= min_distance).all(axis=1)]
+        compatible = popcount(block[:, None] ^ block[None, :]) >= min_distance
+        alive = np.ones(len(block), dtype=bool)
+        taken = []
+        for i in range(len(block)):
+            if alive[i]:
+                taken.append(i)
+                alive &= compatible[i]
+                if len(selected) + len(taken) >= count:
+                    break
+        selected = np.concatenate([selected, block[taken]])
+    return selected
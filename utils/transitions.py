@@ -0,0 +1,120 @@
+import numpy as np
+
+from utils.draws import BACK_NUMBERS, BACK_PICKS, FRONT_NUMBERS, FRONT_PICKS, NUM_LABELS, draws_to_multilabel
+
+# 遗漏期数达到该值后归为同一状态
+MAX_GAP_STATE = 30
+
+# 平滑强度：各条件频率向理论频率收缩，相当于额外观测到的期数
+SMOOTHING = 20.0
+
+# 各号码每期开出的理论概率
+BASE_RATES = np.concatenate([np.full(FRONT_NUMBERS, FRONT_PICKS / FRONT_NUMBERS),
+                             np.full(BACK_NUMBERS, BACK_PICKS / BACK_NUMBERS)])
+
+class TransitionModel:
+    """
+    相邻两期之间的转移统计：
+    号码转移矩阵 T[i, j] 为上一期开出 i 时下一期开出 j 的次数；
+    遗漏状态计数 hits[j, g] / trials[j, g] 为号码 j 已遗漏 g 期（0表示上一期刚开出）时下一期开出的次数与总次数。
+    批量构建为一次矩阵乘法与一次 bincount，每追加一期只更新与该期号码相关的计数
+    """
+
+    def __init__(self, max_gap=MAX_GAP_STATE, smoothing=SMOOTHING):
+        """
+        :param max_gap: 遗漏状态的上限
+        :param smoothing: 平滑强度
+        """
+        self.max_gap = max_gap
+        self.smoothing = smoothing
+        self.n_periods = 0
+        self.transitions = np.zeros((NUM_LABELS, NUM_LABELS), dtype=np.int64)
+        # 作为转移起点（之后还有下一期）的次数
+        self.source_counts = np.zeros(NUM_LABELS, dtype=np.int64)
+        self.gap_hits = np.zeros((NUM_LABELS, max_gap + 1), dtype=np.int64)
+        self.gap_trials = np.zeros((NUM_LABELS, max_gap + 1), dtype=np.int64)
+        # 最近一期的多标签与各号码最近一次开出的期序号（从未开出为-1）
+        self.last_labels = None
+        self.last_seen = np.full(NUM_LABELS, -1, dtype=np.int64)
+
+    @classmethod
+    def from_draws(cls, front_zone, back_zone, **kwargs):
+        """由完整的开奖历史一次构建"""
+        model = cls(**kwargs)
+        model.extend(front_zone, back_zone)
+        return model
+
+    def update(self, front, back):
+        """追加一期开奖"""
+        self.extend(np.asarray(front).reshape(1, FRONT_PICKS), np.asarray(back).reshape(1, BACK_PICKS))
+
+    def extend(self, front_zone, back_zone):
+        """
+        批量追加若干期，与已收录的最后一期衔接
+        :param front_zone: 前区号码，形状为 (期数, 5)，按时间先后排列
+        :param back_zone: 后区号码，形状为 (期数, 2)
+        """
+        labels = draws_to_multilabel(np.asarray(front_zone).reshape(-1, FRONT_PICKS),
+                                     np.asarray(back_zone).reshape(-1, BACK_PICKS)).astype(np.int64)
+        if len(labels) == 0:
+            return
+        sequence = labels if self.last_labels is None else np.vstack([self.last_labels, labels])
+        # 整数矩阵乘法不走BLAS，按浮点计算，计数远小于2^53时结果精确
+        self.transitions += np.rint(sequence[:-1].T.astype(np.float64) @ sequence[1:]).astype(np.int64)
+        self.source_counts += sequence[:-1].sum(axis=0)
+
+        # 每期开奖前各号码的遗漏状态：该期之前最近一次开出到上一期的间隔
+        periods = np.arange(self.n_periods, self.n_periods + len(labels))
+        seen = np.maximum.accumulate(np.vstack([self.last_seen, np.where(labels > 0, periods[:, None], -1)]), axis=0)
+        gaps = np.where(seen[:-1] >= 0, periods[:, None] - 1 - seen[:-1], self.max_gap)
+        states = np.minimum(gaps, self.max_gap)
+        # 第一期之前没有状态，不计入
+        valid = periods > 0
+        cells = (np.arange(NUM_LABELS) * (self.max_gap + 1) + states)[valid].ravel()
+        self.gap_trials += np.bincount(cells, minlength=self.gap_trials.size).reshape(self.gap_trials.shape)
+        self.gap_hits += np.bincount(cells, weights=labels[valid].ravel(),
+                                     minlength=self.gap_hits.size).astype(np.int64).reshape(self.gap_hits.shape)
+
+        self.last_labels = labels[-1]
+        self.last_seen = seen[-1]
+        self.n_periods += len(labels)
+
+    def current_gaps(self):
+        """各号码当前的遗漏期数（从未开出的号码为 max_gap）"""
+        if self.n_periods == 0:
+            return np.full(NUM_LABELS, self.max_gap, dtype=np.int64)
+        return np.where(self.last_seen >= 0, self.n_periods - 1 - self.last_seen, self.max_gap)
+
+    def transition_probabilities(self, previous=None):
+        """
+        给定上一期号码时下一期各号码开出的概率：对上一期每个开出号码所在的转移行取平均，并向理论频率平滑
+        :param previous: 上一期的47维多标签，默认为已收录的最后一期
+        :return: 长度47的概率数组
+        """
+        previous = self.last_labels if previous is None else np.asarray(previous)
+        if previous is None or not previous.any():
+            return BASE_RATES.copy()
+        sources = np.flatnonzero(previous)
+        rows = (self.transitions[sources] + self.smoothing * BASE_RATES) / \
+            (self.source_counts[sources, None] + self.smoothing)
+        return rows.mean(axis=0)
+
+    def gap_probabilities(self, gaps=None):
+        """
+        给定各号码遗漏状态时下一期开出的概率，向理论频率平滑
+        :param gaps: 长度47的遗漏期数，默认为当前遗漏
+        :return: 长度47的概率数组
+        """
+        gaps = self.current_gaps() if gaps is None else np.asarray(gaps)
+        states = np.minimum(gaps, self.max_gap)
+        numbers = np.arange(NUM_LABELS)
+        return (self.gap_hits[numbers, states] + self.smoothing * BASE_RATES) / \
+            (self.gap_trials[numbers, states] + self.smoothing)
+
+    def scores(self):
+        """
+        下一期各号码的得分：号码转移与遗漏状态两个条件概率的平均
+        :return: (前区得分 (35,), 后区得分 (12,))
+        """
+        probabilities = (self.transition_probabilities() + self.gap_probabilities()) / 2
+        return probabilities[:FRONT_NUMBERS], probabilities[FRONT_NUMBERS:]